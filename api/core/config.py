@@ -1,4 +1,5 @@
-from decouple import config
+from typing import Literal
+from decouple import Choices, config
 from fastapi_mail import ConnectionConfig
 
 # import os
@@ -46,6 +47,66 @@ class Config:
     GITHUB_CLIENT_SECRET = config("GITHUB_CLIENT_SECRET")
     GITHUB_REDIRECT_URI = config("GITHUB_REDIRECT_URI")
 
+    # Optional read replica; read-only routes use the primary when unset.
+    # Requires BACKPLANE=postgres, which carries read-your-writes across workers
+    DATABASE_REPLICA_URL: str = config("DATABASE_REPLICA_URL", default="")
+    # How long a user's reads stay on the primary after one of their writes
+    READ_YOUR_WRITES_SECONDS: int = int(config("READ_YOUR_WRITES_SECONDS", default=5))
+
+    # Database connection pool, per worker process (render.yaml runs 4 workers,
+    # so the database sees up to 4 * (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections)
+    DB_POOL_SIZE: int = int(config("DB_POOL_SIZE", default=5))
+    DB_MAX_OVERFLOW: int = int(config("DB_MAX_OVERFLOW", default=10))
+    DB_POOL_TIMEOUT: float = float(config("DB_POOL_TIMEOUT", default=30))
+    DB_POOL_RECYCLE: int = int(config("DB_POOL_RECYCLE", default=1800))
+    DB_POOL_PRE_PING: bool = config("DB_POOL_PRE_PING", default=True, cast=bool)
+    # Worker threads for sync dependencies and run_in_threadpool, per process
+    THREADPOOL_LIMIT: int = int(config("THREADPOOL_LIMIT", default=40))
+    # Bearer token for the /api/v1/metrics endpoints; they are disabled when unset
+    METRICS_TOKEN: str = config("METRICS_TOKEN", default="")
+
+    # Coalesce message inserts arriving within a few milliseconds into one commit
+    MESSAGE_GROUP_COMMIT: bool = config("MESSAGE_GROUP_COMMIT", default=False, cast=bool)
+    MESSAGE_GROUP_COMMIT_WINDOW_MS: float = float(config("MESSAGE_GROUP_COMMIT_WINDOW_MS", default=5))
+    MESSAGE_GROUP_COMMIT_MAX_BATCH: int = int(config("MESSAGE_GROUP_COMMIT_MAX_BATCH", default=100))
+
+    # Confirmed chat memberships kept per worker for authorization checks
+    MEMBERSHIP_CACHE_TTL_SECONDS: float = float(config("MEMBERSHIP_CACHE_TTL_SECONDS", default=60))
+    MEMBERSHIP_CACHE_SIZE: int = int(config("MEMBERSHIP_CACHE_SIZE", default=100000))
+
+    # Delivery/read acks from sockets are applied per chat at most once per window
+    RECEIPT_BATCH_WINDOW_MS: float = float(config("RECEIPT_BATCH_WINDOW_MS", default=250))
+
+    # WebSocket delivery: messages buffered per connection, and what to do when
+    # a slow client fills its buffer ("drop_oldest" or "disconnect"; anything
+    # else fails at startup)
+    WS_SEND_QUEUE_SIZE: int = int(config("WS_SEND_QUEUE_SIZE", default=100))
+    WS_OVERFLOW_POLICY: Literal["drop_oldest", "disconnect"] = config(
+        "WS_OVERFLOW_POLICY", default="drop_oldest", cast=Choices(["drop_oldest", "disconnect"])
+    )
+    # Idle sockets get a ping, then are closed if they stay silent
+    WS_PING_INTERVAL_SECONDS: float = float(config("WS_PING_INTERVAL_SECONDS", default=30))
+    WS_PONG_TIMEOUT_SECONDS: float = float(config("WS_PONG_TIMEOUT_SECONDS", default=10))
+    WS_HEARTBEAT_TICK_SECONDS: float = float(config("WS_HEARTBEAT_TICK_SECONDS", default=1))
+    # Presence is written to the database once per flush interval; a stored
+    # online flag not refreshed within the stale window counts as offline
+    PRESENCE_FLUSH_SECONDS: float = float(config("PRESENCE_FLUSH_SECONDS", default=15))
+    PRESENCE_STALE_SECONDS: float = float(config("PRESENCE_STALE_SECONDS", default=45))
+    # Cross-worker fan-out: "memory" (single worker) or "postgres" (LISTEN/NOTIFY)
+    BACKPLANE: str = config("BACKPLANE", default="memory")
+    # Connections each worker keeps for publishing on the postgres backplane
+    BACKPLANE_PUBLISH_POOL_SIZE: int = int(config("BACKPLANE_PUBLISH_POOL_SIZE", default=2))
+
+    # Translation
+    TRANSLATION_CACHE_SIZE: int = int(config("TRANSLATION_CACHE_SIZE", default=10000))
+    TRANSLATION_BACKEND: str = config("TRANSLATION_BACKEND", default="google")  # "google" or "stub"
+    TRANSLATION_MAX_WORKERS: int = int(config("TRANSLATION_MAX_WORKERS", default=8))
+    TRANSLATION_TIMEOUT_SECONDS: float = float(config("TRANSLATION_TIMEOUT_SECONDS", default=5))
+    TRANSLATION_BREAKER_FAILURES: int = int(config("TRANSLATION_BREAKER_FAILURES", default=5))
+    TRANSLATION_BREAKER_RESET_SECONDS: float = float(
+        config("TRANSLATION_BREAKER_RESET_SECONDS", default=30)
+    )
+
 # Create a config instance
 config = Config()
 
@@ -0,0 +1,17 @@
+from uvicorn.workers import UvicornWorker
+from api.core.config import config
+
+
+class HeartbeatUvicornWorker(UvicornWorker):
+    """Uvicorn worker for gunicorn that pings every WebSocket at the protocol level.
+
+    Browsers and other clients answer ping frames on their own, so sockets
+    that never send anything stay up while half-open ones are closed,
+    which the route sees as a disconnect.
+    """
+
+    CONFIG_KWARGS = {
+        **UvicornWorker.CONFIG_KWARGS,
+        "ws_ping_interval": config.WS_PING_INTERVAL_SECONDS,
+        "ws_ping_timeout": config.WS_PONG_TIMEOUT_SECONDS,
+    }
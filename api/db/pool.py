@@ -0,0 +1,72 @@
+import os
+import time
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+class PoolMetrics:
+    """Checkout wait times and timeouts of one connection pool."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, waited: float, timed_out: bool = False):
+        self.checkouts += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        if timed_out:
+            self.timeouts += 1
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited for a connection.
+
+    The wait covers queueing for a free connection and, past `pool_size`,
+    opening an overflow connection. Metrics survive pool recreation (after
+    invalidation or `dispose()`).
+    """
+
+    def __init__(self, *args, max_overflow: int = 10, **kwargs):
+        super().__init__(*args, max_overflow=max_overflow, **kwargs)
+        # QueuePool only keeps its own copy privately
+        self.max_overflow = max_overflow
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.metrics.record(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def pool_status(pool) -> dict:
+    """Snapshot of `pool` for this worker process."""
+    status = {"pid": os.getpid(), "pool": type(pool).__name__}
+    if isinstance(pool, InstrumentedPool):
+        metrics = pool.metrics
+        status.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+            max_overflow=pool.max_overflow,
+            checkouts=metrics.checkouts,
+            timeouts=metrics.timeouts,
+            average_wait_ms=metrics.total_wait / metrics.checkouts * 1000
+            if metrics.checkouts
+            else 0.0,
+            max_wait_ms=metrics.max_wait * 1000,
+        )
+    return status
@@ -1,19 +1,155 @@
-from sqlalchemy import create_engine
+import asyncio
+import logging
+import sys
+import time
+from fastapi import Depends, Request
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from api.core.config import config
+from api.db.pool import InstrumentedPool
+from api.utils.recent_writes import recent_writes
 from api.utils.settings import DATABASE_URL
 
 SQLALCHEMY_DATABASE_URL = DATABASE_URL
 
+logger = logging.getLogger(__name__)
+
+
+def _async_url(url: str) -> str:
+    """Map a database URL onto its asyncio driver (asyncpg for PostgreSQL)."""
+    for prefix in ("postgres://", "postgresql://", "postgresql+psycopg2://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    return url
+
+
+# Synchronous engine, only for scripts and maintenance jobs
 engine = create_engine(SQLALCHEMY_DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def _pool_options(url: str) -> dict:
+    # SQLite (local runs) keeps the dialect's default pool
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "poolclass": InstrumentedPool,
+        "pool_size": config.DB_POOL_SIZE,
+        "max_overflow": config.DB_MAX_OVERFLOW,
+        "pool_timeout": config.DB_POOL_TIMEOUT,
+        "pool_recycle": config.DB_POOL_RECYCLE,
+        "pool_pre_ping": config.DB_POOL_PRE_PING,
+    }
+
+
+# Asynchronous engine used by the application
+async_engine = create_async_engine(
+    _async_url(SQLALCHEMY_DATABASE_URL), **_pool_options(SQLALCHEMY_DATABASE_URL)
+)
+
+# Objects stay usable after commit; lazy loads are not possible on AsyncSession
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+# Replica for read-only routes, falling back to the primary when not configured
+if config.DATABASE_REPLICA_URL:
+    replica_engine = create_async_engine(
+        _async_url(config.DATABASE_REPLICA_URL), **_pool_options(config.DATABASE_REPLICA_URL)
+    )
+    ReplicaSessionLocal = async_sessionmaker(
+        replica_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+else:
+    replica_engine = None
+    ReplicaSessionLocal = AsyncSessionLocal
+
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+
+async def record_write(user_id: str):
+    """Keep `user_id`'s reads on the primary for READ_YOUR_WRITES_SECONDS after a write."""
+    if replica_engine is not None:
+        await recent_writes.record(user_id)
+
+
+async def get_read_db(request: Request, db: AsyncSession = Depends(get_db)):
+    """Session for read-only routes: the replica, unless the user just wrote.
+
+    Otherwise, and when no replica is configured, this is the request's
+    primary session itself, so the request holds a single connection.
+    `request.state.user_id` is the caller's id taken from the token.
+    """
+    user_id = getattr(request.state, "user_id", None)
+    if replica_engine is None or recent_writes.wrote_recently(user_id):
+        yield db
+        return
+    async with ReplicaSessionLocal() as replica:
+        yield replica
+
+
+async def benchmark(
+    requests: int = 2000, concurrency: int = 100, query: str = "SELECT count(*) FROM messages"
+):
+    """Compare concurrent-request throughput of the sync and async sessions.
+
+    Each simulated request is an `async def` handler running `query`:
+    through `SessionLocal`, as handlers did before, which blocks the event
+    loop, and through `AsyncSessionLocal`. Reports requests per second and
+    the longest the event loop went without running other tasks (what a
+    WebSocket on the same worker would wait).
+    """
+    statement = text(query)
+
+    async def sync_handler():
+        with SessionLocal() as db:
+            db.execute(statement).scalar()
+
+    async def async_handler():
+        async with AsyncSessionLocal() as db:
+            (await db.execute(statement)).scalar()
+
+    async def run(handler):
+        slots = asyncio.Semaphore(concurrency)
+        stall = 0.0
+        done = False
+
+        async def one():
+            async with slots:
+                await handler()
+
+        async def watch_loop():
+            nonlocal stall
+            last = time.perf_counter()
+            while not done:
+                await asyncio.sleep(0.001)
+                now = time.perf_counter()
+                stall = max(stall, now - last)
+                last = now
+
+        watcher = asyncio.create_task(watch_loop())
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - start
+        done = True
+        await watcher
+        return requests / elapsed, stall * 1000
+
+    sync_rate, sync_stall = await run(sync_handler)
+    async_rate, async_stall = await run(async_handler)
+    logger.info("Sync session:  %.0f requests/s, event loop stalled up to %.0f ms", sync_rate, sync_stall)
+    logger.info("Async session: %.0f requests/s, event loop stalled up to %.0f ms", async_rate, async_stall)
+
+
+if __name__ == "__main__":
+    # python -m api.db.session [requests] [concurrency] [query]
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(benchmark(*(int(arg) for arg in sys.argv[1:3]), *sys.argv[3:4]))
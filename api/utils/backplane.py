@@ -0,0 +1,231 @@
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional
+from uuid import uuid4
+from api.core.config import config
+
+logger = logging.getLogger(__name__)
+
+# PostgreSQL rejects NOTIFY payloads of 8000 bytes or more
+MAX_NOTIFY_PAYLOAD = 7999
+RECONNECT_DELAY_SECONDS = 1
+MAX_RECONNECT_DELAY_SECONDS = 30
+
+
+class Backplane(ABC):
+    """Pub/sub channel shared by every worker process.
+
+    Publishing to a channel reaches the handlers subscribed to it in every
+    worker, including the publishing one. Each worker subscribes only to
+    the channels it has local sockets for.
+    """
+
+    name = "base"
+
+    def __init__(self):
+        self._handlers: Dict[str, Callable[[str], None]] = {}
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    @abstractmethod
+    async def publish(self, channel: str, message: str):
+        """Deliver `message` to the handlers subscribed to `channel` in every worker."""
+
+    async def subscribe(self, channel: str, handler: Callable[[str], None]):
+        self._handlers[channel] = handler
+
+    async def unsubscribe(self, channel: str):
+        self._handlers.pop(channel, None)
+
+    def _dispatch(self, channel: str, message: str):
+        handler = self._handlers.get(channel)
+        if handler is not None:
+            handler(message)
+
+
+class InMemoryBackplane(Backplane):
+    """Single-process backplane for tests and one-worker runs."""
+
+    name = "memory"
+
+    async def publish(self, channel: str, message: str):
+        self._dispatch(channel, message)
+
+
+def _split_utf8(data: bytes, size: int) -> List[str]:
+    """Split encoded text into pieces of at most `size` bytes, never inside a character."""
+    pieces = []
+    start = 0
+    while start < len(data):
+        end = min(start + size, len(data))
+        # Back off continuation bytes (0b10xxxxxx) to a character boundary
+        while end < len(data) and data[end] & 0xC0 == 0x80:
+            end -= 1
+        pieces.append(data[start:end].decode("utf-8"))
+        start = end
+    return pieces
+
+
+class PostgresBackplane(Backplane):
+    """Backplane on PostgreSQL LISTEN/NOTIFY.
+
+    Each worker listens on one dedicated connection. LISTEN/UNLISTEN are
+    reconciled against the wanted subscriptions under a lock, so quick
+    subscribe/unsubscribe sequences always settle on the latest state. If
+    the connection drops, it is reopened with backoff and every channel is
+    listened to again.
+
+    Publishing goes through a small pool of its own, so publishes never
+    queue behind each other or behind LISTEN changes. Every payload is
+    framed: messages that fit the NOTIFY limit go out whole, larger ones
+    are split into chunks sent in one transaction, which PostgreSQL
+    delivers together and in order, and are reassembled by the listeners.
+    """
+
+    name = "postgres"
+
+    # Frame headers: ":" + message, or "<message id>:<index>:<count>:" + chunk
+    WHOLE = ":"
+
+    def __init__(self, dsn: str, publish_pool_size: int = config.BACKPLANE_PUBLISH_POOL_SIZE):
+        super().__init__()
+        self.dsn = dsn
+        self.publish_pool_size = publish_pool_size
+        self._connection = None
+        self._publish_pool = None
+        self._listening = set()
+        self._lock = asyncio.Lock()
+        self._partial: Dict[str, List[Optional[str]]] = {}
+        self._reconnect_task = None
+        self._stopped = False
+
+    async def start(self):
+        import asyncpg
+
+        self._stopped = False
+        await self._connect()
+        self._publish_pool = await asyncpg.create_pool(
+            self.dsn, min_size=1, max_size=self.publish_pool_size
+        )
+
+    async def stop(self):
+        self._stopped = True
+        if self._reconnect_task:
+            self._reconnect_task.cancel()
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+        if self._publish_pool is not None:
+            await self._publish_pool.close()
+            self._publish_pool = None
+
+    async def _connect(self):
+        import asyncpg
+
+        async with self._lock:
+            self._connection = await asyncpg.connect(self.dsn)
+            self._connection.add_termination_listener(self._on_terminated)
+            self._listening = set()
+            # Chunks cut off by a lost connection will never be completed
+            self._partial = {}
+            for channel in list(self._handlers):
+                await self._reconcile(channel)
+
+    def _on_terminated(self, connection):
+        if self._stopped or connection is not self._connection:
+            return
+        logger.warning("Backplane connection lost; reconnecting")
+        self._connection = None
+        self._reconnect_task = asyncio.create_task(self._reconnect())
+
+    async def _reconnect(self):
+        delay = RECONNECT_DELAY_SECONDS
+        while not self._stopped:
+            try:
+                await self._connect()
+                return
+            except Exception as e:
+                logger.error("Backplane reconnect failed: %s", e)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_RECONNECT_DELAY_SECONDS)
+
+    @classmethod
+    def _frames(cls, message: str) -> List[str]:
+        """NOTIFY payloads carrying `message`, each within the NOTIFY limit."""
+        data = message.encode("utf-8")
+        if len(cls.WHOLE) + len(data) <= MAX_NOTIFY_PAYLOAD:
+            return [cls.WHOLE + message]
+        message_id = uuid4().hex
+        # Room for the longest header; chunk counts stay far below 10**6
+        size = MAX_NOTIFY_PAYLOAD - len(f"{message_id}:999999:999999:")
+        chunks = _split_utf8(data, size)
+        return [
+            f"{message_id}:{index}:{len(chunks)}:{chunk}" for index, chunk in enumerate(chunks)
+        ]
+
+    def _on_notification(self, connection, pid, channel, payload):
+        if payload.startswith(self.WHOLE):
+            self._dispatch(channel, payload[len(self.WHOLE):])
+            return
+        message_id, index, count, chunk = payload.split(":", 3)
+        parts = self._partial.setdefault(message_id, [None] * int(count))
+        parts[int(index)] = chunk
+        if all(part is not None for part in parts):
+            del self._partial[message_id]
+            self._dispatch(channel, "".join(parts))
+
+    async def _reconcile(self, channel: str):
+        # Caller holds the lock
+        if self._connection is None:
+            return
+        wanted = channel in self._handlers
+        if wanted and channel not in self._listening:
+            await self._connection.add_listener(channel, self._on_notification)
+            self._listening.add(channel)
+        elif not wanted and channel in self._listening:
+            await self._connection.remove_listener(channel, self._on_notification)
+            self._listening.discard(channel)
+
+    async def subscribe(self, channel: str, handler: Callable[[str], None]):
+        await super().subscribe(channel, handler)
+        async with self._lock:
+            await self._reconcile(channel)
+
+    async def unsubscribe(self, channel: str):
+        await super().unsubscribe(channel)
+        async with self._lock:
+            await self._reconcile(channel)
+
+    async def publish(self, channel: str, message: str):
+        if self._publish_pool is None:
+            logger.warning("Backplane unavailable; delivering %s locally", channel)
+            self._dispatch(channel, message)
+            return
+        frames = self._frames(message)
+        async with self._publish_pool.acquire() as connection:
+            if len(frames) == 1:
+                await connection.execute("SELECT pg_notify($1, $2)", channel, frames[0])
+                return
+            async with connection.transaction():
+                await connection.executemany(
+                    "SELECT pg_notify($1, $2)", [(channel, frame) for frame in frames]
+                )
+
+
+def _postgres_dsn(url: str) -> str:
+    # asyncpg takes a plain libpq URL, without the SQLAlchemy driver suffix
+    return "postgresql://" + url.split("://", 1)[1]
+
+
+def _create_backplane() -> Backplane:
+    if config.BACKPLANE == PostgresBackplane.name:
+        return PostgresBackplane(_postgres_dsn(config.DATABASE_URL))
+    return InMemoryBackplane()
+
+
+backplane = _create_backplane()
@@ -0,0 +1,37 @@
+import base64
+import json
+from datetime import datetime
+from fastapi import HTTPException
+
+
+def encode_cursor(*values) -> str:
+    """Encode a keyset position into an opaque, URL-safe cursor."""
+    raw = json.dumps(
+        [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    ).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """Decode a cursor produced by `encode_cursor` back into its values."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def encode_message_cursor(message) -> str:
+    return encode_cursor(message.timestamp, message.id)
+
+
+def decode_message_cursor(cursor: str):
+    timestamp, message_id = decode_cursor(cursor, 2)
+    try:
+        return datetime.fromisoformat(timestamp), message_id
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
@@ -0,0 +1,39 @@
+import uuid
+from typing import Dict
+
+
+class PresenceTracker:
+    """Which users have sockets on this worker.
+
+    Connect and disconnect are O(1) counter updates; nothing touches the
+    database or the network here. A user who disconnects and reconnects
+    between two flushes produces no change at all.
+    """
+
+    def __init__(self):
+        # Identifies this worker process's rows in user_presence
+        self.worker_id = uuid.uuid4().hex
+        self._sockets: Dict[str, int] = {}
+
+    def connected(self, user_id: str):
+        self._sockets[user_id] = self._sockets.get(user_id, 0) + 1
+
+    def disconnected(self, user_id: str):
+        remaining = self._sockets.get(user_id, 0) - 1
+        if remaining > 0:
+            self._sockets[user_id] = remaining
+        else:
+            self._sockets.pop(user_id, None)
+
+    def is_online(self, user_id: str) -> bool:
+        return user_id in self._sockets
+
+    def online_users(self) -> list:
+        return list(self._sockets)
+
+    def clear(self):
+        # On shutdown: every local user goes offline at the next flush
+        self._sockets.clear()
+
+
+presence = PresenceTracker()
@@ -0,0 +1,50 @@
+import time
+from typing import Dict, Optional
+from api.core.config import config
+from api.utils.backplane import Backplane, backplane
+
+# Backplane channel carrying the id of every user who just wrote
+CHANNEL = "recent_writes"
+
+
+class RecentWrites:
+    """Which users wrote within the last `window` seconds, on any worker.
+
+    Read-only routes send these users to the primary instead of the
+    replica, so they always see their own changes even if the replica
+    lags. Writes are announced over the backplane, so with the postgres
+    backplane this holds whichever worker serves the next read and however
+    the write was sent (HTTP or WebSocket). The in-memory backplane only
+    reaches the worker itself, which is why a replica requires the
+    postgres one (see `main.start_backplane`).
+    """
+
+    def __init__(self, window: float, backplane: Backplane = backplane):
+        self.window = window
+        self.backplane = backplane
+        self._deadlines: Dict[str, float] = {}
+        self._prune_at = 1024
+
+    async def start(self):
+        await self.backplane.subscribe(CHANNEL, self._remember)
+
+    async def record(self, user_id: str):
+        """Announce a committed write by `user_id` to every worker, this one included."""
+        await self.backplane.publish(CHANNEL, user_id)
+
+    def _remember(self, user_id: str):
+        now = time.monotonic()
+        self._deadlines[user_id] = now + self.window
+        if len(self._deadlines) >= self._prune_at:
+            # Amortised O(1): only sweep once the map has doubled
+            self._deadlines = {
+                user: deadline for user, deadline in self._deadlines.items() if deadline > now
+            }
+            self._prune_at = max(1024, 2 * len(self._deadlines))
+
+    def wrote_recently(self, user_id: Optional[str]) -> bool:
+        deadline = self._deadlines.get(user_id) if user_id else None
+        return deadline is not None and deadline > time.monotonic()
+
+
+recent_writes = RecentWrites(config.READ_YOUR_WRITES_SECONDS)
@@ -0,0 +1,244 @@
+import asyncio
+import time
+import logging
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from api.core.config import config
+
+logger = logging.getLogger(__name__)
+
+
+class TranslationError(Exception):
+    status_code = 502
+
+
+class TranslationTimeout(TranslationError):
+    status_code = 504
+
+
+class CircuitOpenError(TranslationError):
+    status_code = 503
+
+
+class InvalidLanguageError(TranslationError):
+    status_code = 400
+
+
+class TranslationBackend(ABC):
+    """Interface for translation and language-detection providers.
+
+    Implementations are plain blocking calls; `TranslationExecutor` takes
+    care of running them off the event loop.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def translate(self, text: str, target_language: str) -> str:
+        ...
+
+    @abstractmethod
+    def detect(self, text: str) -> str:
+        ...
+
+    def supports(self, language: str) -> bool:
+        """Whether `language` is a target language code this backend accepts."""
+        return True
+
+    def is_transient(self, error: Exception) -> bool:
+        """Whether `error` means the service is unhealthy rather than the request was bad."""
+        return False
+
+    def warm_up(self):
+        """Load models or open connections before the first real call."""
+
+
+class GoogleTranslationBackend(TranslationBackend):
+    name = "google"
+
+    def translate(self, text: str, target_language: str) -> str:
+        from deep_translator import GoogleTranslator
+
+        return GoogleTranslator(source="auto", target=target_language).translate(text)
+
+    def detect(self, text: str) -> str:
+        from langdetect import detect
+
+        return detect(text)
+
+    def supports(self, language: str) -> bool:
+        from deep_translator.constants import GOOGLE_LANGUAGES_TO_CODES
+
+        return language in GOOGLE_LANGUAGES_TO_CODES.values()
+
+    def is_transient(self, error: Exception) -> bool:
+        import requests
+        from deep_translator.exceptions import RequestError, TooManyRequests
+
+        # Non-2xx responses, throttling and network failures
+        return isinstance(
+            error, (RequestError, TooManyRequests, requests.ConnectionError, requests.Timeout)
+        )
+
+    def warm_up(self):
+        from langdetect import DetectorFactory, detect
+
+        # Deterministic results, and load the language profiles up front
+        DetectorFactory.seed = 0
+        detect("warming up the language detector")
+
+
+class StubTranslationBackend(TranslationBackend):
+    """Offline backend for load tests and local runs; never touches the network."""
+
+    name = "stub"
+
+    def translate(self, text: str, target_language: str) -> str:
+        return f"[{target_language}] {text}"
+
+    def detect(self, text: str) -> str:
+        return "en"
+
+
+BACKENDS = {
+    GoogleTranslationBackend.name: GoogleTranslationBackend,
+    StubTranslationBackend.name: StubTranslationBackend,
+}
+
+
+class CircuitBreaker:
+    """Stop calling a failing backend for a while instead of piling up timeouts.
+
+    After `failure_threshold` consecutive failures the circuit opens and calls
+    fail fast for `reset_timeout` seconds; then a single trial call is let
+    through, closing the circuit again if it succeeds.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                logger.warning("Translation circuit opened after %s failures", self.failures)
+            self.opened_at = time.monotonic()
+
+
+class TranslationExecutor:
+    """Run a `TranslationBackend` on a bounded thread pool.
+
+    Every call is capped by a semaphore (held until the worker thread really
+    finishes, so timed-out calls still count against the cap), bounded by a
+    timeout, and translations go through a circuit breaker that only counts
+    timeouts and failures of the service itself, not rejected requests.
+    """
+
+    def __init__(
+        self,
+        backend: TranslationBackend,
+        max_workers: int,
+        timeout: float,
+        breaker: CircuitBreaker,
+    ):
+        self.backend = backend
+        self.timeout = timeout
+        self.breaker = breaker
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="translation"
+        )
+        self._slots = asyncio.Semaphore(max_workers)
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            raise TranslationTimeout("Translation service is busy")
+
+        future = loop.run_in_executor(self._executor, fn, *args)
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            raise TranslationTimeout("Translation timed out")
+
+    def supports(self, language: str) -> bool:
+        return self.backend.supports(language)
+
+    async def translate(self, text: str, target_language: str) -> str:
+        if not self.supports(target_language):
+            raise InvalidLanguageError(f"Unsupported target language: {target_language}")
+        if not self.breaker.allow():
+            raise CircuitOpenError("Translation service temporarily unavailable")
+        try:
+            result = await self._run(self.backend.translate, text, target_language)
+        except Exception as e:
+            if isinstance(e, TranslationTimeout) or self.backend.is_transient(e):
+                self.breaker.record_failure()
+            else:
+                # The service answered; a rejected request says nothing about its health
+                self.breaker.record_success()
+            if isinstance(e, TranslationError):
+                raise
+            logger.error("Translation failed: %s", e)
+            raise TranslationError("Translation failed")
+        self.breaker.record_success()
+        return result
+
+    async def detect(self, text: str) -> str:
+        try:
+            return await self._run(self.backend.detect, text)
+        except TranslationError:
+            raise
+        except Exception as e:
+            logger.error("Language detection failed: %s", e)
+            raise TranslationError("Language detection failed")
+
+    async def warm_up(self):
+        await asyncio.get_running_loop().run_in_executor(self._executor, self.backend.warm_up)
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend.name,
+            "circuit": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+        }
+
+
+translator = TranslationExecutor(
+    backend=BACKENDS[config.TRANSLATION_BACKEND](),
+    max_workers=config.TRANSLATION_MAX_WORKERS,
+    timeout=config.TRANSLATION_TIMEOUT_SECONDS,
+    breaker=CircuitBreaker(
+        failure_threshold=config.TRANSLATION_BREAKER_FAILURES,
+        reset_timeout=config.TRANSLATION_BREAKER_RESET_SECONDS,
+    ),
+)
@@ -2,12 +2,13 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 from passlib.context import CryptContext
 
 from api.v1.models.user import User
 from api.utils.settings import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
-from api.db.session import get_db
+from api.db.session import get_db, get_read_db
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
@@ -43,6 +44,17 @@ def decode_access_token(token: str):
         return None
 
 
+def token_user_id(authorization: Optional[str]) -> Optional[str]:
+    """User id of a valid `Bearer` access token header, without touching the database."""
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer":
+        return None
+    payload = decode_access_token(token)
+    if not payload or payload.get("type") != "access":
+        return None
+    return payload.get("user_id")
+
+
 def verify_access_token(token: str, credentials_exception) -> str:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
@@ -98,10 +110,22 @@ def refresh_access_token(current_refresh_token: str):
 #     return user
 
 # Get current user from the token
-def get_current_user(
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db)
+) -> User:
+    return await _user_from_token(credentials, db)
+
+
+async def get_current_reader(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db),
 ) -> User:
+    """`get_current_user` for read-only routes, looked up through the read session."""
+    return await _user_from_token(credentials, db)
+
+
+async def _user_from_token(credentials: HTTPAuthorizationCredentials, db: AsyncSession) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -111,7 +135,7 @@ def get_current_user(
     token = credentials.credentials
     user_id = verify_access_token(token, credentials_exception)
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if user is None:
         raise credentials_exception
     return user
\ No newline at end of file
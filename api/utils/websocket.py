@@ -1,113 +1,353 @@
-import json
-from fastapi import WebSocket
-from typing import Dict, List
+import asyncio
+import logging
+import math
+import time
+from functools import partial
+import msgpack
+import orjson
+from fastapi import WebSocket, WebSocketDisconnect, status
+from starlette.websockets import WebSocketState
+from typing import Dict, Optional, Union
+from api.core.config import config
+from api.utils.backplane import Backplane, backplane
+from api.utils.presence import PresenceTracker, presence
+
+logger = logging.getLogger(__name__)
+
+DROP_OLDEST = "drop_oldest"
+DISCONNECT = "disconnect"
+
+# Subprotocol a client offers to get binary MessagePack frames instead of JSON text
+MSGPACK = "msgpack"
+
+
+class Frame:
+    """One outbound event, serialized at most once per wire format.
+
+    The same Frame is queued on every recipient, so fan-out shares one JSON
+    string and, if any recipient negotiated it, one MessagePack buffer.
+    ASGI text messages are `str`, so the server still UTF-8 encodes the
+    string on each send. MessagePack is packed from the source event when
+    the Frame was built from one, and from the parsed text otherwise (a
+    broadcast arriving over the backplane).
+    """
+
+    __slots__ = ("text", "event", "_packed")
+
+    def __init__(self, text: str, event: Optional[dict] = None):
+        self.text = text
+        self.event = event
+        self._packed = None
+
+    @classmethod
+    def from_event(cls, event: Union[dict, str]) -> "Frame":
+        if isinstance(event, str):
+            return cls(event)
+        return cls(encode_event(event), event)
+
+    @property
+    def packed(self) -> bytes:
+        if self._packed is None:
+            if self.event is not None:
+                self._packed = msgpack.packb(self.event, default=_json_value)
+                return self._packed
+            try:
+                self._packed = msgpack.packb(orjson.loads(self.text))
+            except orjson.JSONDecodeError:
+                # Plain-text payloads are sent as a MessagePack string
+                self._packed = msgpack.packb(self.text)
+        return self._packed
+
+
+def _json_value(value):
+    # Values only orjson knows (datetimes, UUIDs) go into MessagePack as in JSON
+    return orjson.loads(orjson.dumps(value))
+
+
+def encode_event(event: dict) -> str:
+    return orjson.dumps(event).decode()
+
+
+def decode_frame(message: dict) -> Optional[dict]:
+    """Decode an inbound ASGI WebSocket message (JSON text or MessagePack bytes)."""
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", status.WS_1000_NORMAL_CLOSURE))
+    try:
+        if message.get("bytes") is not None:
+            frame = msgpack.unpackb(message["bytes"])
+        else:
+            frame = orjson.loads(message.get("text") or "")
+    except (ValueError, msgpack.UnpackException):
+        return None
+    return frame if isinstance(frame, dict) else None
+
+
+# Sent to idle clients that asked for heartbeats; any message back counts as a pong
+PING = Frame.from_event({"type": "ping"})
+
+
+class TimingWheel:
+    """Single-level timing wheel: O(1) schedule and cancel, O(due) per tick.
+
+    Delays are rounded up to whole ticks and capped to one revolution, so
+    callers re-check their own deadline when an item comes due.
+    """
+
+    def __init__(self, tick: float, horizon: float):
+        self.tick = tick
+        self.slots = [set() for _ in range(math.ceil(horizon / tick) + 1)]
+        self.cursor = 0
+
+    def schedule(self, item, delay: float):
+        ticks = min(max(1, math.ceil(delay / self.tick)), len(self.slots) - 1)
+        item.wheel_slot = (self.cursor + ticks) % len(self.slots)
+        self.slots[item.wheel_slot].add(item)
+
+    def cancel(self, item):
+        if item.wheel_slot is not None:
+            self.slots[item.wheel_slot].discard(item)
+            item.wheel_slot = None
+
+    def advance(self) -> set:
+        self.cursor = (self.cursor + 1) % len(self.slots)
+        due, self.slots[self.cursor] = self.slots[self.cursor], set()
+        for item in due:
+            item.wheel_slot = None
+        return due
+
+
+class Connection:
+    """One WebSocket with a bounded outbound queue drained by its own sender task.
+
+    Producers never wait on the network: `enqueue` is synchronous, and a slow
+    client only ever fills its own queue.
+    """
+
+    def __init__(
+        self,
+        manager: "ConnectionManager",
+        key: str,
+        websocket: WebSocket,
+        binary: bool = False,
+        user_id: Optional[str] = None,
+    ):
+        self.manager = manager
+        self.key = key
+        self.websocket = websocket
+        self.binary = binary
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=config.WS_SEND_QUEUE_SIZE)
+        self.dropped = 0
+        self.last_seen = time.monotonic()
+        self.pinged_at = None
+        self.wheel_slot = None
+        self.sender = asyncio.create_task(self._send_loop())
+
+    async def _send_loop(self):
+        try:
+            while True:
+                frame = await self.queue.get()
+                if self.binary:
+                    await self.websocket.send_bytes(frame.packed)
+                else:
+                    await self.websocket.send_text(frame.text)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # The socket is dead; stop delivering to it
+            logger.info("Pruning dead WebSocket for %s %s: %s", self.manager.kind, self.key, e)
+            self.manager.disconnect(self.key, self.websocket)
+
+    def enqueue(self, frame: Frame):
+        try:
+            self.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            if config.WS_OVERFLOW_POLICY == DISCONNECT:
+                logger.warning("Disconnecting slow WebSocket for %s %s", self.manager.kind, self.key)
+                self.manager.disconnect(self.key, self.websocket)
+                self.manager._spawn(self._close(status.WS_1013_TRY_AGAIN_LATER))
+                return
+            self.queue.get_nowait()
+            self.queue.put_nowait(frame)
+            self.dropped += 1
+
+    async def _close(self, code: int):
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
+
+    def stop(self):
+        self.sender.cancel()
+
 
 class ConnectionManager:
-    def __init__(self):
-        # Mapping from chat_id to list of WebSocket connections
-        self.active_connections: Dict[str, List[WebSocket]] = {}
-
-    async def connect(self, chat_id: str, websocket: WebSocket):
-        await websocket.accept()
-        if chat_id not in self.active_connections:
-            self.active_connections[chat_id] = []
-        self.active_connections[chat_id].append(websocket)
-        print(f"WebSocket connection established for chat {chat_id}.")
-
-    def disconnect(self, chat_id: str, websocket: WebSocket):
-        if chat_id in self.active_connections:
-            self.active_connections[chat_id].remove(websocket)
-            if not self.active_connections[chat_id]:
-                del self.active_connections[chat_id]
-        print(f"WebSocket connection disconnected for chat {chat_id}.")
+    """Sockets grouped by a key (a chat id, or a user id for notifications).
+
+    Broadcasts go through the backplane, so they reach sockets held by any
+    worker. A worker is subscribed to a key's channel only while it holds
+    at least one socket for that key.
+
+    Liveness of every socket is checked with protocol-level ping frames by
+    the server (see api.core.worker). Clients that connect with `heartbeat`
+    also get application-level pings they can see: routes call `touch` for
+    every inbound message, a socket idle for WS_PING_INTERVAL_SECONDS is
+    sent a `ping` event, and if nothing comes back within
+    WS_PONG_TIMEOUT_SECONDS it is reaped. Deadlines live on a timing wheel,
+    so each tick only visits the sockets that are due.
+    """
+
+    def __init__(
+        self,
+        kind: str = "chat",
+        backplane: Backplane = backplane,
+        presence: PresenceTracker = presence,
+    ):
+        self.kind = kind
+        self.backplane = backplane
+        self.presence = presence
+        # Mapping from key to the connections for that key, keyed by socket
+        self.active_connections: Dict[str, Dict[WebSocket, Connection]] = {}
+        self.connection_count = 0
+        self.pings_sent = 0
+        self.reaped = 0
+        self._wheel = TimingWheel(
+            config.WS_HEARTBEAT_TICK_SECONDS,
+            max(config.WS_PING_INTERVAL_SECONDS, config.WS_PONG_TIMEOUT_SECONDS),
+        )
+        self._heartbeat = None
+        self._tasks = set()
+
+    def _spawn(self, coro):
+        # Keep a reference until the task is done, or it can be collected mid-flight
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _channel(self, key: str) -> str:
+        return f"{self.kind}:{key}"
+
+    async def connect(
+        self,
+        key: str,
+        websocket: WebSocket,
+        user_id: Optional[str] = None,
+        heartbeat: bool = False,
+    ):
+        """Register `websocket` under `key`.
+
+        `user_id` makes the socket count for presence. `heartbeat` is for
+        clients that answer `ping` events; only those are reaped when idle.
+        """
+        binary = False
+        if websocket.client_state == WebSocketState.CONNECTING:
+            # permessage-deflate, when the client offers it, is negotiated by uvicorn
+            binary = MSGPACK in websocket.scope.get("subprotocols", [])
+            await websocket.accept(subprotocol=MSGPACK if binary else None)
+        connections = self.active_connections.setdefault(key, {})
+        connection = Connection(self, key, websocket, binary, user_id)
+        connections[websocket] = connection
+        self.connection_count += 1
+        if user_id:
+            self.presence.connected(user_id)
+        if heartbeat:
+            self._wheel.schedule(connection, config.WS_PING_INTERVAL_SECONDS)
+            if self._heartbeat is None:
+                self._heartbeat = asyncio.create_task(self._heartbeat_loop())
+        if len(connections) == 1:
+            await self.backplane.subscribe(self._channel(key), partial(self._deliver, key))
+        logger.debug("WebSocket connection established for %s %s", self.kind, key)
+
+    def disconnect(self, key: str, websocket: WebSocket):
+        # Safe to call more than once for the same socket
+        connections = self.active_connections.get(key)
+        if connections is None:
+            return
+        connection = connections.pop(websocket, None)
+        if connection is None:
+            return
+        connection.stop()
+        self._wheel.cancel(connection)
+        self.connection_count -= 1
+        if connection.user_id:
+            self.presence.disconnected(connection.user_id)
+        if not connections:
+            del self.active_connections[key]
+            self._spawn(self._unsubscribe(key))
+        logger.debug("WebSocket connection disconnected for %s %s", self.kind, key)
+
+    async def _unsubscribe(self, key: str):
+        # A socket for the key may have connected again in the meantime
+        if key in self.active_connections:
+            return
+        try:
+            await self.backplane.unsubscribe(self._channel(key))
+        except Exception as e:
+            logger.error("Backplane unsubscribe failed for %s %s: %s", self.kind, key, e)
+
+    def touch(self, key: str, websocket: WebSocket):
+        """Record inbound activity on `websocket`; O(1), no rescheduling."""
+        connection = self.active_connections.get(key, {}).get(websocket)
+        if connection is not None:
+            connection.last_seen = time.monotonic()
+
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(self._wheel.tick)
+            try:
+                self._check_due(self._wheel.advance())
+            except Exception as e:
+                logger.error("Heartbeat check failed for %s sockets: %s", self.kind, e)
+
+    def _check_due(self, due: set):
+        now = time.monotonic()
+        for connection in due:
+            idle = now - connection.last_seen
+            if idle < config.WS_PING_INTERVAL_SECONDS:
+                # Active since it was scheduled; sleep until it could next go idle
+                connection.pinged_at = None
+                self._wheel.schedule(connection, config.WS_PING_INTERVAL_SECONDS - idle)
+            elif connection.pinged_at is None:
+                connection.pinged_at = now
+                connection.enqueue(PING)
+                self.pings_sent += 1
+                self._wheel.schedule(connection, config.WS_PONG_TIMEOUT_SECONDS)
+            else:
+                self._reap(connection)
+
+    def _reap(self, connection: Connection):
+        logger.info("Reaping idle WebSocket for %s %s", self.kind, connection.key)
+        self.reaped += 1
+        self.disconnect(connection.key, connection.websocket)
+        self._spawn(connection._close(status.WS_1001_GOING_AWAY))
+
+    def stats(self) -> dict:
+        return {
+            "connections": self.connection_count,
+            "keys": len(self.active_connections),
+            "pings_sent": self.pings_sent,
+            "reaped": self.reaped,
+        }
+
+    def send_to(self, key: str, websocket: WebSocket, event: Union[dict, str]):
+        """Queue `event` for one local socket only, such as an ack."""
+        connection = self.active_connections.get(key, {}).get(websocket)
+        if connection is not None:
+            connection.enqueue(Frame.from_event(event))
+
+    def _deliver(self, key: str, text: str):
+        # Only enqueues; each connection's sender task does the actual send
+        frame = Frame(text)
+        for connection in list(self.active_connections.get(key, {}).values()):
+            connection.enqueue(frame)
 
     async def send_personal_message(self, message: str, websocket: WebSocket):
         await websocket.send_text(message)
 
-    async def broadcast(self, chat_id: str, message: str):
-        if chat_id in self.active_connections:
-            for connection in self.active_connections[chat_id]:
-                await connection.send_text(message)
-        print(f"Broadcasted message to chat {chat_id}: {message}")
+    async def broadcast(self, key: str, event: Union[dict, str]):
+        """Send `event` (a dict, or already encoded text) to every socket for `key`."""
+        text = event if isinstance(event, str) else encode_event(event)
+        await self.backplane.publish(self._channel(key), text)
 
 # Create a single instance to be imported and used in your routes.
-manager = ConnectionManager()
-
-# import asyncio
-# from datetime import datetime, timedelta
-# import json
-# from fastapi import WebSocket
-# from typing import Dict, List
-
-
-# class ConnectionManager:
-#     def __init__(self):
-#         self.active_connections: Dict[str, List[WebSocket]] = {}
-#         self.connection_info: Dict[int, dict] = {}
-#         self.heartbeat_task = asyncio.create_task(self._heartbeat_check())
-    
-    
-#     async def _heartbeat_check(self):
-#         while True:
-#             await asyncio.sleep(30)
-#             now = datetime.now()
-#             for ws_id, info in list(self.connection_info.items()):
-#                 if now - info["last_active"] > timedelta(seconds=60):
-#                     print(f"Closing stale connection {ws_id}")
-#                     await self._close_connection(info["chat_id"], ws_id)
-
-#     async def _close_connection(self, chat_id: str, ws_id: int):
-#         # Find the WebSocket object
-#         for ws in self.active_connections.get(chat_id, []):
-#             if id(ws) == ws_id:
-#                 try:
-#                     await ws.close()
-#                 except Exception as e:
-#                     print(f"Error closing connection: {str(e)}")
-#                 self.disconnect(chat_id, ws)
-#                 break
-
-#     async def connect(self, chat_id: str, websocket: WebSocket):
-#         try:
-#             await websocket.accept()
-#             if chat_id not in self.active_connections:
-#                 self.active_connections[chat_id] = []
-#             self.active_connections[chat_id].append(websocket)
-#             self.connection_info[id(websocket)] = {
-#                 "chat_id": chat_id,
-#                 "last_active": datetime.now()
-#             }
-#             print(f"WebSocket connection established for chat {chat_id}")
-#         except Exception as e:
-#             print(f"Connection error: {str(e)}")
-#             raise
-
-#     def disconnect(self, chat_id: str, websocket: WebSocket):
-#         try:
-#             if chat_id in self.active_connections:
-#                 self.active_connections[chat_id].remove(websocket)
-#                 if not self.active_connections[chat_id]:
-#                     del self.active_connections[chat_id]
-#             if id(websocket) in self.connection_info:
-#                 del self.connection_info[id(websocket)]
-#             print(f"WebSocket connection disconnected for chat {chat_id}")
-#         except Exception as e:
-#             print(f"Disconnection error: {str(e)}")
-
-#     async def broadcast(self, chat_id: str, message: str):
-#         if chat_id in self.active_connections:
-#             dead_connections = []
-#             for connection in self.active_connections[chat_id]:
-#                 try:
-#                     await connection.send_text(message)
-#                     self.connection_info[id(connection)]["last_active"] = datetime.now()
-#                 except Exception as e:
-#                     print(f"Broadcast error: {str(e)}")
-#                     dead_connections.append(connection)
-            
-#             # Clean up dead connections
-#             for connection in dead_connections:
-#                 self.disconnect(chat_id, connection)
-
-# # Create a single instance to be imported and used in your routes.
-# manager = ConnectionManager()
+manager = ConnectionManager("chat")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, String, DateTime, ForeignKey, Boolean, Integer, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from api.db.session import Base
@@ -21,3 +21,42 @@ class Chat(Base):
     user2_id = Column(String, ForeignKey("users.id"))
     user1 = relationship("User", foreign_keys=[user1_id])
     user2 = relationship("User", foreign_keys=[user2_id])
+
+    # Activity summary, maintained on write by api.v1.services.chat_summary
+    last_message_id = Column(String, nullable=True)
+    last_message_preview = Column(String, nullable=True)
+    last_activity_at = Column(DateTime, default=datetime.now)
+    user1_unread_count = Column(Integer, default=0, nullable=False)
+    user2_unread_count = Column(Integer, default=0, nullable=False)
+
+    # Read watermarks: position (timestamp, id) of the last message each participant has read
+    user1_read_at = Column(DateTime, nullable=True)
+    user1_read_message_id = Column(String, nullable=True)
+    user2_read_at = Column(DateTime, nullable=True)
+    user2_read_message_id = Column(String, nullable=True)
+
+    # Delivery watermarks: last message each participant's device has acknowledged receiving
+    user1_delivered_at = Column(DateTime, nullable=True)
+    user1_delivered_message_id = Column(String, nullable=True)
+    user2_delivered_at = Column(DateTime, nullable=True)
+    user2_delivered_message_id = Column(String, nullable=True)
+
+    # Preferred language of each participant; incoming messages are auto-translated to it
+    user1_language = Column(String, nullable=True)
+    user2_language = Column(String, nullable=True)
+
+    __table_args__ = (
+        # Recency-sorted inbox for either participant, in the inbox's DESC NULLS
+        # LAST order. SQLite cannot declare NULLS LAST; migration 0003 gives
+        # it plain descending indexes, which sort NULLs last there anyway.
+        Index(
+            "ix_chats_user1_id_last_activity_at",
+            "user1_id",
+            last_activity_at.desc().nulls_last(),
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_chats_user2_id_last_activity_at",
+            "user2_id",
+            last_activity_at.desc().nulls_last(),
+        ).ddl_if(dialect="postgresql"),
+    )
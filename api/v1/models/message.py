@@ -1,9 +1,12 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Boolean, Text
+from sqlalchemy import Column, String, DateTime, ForeignKey, Boolean, Text, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from api.db.session import Base
 import uuid
 
+# Unique (sender_id, client_id): a retried send with the same client id is a duplicate
+CLIENT_ID_CONSTRAINT = "uq_messages_sender_id_client_id"
+
 class Message(Base):
     __tablename__ = "messages"
 
@@ -13,7 +16,10 @@ class Message(Base):
     status = Column(String, default="sent")  # could be 'sent', 'delivered', 'read'
     pinned = Column(Boolean, default=False)
     translation = Column(Text, nullable=True)
+    translation_language = Column(String, nullable=True)
     detected_language = Column(String, nullable=True)
+    # Sender-generated id, used to acknowledge and deduplicate retried sends
+    client_id = Column(String, nullable=True)
 
     # Foreign key to the chat
     chat_id = Column(String, ForeignKey("chats.id"))
@@ -23,4 +29,10 @@ class Message(Base):
     sender_id = Column(String, ForeignKey("users.id"))
     sender = relationship("User")
     
-    reactions = relationship("Reaction", back_populates="message", cascade="all, delete-orphan")
\ No newline at end of file
+    reactions = relationship("Reaction", back_populates="message", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        # Backs keyset pagination of a chat's history ordered on (timestamp, id)
+        Index("ix_messages_chat_id_timestamp_id", "chat_id", "timestamp", "id"),
+        UniqueConstraint("sender_id", "client_id", name=CLIENT_ID_CONSTRAINT),
+    )
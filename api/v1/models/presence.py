@@ -0,0 +1,23 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index
+from datetime import datetime
+from api.db.session import Base
+
+
+class UserPresence(Base):
+    """One row per (user, worker process) holding a socket for the user.
+
+    Each worker refreshes `last_seen` on its own rows when it flushes, so the
+    rows of a worker that died without flushing expire after
+    PRESENCE_STALE_SECONDS; see api.v1.services.presence.
+    """
+
+    __tablename__ = "user_presence"
+
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    worker_id = Column(String, primary_key=True)
+    last_seen = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        # Expiry sweep over every worker's rows
+        Index("ix_user_presence_last_seen", "last_seen"),
+    )
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, UniqueConstraint
+from datetime import datetime
+from api.db.session import Base
+
+
+class Translation(Base):
+    __tablename__ = "translations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String, nullable=False)  # sha256 of the source text
+    target_language = Column(String, nullable=False)
+    translated_text = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.now)
+
+    __table_args__ = (
+        UniqueConstraint("content_hash", "target_language", name="uq_translations_hash_language"),
+    )
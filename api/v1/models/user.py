@@ -1,4 +1,4 @@
-from sqlalchemy import ARRAY, Column, Integer, String, Boolean, DateTime
+from sqlalchemy import ARRAY, JSON, Column, Integer, String, Boolean, DateTime
 from sqlalchemy.orm import relationship, Session
 from datetime import datetime
 from api.db.session import Base
@@ -33,7 +33,10 @@ class User(Base):
 
     # Newly added fields for 2FA Auth
     otp_secret = Column(String, nullable=True)  # To store 2FA secret
-    backup_codes = Column(ARRAY(String), nullable=True)  # Optional for backup codes
+    # SQLite (local runs) has no array type, so the codes are stored as JSON there
+    backup_codes = Column(
+        ARRAY(String).with_variant(JSON, "sqlite"), nullable=True
+    )  # Optional for backup codes
     two_FA_enabled = Column(Boolean, default=False)  # Track if 2FA is enabled
     otp_verified = Column(
         Boolean, default=False
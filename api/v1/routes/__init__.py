@@ -2,6 +2,7 @@ from fastapi import APIRouter
 from api.v1.routes.auth.auth import auth
 from api.v1.routes.auth.oauth import oauth_router
 from api.v1.routes.logs import log_router
+from api.v1.routes.metrics import metrics_router
 from api.v1.routes.user.user import user_router
 from api.v1.routes.auth.two_factor_auth import two_factor_router
 from api.v1.routes.notifications.notifications import notification_router
@@ -17,4 +18,5 @@ api_version_one.include_router(user_router)
 api_version_one.include_router(contact_router)
 api_version_one.include_router(chat_router)
 api_version_one.include_router(notification_router)
-api_version_one.include_router(log_router)
\ No newline at end of file
+api_version_one.include_router(log_router)
+api_version_one.include_router(metrics_router)
\ No newline at end of file
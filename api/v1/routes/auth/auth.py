@@ -2,7 +2,7 @@ import logging
 from pydantic import EmailStr
 from fastapi import BackgroundTasks, Security, APIRouter, Depends, HTTPException, status
 # from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.responses import JSONResponse
 from datetime import datetime, timedelta
 from api.v1.routes.notifications.notifications import create_notification
@@ -29,7 +29,7 @@ logger = logging.getLogger(__name__)
 
 
 @auth.post("/signup", response_model=schemas.UserOut)
-async def signup(user: schemas.UserCreate, db: Session = Depends(get_db)):
+async def signup(user: schemas.UserCreate, db: AsyncSession = Depends(get_db)):
     logger.info(f"Signup attempt for user: {user.email}")
 
     user_service = UserService(db)
@@ -42,7 +42,7 @@ async def signup(user: schemas.UserCreate, db: Session = Depends(get_db)):
             status_code=status.HTTP_400_BAD_REQUEST, detail="Password Required"
         )
 
-    new_user = user_service.create_user(user)
+    new_user = await user_service.create_user(user)
     logger.info(f"User created successfully with email: {new_user.email}")
 
     otp_service = OtpService(db)
@@ -54,11 +54,11 @@ async def signup(user: schemas.UserCreate, db: Session = Depends(get_db)):
 
 # Login endpoint with social auth handling
 @auth.post("/login", response_model=dict)
-async def login(credentials: schemas.UserLogin, db: Session = Depends(get_db)):
+async def login(credentials: schemas.UserLogin, db: AsyncSession = Depends(get_db)):
     logger.info(f"Login attempt with email/username: {credentials.email_or_username}")
 
     user_service = UserService(db)
-    user = user_service.get_user_by_email_or_username(credentials.email_or_username)
+    user = await user_service.get_user_by_email_or_username(credentials.email_or_username)
 
     if not user:
         logger.warning(
@@ -111,7 +111,7 @@ async def login(credentials: schemas.UserLogin, db: Session = Depends(get_db)):
 
     ## set login time
     user.last_login = datetime.now()
-    db.commit()
+    await db.commit()
 
     # Generate access and refresh tokens
     access_token = create_access_token(user_id=user.id)
@@ -163,7 +163,7 @@ async def set_password(
     email: EmailStr,
     # credentials: HTTPAuthorizationCredentials = Security(security),
     current_user: str = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     # token = credentials.credentials
     # current_user = get_current_user(token=token, db=db)
@@ -173,7 +173,7 @@ async def set_password(
     logger.info(f"Setting new password for user: {current_user.email}")
 
     user_service = UserService(db)
-    user = user_service.get_user_by_id(current_user.id)
+    user = await user_service.get_user_by_id(current_user.id)
 
     if not user:
         logger.error(f"Failed to set password: User {current_user.email} not found")
@@ -198,8 +198,8 @@ async def set_password(
         )
 
     # Update the user's password
-    user_service.update_password(user, new_password)
-    db.commit()
+    await user_service.update_password(user, new_password)
+    await db.commit()
 
     logger.info(f"Password set successfully for user ID: {current_user.id}")
 
@@ -217,7 +217,7 @@ async def send_otp(
     email: EmailStr,
     # credentials: HTTPAuthorizationCredentials = Security(security),
     current_user: str = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     # token = credentials.credentials
     # current_user = get_current_user(token=token, db=db)
@@ -225,7 +225,7 @@ async def send_otp(
     user_service = UserService(db)
     otp_service = OtpService(db)
 
-    user = user_service.get_user_by_id(current_user.id)
+    user = await user_service.get_user_by_id(current_user.id)
 
     if user.email != email:
         logger.warning(
@@ -248,7 +248,7 @@ async def verify_otp(
     otp: int,
     # credentials: HTTPAuthorizationCredentials = Security(security),
     current_user: str = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     # token = credentials.credentials
     # current_user = get_current_user(token=token, db=db)
@@ -256,15 +256,15 @@ async def verify_otp(
     user_service = UserService(db)
     otp_service = OtpService(db)
 
-    if not otp_service.verify_otp(current_user.id, otp):
+    if not await otp_service.verify_otp(current_user.id, otp):
         logger.warning(f"Invalid or expired OTP for user: {current_user.email}")
         raise HTTPException(status_code=400, detail="Invalid or expired OTP")
 
-    user = user_service.get_user_by_id(current_user.id)
+    user = await user_service.get_user_by_id(current_user.id)
     user.is_verified = True
-    db.commit()
+    await db.commit()
 
-    background_tasks.add_task(otp_service.clear_expired_otps, db)
+    background_tasks.add_task(OtpService.clear_expired_otps)
 
     logger.info(
         f"OTP verified successfully for user: {current_user.email}, user marked as verified"
@@ -274,13 +274,13 @@ async def verify_otp(
 
 
 @auth.post("/forgot-password", response_model=dict)
-async def forgot_password(email: EmailStr, db: Session = Depends(get_db)):
+async def forgot_password(email: EmailStr, db: AsyncSession = Depends(get_db)):
     logger.info(f"Password reset request for email: {email}")
 
     user_service = UserService(db)
     otp_service = OtpService(db)
 
-    user = user_service.get_user_by_email(email)
+    user = await user_service.get_user_by_email(email)
     if not user:
         logger.warning(f"User not found with email: {email}")
         raise HTTPException(status_code=404, detail="User not found")
@@ -298,23 +298,23 @@ async def reset_password_logged_in(
     otp: int,
     # credentials: HTTPAuthorizationCredentials = Security(security),
     current_user: str = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     # token = credentials.credentials
     # current_user = get_current_user(token=token, db=db)
 
     otp_service = OtpService(db)
 
-    if not otp_service.verify_otp(current_user.id, otp):
+    if not await otp_service.verify_otp(current_user.id, otp):
         logger.warning(f"Invalid OTP for password reset for user: {current_user.email}")
         raise HTTPException(
             status_code=400, detail="This OTP has either been used or is expired"
         )
 
     user_service = UserService(db)
-    user_service.update_password(current_user, new_password)
+    await user_service.update_password(current_user, new_password)
 
-    background_tasks.add_task(otp_service.clear_expired_otps, db)
+    background_tasks.add_task(OtpService.clear_expired_otps)
 
     logger.info(f"Password reset successfully for user: {current_user.email}")
 
@@ -323,19 +323,19 @@ async def reset_password_logged_in(
 
 @auth.post("/reset-password-forgot", response_model=dict)
 async def reset_password_forgot(
-    new_password: str, otp: int, email: EmailStr, db: Session = Depends(get_db)
+    new_password: str, otp: int, email: EmailStr, db: AsyncSession = Depends(get_db)
 ):
     logger.info(f"Password reset request for email: {email} with OTP")
 
     otp_service = OtpService(db)
     user_service = UserService(db)
 
-    user = user_service.get_user_by_email(email)
-    if not user or not otp_service.verify_otp(user.id, otp):
+    user = await user_service.get_user_by_email(email)
+    if not user or not await otp_service.verify_otp(user.id, otp):
         logger.warning(f"Invalid OTP or email for password reset for user: {email}")
         raise HTTPException(status_code=400, detail="Invalid or expired OTP")
 
-    user_service.update_password(user, new_password)
+    await user_service.update_password(user, new_password)
     logger.info(f"Password reset successfully for user: {email}")
 
     return {"message": "Password reset successful"}
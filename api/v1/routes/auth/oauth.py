@@ -4,7 +4,7 @@ from fastapi import APIRouter, Depends, Request, HTTPException
 from fastapi.responses import RedirectResponse, JSONResponse
 from authlib.integrations.starlette_client import OAuthError
 from starlette.exceptions import HTTPException as StarletteHTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from api.utils.oauth import (
     oauth,
     # get_google_authorization_url,
@@ -31,7 +31,7 @@ async def login_via_google(request: Request):
 
 # Callback route for Google OAuth
 @oauth_router.get("/google/callback")
-async def google_callback(request: Request, db: Session = Depends(get_db)):
+async def google_callback(request: Request, db: AsyncSession = Depends(get_db)):
     try:
         user_info = await get_google_user_info(request)
         
@@ -51,9 +51,9 @@ async def google_callback(request: Request, db: Session = Depends(get_db)):
         user_service = UserService(db)
 
         # Check if the user already exists
-        user = user_service.get_user_by_email(email)
+        user = await user_service.get_user_by_email(email)
         if not user:
-            user = user_service.create_user(UserCreate(
+            user = await user_service.create_user(UserCreate(
                 email=email,
                 username=username,
                 password=None,          
@@ -65,11 +65,11 @@ async def google_callback(request: Request, db: Session = Depends(get_db)):
             user.is_verified = isVerified
             user.provider = provider
             user.social_id = social_id
-            db.commit()
+            await db.commit()
             
         ## set login time
         user.last_login = datetime.now()
-        db.commit()
+        await db.commit()
 
         # Generate and return tokens
         access_token = create_access_token(user_id=user.id)
@@ -106,7 +106,7 @@ async def github_login(request: Request):
 
 # Callback route for GitHub OAuth
 @oauth_router.get("/github/callback")
-async def github_callback(request: Request, db: Session = Depends(get_db)):
+async def github_callback(request: Request, db: AsyncSession = Depends(get_db)):
     try:
         user_info = await get_github_user_info(request)
         if not user_info or not user_info.get("email"):
@@ -122,10 +122,10 @@ async def github_callback(request: Request, db: Session = Depends(get_db)):
         user_service = UserService(db)
 
         # Check if the user already exists
-        user = user_service.get_user_by_email(email)
+        user = await user_service.get_user_by_email(email)
         if not user:
             try:
-                user = user_service.create_user(UserCreate(
+                user = await user_service.create_user(UserCreate(
                     email=email,
                     username=username,
                     password=None,
@@ -137,14 +137,14 @@ async def github_callback(request: Request, db: Session = Depends(get_db)):
                 user.is_verified = True
                 user.provider = provider
                 user.social_id = social_id
-                db.commit()
+                await db.commit()
             except Exception as e:
                 logging.error(f"Error creating user: {str(e)}")
                 raise HTTPException(status_code=500, detail="Internal Server Error while creating user.")
 
         ## set login time
         user.last_login = datetime.now()
-        db.commit()
+        await db.commit()
         
         # Generate access and refresh tokens
         access_token = create_access_token(user_id=user.id)
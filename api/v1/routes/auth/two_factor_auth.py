@@ -8,7 +8,7 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.responses import StreamingResponse
 
 
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from api.utils.user import get_current_user
 from api.db.session import get_db
 from api.v1.schemas.user import Enable2FAResponse, OTP2FAVerify, BackupCodesResponse
@@ -22,8 +22,8 @@ security = HTTPBearer()
 
 # Enable 2FA and return the secret and OTP provisioning URI
 @two_factor_router.post("/enable", response_model=Enable2FAResponse)
-def enable_two_factor_authentication(
-    db: Session = Depends(get_db),
+async def enable_two_factor_authentication(
+    db: AsyncSession = Depends(get_db),
     current_user: str = Depends(get_current_user),
 ):
     # token = credentials.credentials
@@ -38,8 +38,8 @@ def enable_two_factor_authentication(
     # Store the secret in the database
     current_user.otp_secret = secret
     current_user.two_FA_enabled = True
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(current_user)
 
     # Create a provisioning URI for Google Authenticator
     otp_uri = pyotp.totp.TOTP(secret).provisioning_uri(
@@ -52,7 +52,7 @@ def enable_two_factor_authentication(
 # Generate a QR code for the OTP URI
 @two_factor_router.get("/qr-code", response_class=StreamingResponse)
 def get_qr_code(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: str = Depends(get_current_user),
 ):
     # token = credentials.credentials
@@ -77,9 +77,9 @@ def get_qr_code(
 
 # Verify 2FA
 @two_factor_router.post("/verify", response_model=dict)
-def verify_two_factor_authentication(
+async def verify_two_factor_authentication(
     verification_data: OTP2FAVerify,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: str = Depends(get_current_user),
 ):
     # token = credentials.credentials
@@ -97,15 +97,15 @@ def verify_two_factor_authentication(
     current_user.otp_verified = True
     current_user.last_otp_verified_at = datetime.now()
     current_user.two_FA_enabled = True
-    db.commit()
+    await db.commit()
 
     return {"detail": "2FA verification successful"}
 
 
 # Disable 2FA
 @two_factor_router.post("/disable", response_model=dict)
-def disable_two_factor_authentication(
-    db: Session = Depends(get_db),
+async def disable_two_factor_authentication(
+    db: AsyncSession = Depends(get_db),
     current_user: str = Depends(get_current_user),
 ):
     # token = credentials.credentials
@@ -120,16 +120,16 @@ def disable_two_factor_authentication(
     current_user.otp_verified = False
     current_user.last_otp_verified_at = None
     current_user.two_FA_enabled = False
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(current_user)
 
     return {"detail": "2FA has been disabled successfully"}
 
 
 # Generate Backup Codes
 @two_factor_router.post("/generate-backup-codes", response_model=BackupCodesResponse)
-def generate_2fa_backup_codes(
-    db: Session = Depends(get_db),
+async def generate_2fa_backup_codes(
+    db: AsyncSession = Depends(get_db),
     current_user: str = Depends(get_current_user),
 ):
     # token = credentials.credentials
@@ -141,15 +141,15 @@ def generate_2fa_backup_codes(
     # Generate and store backup codes in the database
     backup_codes = [secrets.token_hex(8) for _ in range(5)]  # Generate 5 backup codes
     current_user.backup_codes = backup_codes  # Store in DB appropriately
-    db.commit()
+    await db.commit()
 
     return BackupCodesResponse(backup_codes=backup_codes)
 
 
 @two_factor_router.post("/verify-backup-code", response_model=dict)
-def verify_backup_code(
+async def verify_backup_code(
     backup_code: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: str = Depends(get_current_user),
 ):
     # token = credentials.credentials
@@ -162,9 +162,11 @@ def verify_backup_code(
     if backup_code not in current_user.backup_codes:
         raise HTTPException(status_code=400, detail="Invalid backup code.")
 
-    # Remove the used backup code from the list
-    current_user.backup_codes.remove(backup_code)
-    db.commit()
-    db.refresh(current_user)
+    # Remove the used backup code from the list (reassign so the change is persisted)
+    current_user.backup_codes = [
+        code for code in current_user.backup_codes if code != backup_code
+    ]
+    await db.commit()
+    await db.refresh(current_user)
 
     return {"detail": "Backup code verification successful"}
@@ -1,40 +1,80 @@
-from typing import List
-import json
-from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, Query, Cookie, status
-from sqlalchemy.orm import Session
-from api.db.session import get_db
+from typing import List, Optional
+import asyncio
+import logging
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Response, WebSocket, WebSocketDisconnect, Query, Cookie, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from api.db.session import AsyncSessionLocal, get_db, get_read_db, record_write
 from api.v1.models.chat import Chat
 from api.v1.models.contact import Contact
 from api.v1.models.message import Message
 from api.v1.models.reaction import Reaction
 from api.v1.models.user import User
 from api.v1.schemas.chat import ChatResponse
-from api.v1.schemas.message import MessageCreate, MessageResponse
-from api.utils.user import get_current_user, decode_access_token
-from api.utils.websocket import manager
+from api.v1.schemas.message import (
+    BulkTranslateRequest,
+    MessageCreate,
+    MessageResponse,
+)
+from api.utils.user import get_current_reader, get_current_user, decode_access_token
+from api.utils.websocket import decode_frame, manager
+from api.utils.translator import TranslationError, translator
 from api.v1.services.user import UserService
-from langdetect import detect
-from deep_translator import GoogleTranslator
+from api.v1.services.chat import (
+    chat_response,
+    get_inbox,
+    get_message_page,
+    hydrate_messages,
+    post_message,
+)
+from api.v1.services.language import detect_and_store_language
+from api.v1.services.membership import (
+    get_member_chat,
+    is_known_member,
+    membership_cache,
+    require_member,
+)
+from api.v1.services.translation import (
+    bulk_translate,
+    translate_text,
+    translation_cache,
+)
+from api.v1.services.search import count_matches_per_chat, full_text_search
+from api.v1.services.receipts import RECEIPT_KINDS, receipt_batcher, receipts_event
+from api.v1.services.chat_summary import (
+    mark_read_up_to,
+    message_status,
+    record_message_deleted,
+    record_message_edited,
+)
 
 chat_router = APIRouter(prefix="/chat", tags=["Chats"])
 
+# Message history paging cursors, sent as headers so the body stays a list
+OLDER_CURSOR_HEADER = "X-Older-Cursor"
+NEWER_CURSOR_HEADER = "X-Newer-Cursor"
+
+logger = logging.getLogger(__name__)
+
+# Background stages started from socket sends
+_socket_tasks = set()
+
 
 @chat_router.post("", response_model=ChatResponse)
 async def create_chat(
     recipient_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     # Check if recipient exists
-    recipient = db.query(User).filter(User.id == recipient_id).first()
+    recipient = await db.get(User, recipient_id)
     if not recipient:
         raise HTTPException(status_code=404, detail="Recipient not found")
 
     # Ensure recipient is a contact
-    contact = (
-        db.query(Contact)
-        .filter(Contact.user_id == current_user.id, Contact.contact_id == recipient_id)
-        .first()
+    contact = await db.scalar(
+        select(Contact).where(Contact.user_id == current_user.id, Contact.contact_id == recipient_id)
     )
     if not contact:
         raise HTTPException(
@@ -42,176 +82,85 @@ async def create_chat(
         )
     
     # if chat exists
-    chat_exists = db.query(Chat).filter(Chat.user1_id == current_user.id, Chat.user2_id == recipient_id)
-    if chat_exists.first():
+    chat_exists = await db.scalar(
+        select(Chat).where(Chat.user1_id == current_user.id, Chat.user2_id == recipient_id)
+    )
+    if chat_exists:
         raise HTTPException(status_code=400, detail="Chat already exists")
     
     # Create a new chat
     chat = Chat(user1_id=current_user.id, user2_id=recipient_id)
     db.add(chat)
-    db.commit()
-    db.refresh(chat)
+    await db.commit()
+    await db.refresh(chat)
 
-    return {
-        "id": chat.id,
-        "created_at": chat.created_at,
-        "updated_at": chat.updated_at,
-        "user1": {
-            "id": current_user.id,
-            "username": current_user.username,
-            "email": current_user.email,
-            "is_online": current_user.is_online,
-        },
-        "user2": {
-            "id": recipient.id,
-            "username": recipient.username,
-            "email": recipient.email,
-            "is_online": recipient.is_online,
-        },
-        "last_message": None,
-        "unread_count": 0,
-        "is_pinned": False,
-    }
+    return chat_response(chat, current_user, recipient, None, 0)
 
 
 @chat_router.get("/chats", response_model=List[ChatResponse])
 async def get_all_chats(
-    current_user: User = Depends(get_current_user), db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_reader), db: AsyncSession = Depends(get_read_db)
+):
+    return await get_inbox(db, current_user.id)
+
+
+@chat_router.get("/translations/stats")
+async def get_translation_cache_stats(current_user: User = Depends(get_current_user)):
+    return {**translation_cache.stats(), **translator.stats()}
+
+
+@chat_router.get("/search")
+async def search_all_chats(
+    keyword: str = Query(..., min_length=1),
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
-    chats = (
-        db.query(Chat)
-        .filter((Chat.user1_id == current_user.id) | (Chat.user2_id == current_user.id))
-        .all()
+    hits, next_cursor = await full_text_search(
+        db, current_user.id, keyword, cursor=cursor, limit=limit
     )
 
-    chat_responses = []
-    for chat in chats:
-        last_message = (
-            db.query(Message)
-            .filter(Message.chat_id == chat.id)
-            .order_by(Message.timestamp.desc())
-            .first()
-        )
-        unread_count = (
-            db.query(Message)
-            .filter(
-                Message.chat_id == chat.id,
-                Message.sender_id != current_user.id,
-                Message.status != "read",
-            )
-            .count()
-        )
+    # Group the page by chat, keeping the relevance order of each chat's best hit
+    chat_ids = list(dict.fromkeys(msg.chat_id for msg, _, _ in hits))
+    chats = {chat.id: chat for chat in await db.scalars(select(Chat).where(Chat.id.in_(chat_ids)))}
+    match_counts = await count_matches_per_chat(db, current_user.id, keyword, chat_ids)
+    messages = await hydrate_messages(db, [msg for msg, _, _ in hits], chats)
 
-        # Convert to ChatResponse instance
-        chat_responses.append(
-            {
-                "id": chat.id,
-                "created_at": chat.created_at,
-                "updated_at": chat.updated_at,
-                "user1": {
-                    "id": chat.user1.id,
-                    "username": chat.user1.username,
-                    "email": chat.user1.email,
-                    "is_online": chat.user1.is_online,
-                },
-                "user2": {
-                    "id": chat.user2.id,
-                    "username": chat.user2.username,
-                    "email": chat.user2.email,
-                    "is_online": chat.user2.is_online,
-                },
-                "last_message": (
-                    {
-                        "id": last_message.id,
-                        "content": last_message.content,
-                        "sender_id": last_message.sender_id,
-                        "timestamp": last_message.timestamp,
-                        "status": last_message.status,
-                        "pinned": last_message.pinned,
-                    }
-                    if last_message
-                    else None
-                ),
-                "unread_count": unread_count,
-                "is_pinned": chat.is_pinned,
-            }
-        )
+    results = {
+        chat_id: {"chat_id": chat_id, "match_count": match_counts.get(chat_id, 0), "messages": []}
+        for chat_id in chat_ids
+    }
+    for (msg, rank, snippet), message in zip(hits, messages):
+        results[msg.chat_id]["messages"].append({**message, "rank": rank, "snippet": snippet})
 
-    return chat_responses
+    return {"results": list(results.values()), "next_cursor": next_cursor}
 
 
 @chat_router.get("/{chat_id}", response_model=ChatResponse)
 async def get_chat(
     chat_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    chat = db.query(Chat).filter(Chat.id == chat_id).first()
-    if not chat:
+    chats = await get_inbox(db, current_user.id, chat_id=chat_id)
+    if not chats:
         raise HTTPException(status_code=404, detail="Chat not found")
 
-    other_user = chat.user1 if chat.user2_id == current_user.id else chat.user2
-    last_message = (
-        db.query(Message)
-        .filter(Message.chat_id == chat.id)
-        .order_by(Message.timestamp.desc())
-        .first()
-    )
-    unread_count = (
-        db.query(Message)
-        .filter(
-            Message.chat_id == chat.id,
-            Message.sender_id != current_user.id,
-            Message.status != "read",
-        )
-        .count()
-    )
-
-    return {
-        "id": chat.id,
-        "created_at": chat.created_at,
-        "updated_at": chat.updated_at,
-        "user1": {
-            "id": chat.user1.id,
-            "username": chat.user1.username,
-            "email": chat.user1.email,
-            "is_online": chat.user1.is_online,
-        },
-        "user2": {
-            "id": chat.user2.id,
-            "username": chat.user2.username,
-            "email": chat.user2.email,
-            "is_online": chat.user2.is_online,
-        },
-        "last_message": (
-            {
-                "id": last_message.id,
-                "content": last_message.content,
-                "sender_id": last_message.sender_id,
-                "timestamp": last_message.timestamp,
-                "status": last_message.status,
-                "pinned": last_message.pinned,
-            }
-            if last_message
-            else None
-        ),
-        "unread_count": unread_count,
-        "is_pinned": chat.is_pinned,
-    }
+    return chats[0]
 
 
 @chat_router.delete("/{chat_id}")
 async def delete_chat(
     chat_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    chat = db.query(Chat).filter(Chat.id == chat_id).first()
-    if not chat:
-        raise HTTPException(status_code=404, detail="Chat not found")
+    chat = await get_member_chat(db, chat_id, current_user.id)
 
-    db.delete(chat)
-    db.commit()
+    await db.delete(chat)
+    await db.commit()
+    membership_cache.invalidate(chat)
     return {"message": "Chat deleted successfully"}
 
 
@@ -238,7 +187,7 @@ async def websocket_endpoint(
     websocket: WebSocket,
     chat_id: str,
     token: str = Query(...),  # Get token from query params
-    db: Session = Depends(get_db),
+    heartbeat: bool = False,  # The client answers "ping" events and may be reaped when silent
 ):
     # Authenticate user
     credentials_exception = HTTPException(
@@ -258,18 +207,12 @@ async def websocket_endpoint(
             await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
             return
             
-        # Get user from database
-        user = db.query(User).filter(User.id == user_id).first()
-        if not user:
-            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
-            return
-            
-        # Verify chat access
-        chat = db.query(Chat).filter(
-            (Chat.id == chat_id) & 
-            ((Chat.user1_id == user_id) | (Chat.user2_id == user_id))
-        ).first()
-        if not chat:
+        # Verify the user and chat access in a short-lived session: its pooled
+        # connection goes back before the socket is registered, and a cached
+        # membership never checks one out.
+        async with AsyncSessionLocal() as db:
+            allowed = await is_known_member(db, chat_id, user_id)
+        if not allowed:
             await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
             return
             
@@ -279,11 +222,14 @@ async def websocket_endpoint(
         return
 
     # Connection successful
-    await manager.connect(chat_id, websocket)
+    await manager.connect(chat_id, websocket, user_id=user_id, heartbeat=heartbeat)
     try:
         while True:
-            data = await websocket.receive_text()
-            # Handle incoming messages if needed
+            frame = decode_frame(await websocket.receive())
+            # Any inbound message, pongs included, keeps the socket alive
+            manager.touch(chat_id, websocket)
+            if frame is not None:
+                await _handle_socket_message(chat_id, user_id, websocket, frame)
     except WebSocketDisconnect:
         manager.disconnect(chat_id, websocket)
     except Exception as e:
@@ -359,101 +305,142 @@ async def websocket_endpoint(
 #         await websocket.close()
 
 
+def _run_in_background(fn, *args):
+    # Post-commit stages for socket sends; keep a reference until they finish
+    task = asyncio.create_task(fn(*args))
+    _socket_tasks.add(task)
+    task.add_done_callback(_socket_tasks.discard)
+
+
+def _reply(chat_id: str, websocket: WebSocket, **event):
+    manager.send_to(chat_id, websocket, event)
+
+
+async def _handle_socket_message(chat_id: str, user_id: str, websocket: WebSocket, frame: dict):
+    """Handle one decoded inbound socket frame.
+
+    Database work runs in a session scoped to the frame, so an open socket
+    holds no pooled connection between frames.
+
+    `{"type": "message", "client_id": ..., "content": ...}` is stored and
+    delivered like an HTTP send, then acknowledged to this socket with
+    `{"type": "ack", "client_id", "message_id", "timestamp", "duplicate"}`.
+    Resending the same client id is acknowledged again but posted once.
+
+    `{"type": "delivered" | "read", "message_id": ...}` acks everything up
+    to that message; acks are coalesced per chat and answered with one
+    `receipts` event to the chat. Other frames (pongs) only count as activity.
+    """
+    frame_type = frame.get("type")
+    if frame_type in RECEIPT_KINDS:
+        if isinstance(frame.get("message_id"), str):
+            receipt_batcher.ack(chat_id, user_id, frame_type, frame["message_id"])
+        return
+    if frame_type != "message":
+        return
+
+    client_id = frame.get("client_id")
+    content = frame.get("content")
+    if not (isinstance(client_id, str) and client_id and isinstance(content, str) and content):
+        _reply(chat_id, websocket, type="error", client_id=client_id,
+               detail="client_id and content are required")
+        return
+
+    try:
+        async with AsyncSessionLocal() as db:
+            chat = await db.get(Chat, chat_id)
+            message_payload, duplicate = await post_message(
+                db, chat, user_id, content, _run_in_background, client_id=client_id
+            )
+    except Exception:
+        logger.exception("WebSocket send to chat %s failed", chat_id)
+        _reply(chat_id, websocket, type="error", client_id=client_id,
+               detail="Message could not be sent")
+        return
+    if not duplicate:
+        await record_write(user_id)
+
+    message = message_payload["message"]
+    _reply(
+        chat_id,
+        websocket,
+        type="ack",
+        client_id=client_id,
+        message_id=message["id"],
+        timestamp=message["timestamp"],
+        duplicate=duplicate,
+    )
+
+
 @chat_router.post("/{chat_id}/message")
 async def send_message(
     chat_id: str,
     message_data: MessageCreate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    chat = db.query(Chat).filter(Chat.id == chat_id).first()
-    if not chat:
-        raise HTTPException(status_code=404, detail="Chat not found")
-
-    message = Message(
-        content=message_data.content, chat_id=chat_id, sender_id=current_user.id
+    chat = await get_member_chat(db, chat_id, current_user.id)
+
+    message_payload, _ = await post_message(
+        db,
+        chat,
+        current_user.id,
+        message_data.content,
+        background_tasks.add_task,
+        client_id=message_data.client_id,
     )
-    db.add(message)
-    db.commit()
-    db.refresh(message)
-
-    # Prepare detailed message data for broadcast
-    message_payload = {
-        "type": "new_message",
-        "chat_id": chat_id,
-        "message": {
-            "id": message.id,
-            "content": message.content,
-            "sender_id": message.sender_id,
-            "timestamp": message.timestamp.isoformat(),
-            "status": message.status,
-            "pinned": message.pinned,
-            "reactions": [],
-            "translation": None,
-            "detected_language": None,
-        },
-    }
+    return message_payload
 
-    # Broadcast the message to all WebSocket connections in this chat
-    await manager.broadcast(chat_id, json.dumps(message_payload))
 
-    return message_payload
+@chat_router.put("/{chat_id}/language")
+async def set_preferred_language(
+    chat_id: str,
+    language: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    if language is not None and not translator.supports(language):
+        raise HTTPException(status_code=400, detail=f"Unsupported language: {language}")
+    chat = await get_member_chat(db, chat_id, current_user.id)
+
+    # Passing no language turns auto-translation off
+    if current_user.id == chat.user1_id:
+        chat.user1_language = language
+    else:
+        chat.user2_language = language
+    await db.commit()
+    return {"message": "Preferred language updated", "language": language}
 
 
 @chat_router.get("/{chat_id}/messages", response_model=List[MessageResponse])
 async def get_messages(
     chat_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    response: Response,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    current_user: User = Depends(get_current_reader),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    chat = db.query(Chat).filter(Chat.id == chat_id).first()
-    if not chat:
-        raise HTTPException(status_code=404, detail="Chat not found")
+    """One page of the chat's history, newest first.
 
-    messages = (
-        db.query(Message)
-        .filter(Message.chat_id == chat_id)
-        .order_by(Message.timestamp.desc())
-        .all()
-    )
-
-    message_responses = []
-    for message in messages:
-        reactions = db.query(Reaction).filter(Reaction.message_id == message.id).all()
+    The body is a plain list of messages. Cursors for the neighbouring
+    pages come in the `X-Older-Cursor` and `X-Newer-Cursor` headers; pass
+    them back as `before` and `after`. A header is absent when there is no
+    such page.
+    """
+    chat = await get_member_chat(db, chat_id, current_user.id)
 
-        message_responses.append(
-            {
-                "id": message.id,
-                "content": message.content,
-                "sender": {
-                    "id": message.sender.id,
-                    "username": message.sender.username,
-                    "email": message.sender.email,
-                    "is_online": message.sender.is_online,
-                },
-                "timestamp": message.timestamp,
-                "status": message.status,
-                "pinned": message.pinned,
-                "reactions": [
-                    {
-                        "id": reaction.id,
-                        "reaction": reaction.reaction,
-                        "user": {
-                            "id": reaction.user.id,
-                            "username": reaction.user.username,
-                            "email": reaction.user.email,
-                            "is_online": reaction.user.is_online,
-                        },
-                        "timestamp": reaction.timestamp,
-                    }
-                    for reaction in reactions
-                ],
-                "translation": message.translation,
-                "detected_language": message.detected_language,
-            }
-        )
+    messages, older_cursor, newer_cursor = await get_message_page(
+        db, chat_id, before=before, after=after, limit=limit
+    )
+    if older_cursor:
+        response.headers[OLDER_CURSOR_HEADER] = older_cursor
+    if newer_cursor:
+        response.headers[NEWER_CURSOR_HEADER] = newer_cursor
 
-    return message_responses
+    return await hydrate_messages(db, messages, {chat.id: chat})
 
 
 @chat_router.get("/{chat_id}/message/{message_id}")
@@ -461,12 +448,11 @@ async def get_message(
     chat_id: str,
     message_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    message = (
-        db.query(Message)
-        .filter(Message.id == message_id, Message.chat_id == chat_id)
-        .first()
+    await require_member(db, chat_id, current_user.id)
+    message = await db.scalar(
+        select(Message).where(Message.id == message_id, Message.chat_id == chat_id)
     )
     if not message:
         raise HTTPException(status_code=404, detail="Message not found")
@@ -474,7 +460,7 @@ async def get_message(
         "message_id": message.id,
         "content": message.content,
         "timestamp": message.timestamp,
-        "status": message.status,
+        "status": message_status(await db.get(Chat, message.chat_id), message),
     }
 
 
@@ -483,20 +469,27 @@ async def edit_message(
     chat_id: str,
     message_id: str,
     content: str,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    message = (
-        db.query(Message)
-        .filter(Message.id == message_id, Message.sender_id == current_user.id)
-        .first()
+    await require_member(db, chat_id, current_user.id)
+    message = await db.scalar(
+        select(Message).where(Message.id == message_id, Message.sender_id == current_user.id)
     )
     if not message:
         raise HTTPException(
             status_code=404, detail="Message not found or not owned by you"
         )
+    if content != message.content:
+        # The stored translation is of the old text; the shared cache stays valid for it
+        message.translation = None
+        message.translation_language = None
+        message.detected_language = None
+        background_tasks.add_task(detect_and_store_language, message.id, content)
     message.content = content
-    db.commit()
+    record_message_edited(await db.get(Chat, message.chat_id), message)
+    await db.commit()
     return {"message": "Message updated successfully"}
 
 
@@ -505,63 +498,77 @@ async def delete_message(
     chat_id: str,
     message_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    message = (
-        db.query(Message)
-        .filter(Message.id == message_id, Message.sender_id == current_user.id)
-        .first()
+    await require_member(db, chat_id, current_user.id)
+    message = await db.scalar(
+        select(Message).where(Message.id == message_id, Message.sender_id == current_user.id)
     )
     if not message:
         raise HTTPException(
             status_code=404, detail="Message not found or not owned by you"
         )
-    db.delete(message)
-    db.commit()
+    chat = await db.get(Chat, message.chat_id)
+    await db.delete(message)
+    await db.flush()
+    await record_message_deleted(db, chat, message)
+    await db.commit()
     return {"message": "Message deleted successfully"}
 
 
 @chat_router.put("/{chat_id}/mark_read")
 async def mark_messages_as_read(
     chat_id: str,
+    up_to_message_id: Optional[str] = None,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    messages = (
-        db.query(Message)
-        .filter(
-            Message.chat_id == chat_id,
-            Message.sender_id != current_user.id,
-            Message.status != "read",
+    chat = await get_member_chat(db, chat_id, current_user.id)
+
+    # Read up to the given message, or everything when none is given
+    message_id = up_to_message_id or chat.last_message_id
+    message = (
+        await db.scalar(
+            select(Message).where(Message.id == message_id, Message.chat_id == chat_id)
         )
-        .all()
+        if message_id
+        else None
     )
-    if not messages:
+    if up_to_message_id and not message:
+        raise HTTPException(status_code=404, detail="Message not found")
+
+    if not message or not await mark_read_up_to(db, chat, current_user.id, message):
         return {"message": "No unread messages"}
 
-    for msg in messages:
-        msg.status = "read"
-    db.commit()
-    return {"message": "All messages marked as read"}
+    await db.commit()
+    await manager.broadcast(chat_id, receipts_event(chat, [current_user.id]))
+    return {"message": "Messages marked as read", "up_to_message_id": message.id}
 
 
 @chat_router.get("/{chat_id}/messages/search")
 async def search_messages(
     chat_id: str,
-    keyword: str,
+    keyword: str = Query(..., min_length=1),
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    messages = (
-        db.query(Message)
-        .filter(Message.chat_id == chat_id, Message.content.ilike(f"%{keyword}%"))
-        .all()
+    hits, next_cursor = await full_text_search(
+        db, current_user.id, keyword, chat_id=chat_id, cursor=cursor, limit=limit
     )
     return {
         "messages": [
-            {"message_id": msg.id, "content": msg.content, "timestamp": msg.timestamp}
-            for msg in messages
-        ]
+            {
+                "message_id": msg.id,
+                "content": msg.content,
+                "timestamp": msg.timestamp,
+                "rank": rank,
+                "snippet": snippet,
+            }
+            for msg, rank, snippet in hits
+        ],
+        "next_cursor": next_cursor,
     }
 
 
@@ -570,17 +577,16 @@ async def pin_message(
     chat_id: str,
     message_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    message = (
-        db.query(Message)
-        .filter(Message.id == message_id, Message.chat_id == chat_id)
-        .first()
+    await require_member(db, chat_id, current_user.id)
+    message = await db.scalar(
+        select(Message).where(Message.id == message_id, Message.chat_id == chat_id)
     )
     if not message:
         raise HTTPException(status_code=404, detail="Message not found")
     message.pinned = True
-    db.commit()
+    await db.commit()
     return {"message": "Message pinned successfully"}
 
 
@@ -589,17 +595,16 @@ async def unpin_message(
     chat_id: str,
     message_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    message = (
-        db.query(Message)
-        .filter(Message.id == message_id, Message.chat_id == chat_id)
-        .first()
+    await require_member(db, chat_id, current_user.id)
+    message = await db.scalar(
+        select(Message).where(Message.id == message_id, Message.chat_id == chat_id)
     )
     if not message:
         raise HTTPException(status_code=404, detail="Message not found")
     message.pinned = False
-    db.commit()
+    await db.commit()
     return {"message": "Message unpinned successfully"}
 
 
@@ -609,12 +614,11 @@ async def react_to_message(
     message_id: str,
     reaction: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    message = (
-        db.query(Message)
-        .filter(Message.id == message_id, Message.chat_id == chat_id)
-        .first()
+    await require_member(db, chat_id, current_user.id)
+    message = await db.scalar(
+        select(Message).where(Message.id == message_id, Message.chat_id == chat_id)
     )
     if not message:
         raise HTTPException(status_code=404, detail="Message not found")
@@ -624,8 +628,8 @@ async def react_to_message(
         message_id=message_id, user_id=current_user.id, reaction=reaction
     )
     db.add(reaction)
-    db.commit()
-    db.refresh(reaction)
+    await db.commit()
+    await db.refresh(reaction)
 
     return {"reaction_id": reaction.id, "message": "Reaction added successfully"}
 
@@ -635,17 +639,16 @@ async def get_message_reactions(
     chat_id: str,
     message_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    message = (
-        db.query(Message)
-        .filter(Message.id == message_id, Message.chat_id == chat_id)
-        .first()
+    await require_member(db, chat_id, current_user.id)
+    message = await db.scalar(
+        select(Message).where(Message.id == message_id, Message.chat_id == chat_id)
     )
     if not message:
         raise HTTPException(status_code=404, detail="Message not found")
 
-    reactions = db.query(Reaction).filter(Reaction.message_id == message_id).all()
+    reactions = await db.scalars(select(Reaction).where(Reaction.message_id == message_id))
     return {
         "reactions": [
             {"user_id": reaction.user_id, "reaction": reaction.reaction}
@@ -659,18 +662,23 @@ async def detect_message_language(
     chat_id: str,
     message_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    message = (
-        db.query(Message)
-        .filter(Message.id == message_id, Message.chat_id == chat_id)
-        .first()
+    await require_member(db, chat_id, current_user.id)
+    message = await db.scalar(
+        select(Message).where(Message.id == message_id, Message.chat_id == chat_id)
     )
     if not message:
         raise HTTPException(status_code=404, detail="Message not found")
 
-    language = detect(message.content)
-    return {"message_id": message.id, "detected_language": language}
+    # Normally detected once at write time; only older messages land here
+    if not message.detected_language:
+        try:
+            message.detected_language = await translator.detect(message.content)
+        except TranslationError as e:
+            raise HTTPException(status_code=e.status_code, detail=str(e))
+        await db.commit()
+    return {"message_id": message.id, "detected_language": message.detected_language}
 
 
 @chat_router.post("/{chat_id}/messages/{message_id}/translate")
@@ -679,21 +687,55 @@ async def translate_message(
     message_id: str,
     target_language: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    message = (
-        db.query(Message)
-        .filter(Message.id == message_id, Message.chat_id == chat_id)
-        .first()
+    await require_member(db, chat_id, current_user.id)
+    message = await db.scalar(
+        select(Message).where(Message.id == message_id, Message.chat_id == chat_id)
     )
     if not message:
         raise HTTPException(status_code=404, detail="Message not found")
 
-    translated = GoogleTranslator(source="auto", target=target_language).translate(
-        message.content
-    )
+    try:
+        translated = await translate_text(db, message.content, target_language)
+    except TranslationError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     return {
         "original_message": message.content,
         "translated_message": translated,
         "target_language": target_language,
     }
+
+
+@chat_router.post("/{chat_id}/messages/translate")
+async def translate_messages(
+    chat_id: str,
+    request: BulkTranslateRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    # Rejected before streaming starts, rather than once per message
+    if not translator.supports(request.target_language):
+        raise HTTPException(
+            status_code=400, detail=f"Unsupported target language: {request.target_language}"
+        )
+    await require_member(db, chat_id, current_user.id)
+
+    if request.message_ids:
+        messages = (
+            await db.scalars(
+                select(Message).where(
+                    Message.chat_id == chat_id, Message.id.in_(request.message_ids)
+                )
+            )
+        ).all()
+    else:
+        messages, _, _ = await get_message_page(
+            db, chat_id, before=request.before, after=request.after, limit=request.limit
+        )
+
+    # One JSON object per line, each sent as soon as its translation is ready
+    return StreamingResponse(
+        await bulk_translate(db, messages, request.target_language),
+        media_type="application/x-ndjson",
+    )
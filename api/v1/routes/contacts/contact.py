@@ -5,10 +5,11 @@ from fastapi import APIRouter, HTTPException, Depends, Request, Security
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from fuzzywuzzy import fuzz
-from api.db.session import get_db
-from api.utils.user import get_current_user
+from api.db.session import get_db, get_read_db
+from api.utils.user import get_current_reader, get_current_user
 from api.v1.models.contact import Contact
 from api.v1.models.user import User
 from api.v1.schemas.contact import (
@@ -38,15 +39,15 @@ limiter = Limiter(key_func=get_remote_address)
 
 # Create contact API - Add contact by id, username, email, or phone_number
 @contact_router.post("/contacts", response_model=ContactOut)
-def create_contact(
+async def create_contact(
     contact: ContactCreate,
     current_user: str = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     user_service = UserService(db)
 
     # Search for user using provided contact detail (email, username, id, phone_number)
-    target_user = user_service.get_user_by_detail(
+    target_user = await user_service.get_user_by_detail(
         contact.email_or_username_or_id_or_phone
     )
 
@@ -57,89 +58,87 @@ def create_contact(
         raise HTTPException(status_code=400, detail="Cannot add yourself as a contact.")
 
     # Check if contact already exists
-    existing_contact = (
-        db.query(Contact)
-        .filter(
+    existing_contact = await db.scalar(
+        select(Contact).where(
             Contact.user_id == current_user.id, Contact.contact_id == target_user.id
         )
-        .first()
     )
     if existing_contact:
         raise HTTPException(status_code=400, detail="Contact already exists.")
 
-    return add_contact(db, target_user.id, current_user.id)
+    return await add_contact(db, target_user.id, current_user.id)
 
 
 # Get a single contact by email, id, or username
 @contact_router.get("/contacts/detail", response_model=ContactDetail)
-def get_single_contact(
+async def get_single_contact(
     email_or_username_or_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: str = Depends(get_current_user),
 ):
-    return get_contact_by_email_or_id_or_username(
+    return await get_contact_by_email_or_id_or_username(
         db, email_or_username_or_id, current_user.id
     )
 
 
 # List contacts API - Get detailed contact info
 @contact_router.get("/contacts", response_model=List[ContactOut])
-def list_contacts(
-    db: Session = Depends(get_db),
-    current_user: str = Depends(get_current_user),
+async def list_contacts(
+    db: AsyncSession = Depends(get_read_db),
+    current_user: str = Depends(get_current_reader),
 ):
-    return get_contacts(db, current_user.id)
+    return await get_contacts(db, current_user.id)
 
 
 # Block contact API
 @contact_router.put("/contacts/block", response_model=ContactBlock)
-def block_contact(
+async def block_contact(
     contact_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: str = Depends(get_current_user),
 ):
-    contact = (
-        db.query(Contact)
-        .filter(Contact.user_id == current_user.id, Contact.contact_id == contact_id)
-        .first()
+    contact = await db.scalar(
+        select(Contact).where(
+            Contact.user_id == current_user.id, Contact.contact_id == contact_id
+        )
     )
     if not contact:
         raise HTTPException(status_code=404, detail="Contact not found.")
-    return restrict_contact(db, contact_id, current_user.id)
+    return await restrict_contact(db, contact_id, current_user.id)
 
 
 # Unblock contact API
 @contact_router.put("/contacts/unblock", response_model=ContactBlock)
-def unblock_contact(
+async def unblock_contact(
     contact_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: str = Depends(get_current_user),
 ):
-    contact = (
-        db.query(Contact)
-        .filter(Contact.user_id == current_user.id, Contact.contact_id == contact_id)
-        .first()
+    contact = await db.scalar(
+        select(Contact).where(
+            Contact.user_id == current_user.id, Contact.contact_id == contact_id
+        )
     )
     if not contact:
         raise HTTPException(status_code=404, detail="Contact not found.")
-    return unrestrict_contact(db, contact_id, current_user.id)
+    return await unrestrict_contact(db, contact_id, current_user.id)
 
 
 # Remove contact API
 @contact_router.delete("/contacts/{contact_id}")
-def delete_contact(
+async def delete_contact(
     contact_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: str = Depends(get_current_user),
 ):
-    contact = (
-        db.query(Contact)
-        .filter(Contact.user_id == current_user.id, Contact.contact_id == contact_id)
-        .first()
+    contact = await db.scalar(
+        select(Contact).where(
+            Contact.user_id == current_user.id, Contact.contact_id == contact_id
+        )
     )
     if not contact:
         raise HTTPException(status_code=404, detail="Contact not found.")
-    remove_contact(db, contact_id, current_user.id)
+    await remove_contact(db, contact_id, current_user.id)
     return {"detail": "Contact removed successfully."}
 
 
@@ -149,17 +148,17 @@ async def search_contacts(
     query: str,
     request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     # Search for contacts based on partial matching with username or email
     contacts = (
-        db.query(User)
-        .filter(
-            User.id != current_user.id,  # Exclude self
-            User.is_active == True,  # Only active users
+        await db.scalars(
+            select(User).where(
+                User.id != current_user.id,  # Exclude self
+                User.is_active == True,  # Only active users
+            )
         )
-        .all()
-    )
+    ).all()
 
     # Filter contacts using fuzzy matching with a threshold
     matched_contacts = [
@@ -170,11 +169,18 @@ async def search_contacts(
     ]
 
     # Exclude contacts blocked by the current user or who have blocked the current user
+    blocked_pairs = await db.execute(
+        select(Contact.user_id, Contact.contact_id).where(
+            Contact.is_blocked.is_(True),
+            (Contact.user_id == current_user.id) | (Contact.contact_id == current_user.id),
+        )
+    )
+    blocked_ids = {
+        contact_id if user_id == current_user.id else user_id
+        for user_id, contact_id in blocked_pairs
+    }
     filtered_contacts = [
-        contact
-        for contact in matched_contacts
-        if not current_user.is_blocking(contact, db)
-        and not contact.is_blocking(current_user, db)
+        contact for contact in matched_contacts if contact.id not in blocked_ids
     ]
 
     if not filtered_contacts:
@@ -0,0 +1,62 @@
+import os
+import secrets
+from anyio.to_thread import current_default_thread_limiter
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from api.core.config import config
+from api.db.pool import pool_status
+from api.db.session import async_engine, replica_engine
+from api.utils.websocket import manager
+from api.v1.services.notifications import notification_manager
+
+metrics_security = HTTPBearer(auto_error=False)
+
+
+def require_metrics_token(
+    credentials: HTTPAuthorizationCredentials = Depends(metrics_security),
+):
+    """Let only holders of METRICS_TOKEN through.
+
+    A static token rather than a user login, so scraping the pool metrics
+    never needs a database connection itself.
+    """
+    if not config.METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if credentials is None or not secrets.compare_digest(
+        credentials.credentials, config.METRICS_TOKEN
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+metrics_router = APIRouter(
+    prefix="/metrics", tags=["Metrics"], dependencies=[Depends(require_metrics_token)]
+)
+
+
+@metrics_router.get("/pool")
+async def get_pool_metrics():
+    # Each worker process has its own pool; the pid tells the responses apart
+    limiter = current_default_thread_limiter()
+    return {
+        "database": pool_status(async_engine.pool),
+        "replica": pool_status(replica_engine.pool) if replica_engine else None,
+        "threadpool": {
+            "total_tokens": limiter.total_tokens,
+            "borrowed_tokens": limiter.borrowed_tokens,
+            "waiting": limiter.statistics().tasks_waiting,
+        },
+    }
+
+
+@metrics_router.get("/websockets")
+async def get_websocket_metrics():
+    # Per worker process, like the pool metrics
+    return {
+        "pid": os.getpid(),
+        "chats": manager.stats(),
+        "notifications": notification_manager.stats(),
+    }
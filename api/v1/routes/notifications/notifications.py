@@ -1,13 +1,14 @@
 import logging
 from fastapi import APIRouter, Depends, HTTPException, Security
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from api.v1.schemas.notifications import NotificationCreate, NotificationOut
-from api.db.session import get_db
+from api.db.session import get_db, get_read_db
 from api.v1.models.notifications import Notification
 from api.v1.models.user import User
-from api.utils.user import get_current_user
+from api.utils.user import get_current_reader, get_current_user
 from api.v1.services.notifications import send_real_time_notification
 
 notification_router = APIRouter(prefix="", tags=["Notifications"])
@@ -23,7 +24,7 @@ async def create_notification(
     notification: NotificationCreate,
     # credentials: HTTPAuthorizationCredentials = Security(security),
     current_user: str = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     logger.info(f"Notification created for {notification.user_id}")
     db_notification = Notification(
@@ -33,8 +34,8 @@ async def create_notification(
     )
     logger.info(f"Notification created for {notification.user_id}")
     db.add(db_notification)
-    db.commit()
-    db.refresh(db_notification)
+    await db.commit()
+    await db.refresh(db_notification)
     return db_notification
 
 
@@ -42,16 +43,16 @@ async def create_notification(
 @notification_router.get("/notifications", response_model=List[NotificationOut])
 async def get_user_notifications(
     # credentials: HTTPAuthorizationCredentials = Security(security),
-    current_user: str = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: str = Depends(get_current_reader),
+    db: AsyncSession = Depends(get_read_db),
 ):
     # token = credentials.credentials
     # current_user = get_current_user(token=token, db=db)
 
-    notifications = (
-        db.query(Notification).filter(Notification.user_id == current_user.id).all()
+    notifications = await db.scalars(
+        select(Notification).where(Notification.user_id == current_user.id)
     )
-    return notifications
+    return notifications.all()
 
 
 # Mark Notification as Read
@@ -60,24 +61,22 @@ async def mark_notification_as_read(
     notification_id: str,
     # credentials: HTTPAuthorizationCredentials = Security(security),
     current_user: str = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
 
     # token = credentials.credentials
     # current_user = get_current_user(token=token, db=db)
 
-    notification = (
-        db.query(Notification)
-        .filter(
+    notification = await db.scalar(
+        select(Notification).where(
             Notification.id == notification_id, Notification.user_id == current_user.id
         )
-        .first()
     )
     if not notification:
         raise HTTPException(status_code=404, detail="Notification not found")
 
     notification.read = True
-    db.commit()
+    await db.commit()
     return {"status": "Notification marked as read"}
 
 
@@ -87,23 +86,21 @@ async def delete_notification(
     notification_id: str,
     # credentials: HTTPAuthorizationCredentials = Security(security),
     current_user: str = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     # token = credentials.credentials
     # current_user = get_current_user(token=token, db=db)
 
-    notification = (
-        db.query(Notification)
-        .filter(
+    notification = await db.scalar(
+        select(Notification).where(
             Notification.id == notification_id, Notification.user_id == current_user.id
         )
-        .first()
     )
     if not notification:
         raise HTTPException(status_code=404, detail="Notification not found")
 
-    db.delete(notification)
-    db.commit()
+    await db.delete(notification)
+    await db.commit()
     return {"status": "Notification deleted"}
 
 
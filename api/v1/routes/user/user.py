@@ -1,14 +1,16 @@
 import logging
 from fastapi import APIRouter, Depends, HTTPException, Security
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from api.v1.schemas.user import UserOut, UserUpdate
-from api.utils.user import get_current_user
+from api.utils.user import get_current_reader, get_current_user
 from api.v1.services.user import UserService
-from api.db.session import get_db
+from api.v1.services.membership import membership_cache
+from api.db.session import get_db, get_read_db
 
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 from fastapi import File, UploadFile
+from fastapi.concurrency import run_in_threadpool
 import shutil
 import os
 
@@ -23,15 +25,15 @@ logger = logging.getLogger(__name__)
 
 # Get User Profile
 @user_router.get("/profile", response_model=UserOut)
-def get_user_profile(
-    db: Session = Depends(get_db),
-    current_user: str = Depends(get_current_user),
+async def get_user_profile(
+    db: AsyncSession = Depends(get_read_db),
+    current_user: str = Depends(get_current_reader),
 ):
     # token = credentials.credentials
     # current_user = get_current_user(token=token, db=db)
 
     user_service = UserService(db)
-    user = user_service.get_user_by_id(
+    user = await user_service.get_user_by_id(
         current_user.id
     )  # Get the current user by token id
 
@@ -43,9 +45,9 @@ def get_user_profile(
 
 # Upload Profile Image and Update dpUrl
 @user_router.post("/upload-image", response_model=UserOut)
-def upload_profile_image(
+async def upload_profile_image(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: str = Depends(get_current_user),
 ):
     # token = credentials.credentials
@@ -57,38 +59,42 @@ def upload_profile_image(
     image_path = f"{image_dir}/{current_user.username}_{file.filename}"
 
     # Save the file to the local directory (or cloud storage, if you prefer)
-    with open(image_path, "wb") as image_file:
-        shutil.copyfileobj(file.file, image_file)
+    def save_image():
+        with open(image_path, "wb") as image_file:
+            shutil.copyfileobj(file.file, image_file)
+
+    # Blocking file I/O stays off the event loop
+    await run_in_threadpool(save_image)
 
     # Assuming you're storing the URL/path of the image
     image_url = f"/{image_path}"  # In a real app, this would be a cloud storage URL
 
     # Update the user's dpUrl field
     user_service = UserService(db)
-    user = user_service.get_user_by_id(current_user.id)
+    user = await user_service.get_user_by_id(current_user.id)
 
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
     user.dpUrl = image_url
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
 
     return user
 
 
 # Update User Details
 @user_router.put("/update", response_model=UserOut)
-def update_user_details(
+async def update_user_details(
     user_data: UserUpdate,  # Using schema for request data
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: str = Depends(get_current_user),
 ):
     # token = credentials.credentials
     # current_user = get_current_user(token=token, db=db)
 
     user_service = UserService(db)
-    user = user_service.get_user_by_id(current_user.id)
+    user = await user_service.get_user_by_id(current_user.id)
 
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -100,46 +106,46 @@ def update_user_details(
     user.phone_number = user_data.phone_number or user.phone_number
     user.date_of_birth = user_data.date_of_birth or user.date_of_birth
 
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
 
     return user
 
 
 # Deactivate Account
 @user_router.put("/deactivate")
-def deactivate_account(
-    db: Session = Depends(get_db),
+async def deactivate_account(
+    db: AsyncSession = Depends(get_db),
     current_user: str = Depends(get_current_user),
 ):
     # token = credentials.credentials
     # current_user = get_current_user(token=token, db=db)
 
     user_service = UserService(db)
-    user = user_service.get_user_by_id(current_user.id)
+    user = await user_service.get_user_by_id(current_user.id)
 
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
     # Set a flag or update a status field indicating deactivation
     user.is_active = False
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
 
     return {"detail": "User account deactivated successfully"}
 
 
 # Reactivate Account
 @user_router.put("/reactivate")
-def reactivate_account(
-    db: Session = Depends(get_db),
+async def reactivate_account(
+    db: AsyncSession = Depends(get_db),
     current_user: str = Depends(get_current_user),
 ):
     # token = credentials.credentials
     # current_user = get_current_user(token=token, db=db)
 
     user_service = UserService(db)
-    user = user_service.get_user_by_id(current_user.id)
+    user = await user_service.get_user_by_id(current_user.id)
 
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -149,30 +155,31 @@ def reactivate_account(
 
     # Reactivate the account
     user.is_active = True
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
 
     return {"detail": "User account reactivated successfully"}
 
 
 # Delete Account
 @user_router.delete("/delete")
-def delete_account(
-    db: Session = Depends(get_db),
+async def delete_account(
+    db: AsyncSession = Depends(get_db),
     current_user: str = Depends(get_current_user),
 ):
     # token = credentials.credentials
     # current_user = get_current_user(token=token, db=db)
 
     user_service = UserService(db)
-    user = user_service.get_user_by_id(
+    user = await user_service.get_user_by_id(
         current_user.id
     )  # Get the current user by token id
 
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    db.delete(user)
-    db.commit()
+    await db.delete(user)
+    await db.commit()
+    membership_cache.invalidate_user(user.id)
 
     return {"detail": "User account deleted successfully"}
@@ -25,6 +25,7 @@ class ChatResponse(BaseModel):
     last_message: Optional[MessageInfo]
     unread_count: int
     is_pinned: bool
+    last_activity_at: Optional[datetime] = None
 
 class ChatListResponse(BaseModel):
     chats: List[ChatResponse]
\ No newline at end of file
@@ -9,7 +9,7 @@ class UserInfo(BaseModel):
     is_online: bool
 
 class ReactionInfo(BaseModel):
-    id: str
+    id: int
     reaction: str
     user: UserInfo
     timestamp: datetime
@@ -23,10 +23,18 @@ class MessageResponse(BaseModel):
     pinned: bool
     reactions: List[ReactionInfo]
     translation: Optional[str]
+    translation_language: Optional[str] = None
     detected_language: Optional[str]
 
-class MessageListResponse(BaseModel):
-    messages: List[MessageResponse]
-
 class MessageCreate(BaseModel):
     content: str
+    client_id: Optional[str] = None
+
+
+class BulkTranslateRequest(BaseModel):
+    target_language: str
+    # Either explicit message ids, or a page of history selected like get_messages
+    message_ids: Optional[List[str]] = Field(None, max_length=200)
+    before: Optional[str] = None
+    after: Optional[str] = None
+    limit: int = Field(50, ge=1, le=200)
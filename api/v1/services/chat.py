@@ -0,0 +1,387 @@
+import asyncio
+import logging
+import sys
+import time
+from collections import defaultdict
+from typing import Callable, Optional
+from fastapi import HTTPException
+from sqlalchemy import event, func, select, tuple_, union_all
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from api.core.config import config
+from api.db.session import AsyncSessionLocal, async_engine
+from api.v1.models.chat import Chat
+from api.v1.models.message import CLIENT_ID_CONSTRAINT, Message
+from api.v1.models.reaction import Reaction
+from api.v1.models.user import User
+from api.v1.services.chat_summary import message_status, other_participant, record_message_sent
+from api.v1.services.language import detect_and_store_language
+from api.v1.services.message_writer import message_writer
+from api.v1.services.presence import is_online
+from api.v1.services.translation import auto_translate_and_broadcast
+from api.utils.websocket import manager
+from api.utils.pagination import encode_message_cursor, decode_message_cursor
+
+logger = logging.getLogger(__name__)
+
+
+async def get_message_page(
+    db: AsyncSession,
+    chat_id: str,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: int = 50,
+):
+    """Fetch one page of a chat's history, newest first, using keyset pagination.
+
+    Messages are ordered on (timestamp, id) so that rows sharing a timestamp
+    still page deterministically, and every page is a bounded range scan on
+    the (chat_id, timestamp, id) index no matter how long the chat is.
+    """
+    if before and after:
+        raise HTTPException(
+            status_code=400, detail="Use either 'before' or 'after', not both"
+        )
+
+    position = tuple_(Message.timestamp, Message.id)
+    query = select(Message).where(Message.chat_id == chat_id)
+
+    if after:
+        query = query.where(position > tuple_(*decode_message_cursor(after)))
+        query = query.order_by(Message.timestamp.asc(), Message.id.asc())
+    else:
+        if before:
+            query = query.where(position < tuple_(*decode_message_cursor(before)))
+        query = query.order_by(Message.timestamp.desc(), Message.id.desc())
+
+    # Fetch one extra row to know whether another page exists
+    messages = list((await db.scalars(query.limit(limit + 1))).all())
+    has_more = len(messages) > limit
+    messages = messages[:limit]
+
+    if after:
+        # Rows were read oldest first; pages are always returned newest first
+        messages.reverse()
+        older_cursor = encode_message_cursor(messages[-1]) if messages else None
+        newer_cursor = encode_message_cursor(messages[0]) if has_more else None
+    else:
+        older_cursor = encode_message_cursor(messages[-1]) if has_more else None
+        newer_cursor = (
+            encode_message_cursor(messages[0]) if before and messages else None
+        )
+
+    return messages, older_cursor, newer_cursor
+
+
+def user_info(user: User) -> dict:
+    return {
+        "id": user.id,
+        "username": user.username,
+        "email": user.email,
+        "is_online": is_online(user),
+    }
+
+
+async def hydrate_messages(db: AsyncSession, messages: list, chats: dict) -> list:
+    """Build `MessageResponse` payloads for a page of messages.
+
+    `chats` maps chat id to `Chat` for every chat the messages belong to.
+
+    Reactions for the whole page are loaded in one query and every user
+    involved (senders and reactors) in another, so the cost stays at a fixed
+    number of round trips however many messages the page holds.
+    """
+    if not messages:
+        return []
+
+    reactions = (
+        await db.scalars(
+            select(Reaction)
+            .where(Reaction.message_id.in_([message.id for message in messages]))
+            .order_by(Reaction.created_at)
+        )
+    ).all()
+
+    user_ids = {message.sender_id for message in messages}
+    user_ids.update(reaction.user_id for reaction in reactions)
+    users = {
+        user.id: user for user in await db.scalars(select(User).where(User.id.in_(user_ids)))
+    }
+
+    reactions_by_message = defaultdict(list)
+    for reaction in reactions:
+        reactor = users.get(reaction.user_id)
+        if not reactor:
+            continue
+        reactions_by_message[reaction.message_id].append(
+            {
+                "id": reaction.id,
+                "reaction": reaction.reaction,
+                "user": user_info(reactor),
+                "timestamp": reaction.created_at,
+            }
+        )
+
+    return [
+        {
+            "id": message.id,
+            "content": message.content,
+            "sender": user_info(users[message.sender_id]),
+            "timestamp": message.timestamp,
+            "status": message_status(chats[message.chat_id], message),
+            "pinned": message.pinned,
+            "reactions": reactions_by_message[message.id],
+            "translation": message.translation,
+            "translation_language": message.translation_language,
+            "detected_language": message.detected_language,
+        }
+        for message in messages
+    ]
+
+
+def message_info(chat: Chat, message: Optional[Message]) -> Optional[dict]:
+    if message is None:
+        return None
+    return {
+        "id": message.id,
+        "content": message.content,
+        "sender_id": message.sender_id,
+        "timestamp": message.timestamp,
+        "status": message_status(chat, message),
+        "pinned": message.pinned,
+    }
+
+
+def chat_response(
+    chat: Chat, user1: User, user2: User, last_message: Optional[Message], unread_count: int
+) -> dict:
+    return {
+        "id": chat.id,
+        "created_at": chat.created_at,
+        "updated_at": chat.updated_at,
+        "user1": user_info(user1),
+        "user2": user_info(user2),
+        "last_message": message_info(chat, last_message),
+        "unread_count": unread_count,
+        "is_pinned": chat.is_pinned,
+        "last_activity_at": chat.last_activity_at,
+    }
+
+
+async def get_inbox(db: AsyncSession, user_id: str, chat_id: Optional[str] = None) -> list:
+    """Build `ChatResponse` payloads for a user's chats, most recent first.
+
+    Everything comes from the activity summary kept on `Chat`: the last
+    message is a primary-key join and the unread count a column, so there
+    is no per-chat aggregation. The user's chats are a UNION ALL of one
+    select per participant slot, each an ordered scan of its
+    `(userN_id, last_activity_at)` index; an OR across both slots could
+    use neither index for ordering.
+    """
+
+    def slot(user_column, unread_column):
+        query = select(
+            Chat.id,
+            Chat.last_activity_at,
+            unread_column.label("unread_count"),
+        ).where(user_column == user_id)
+        if chat_id:
+            query = query.where(Chat.id == chat_id)
+        return query
+
+    inbox = union_all(
+        slot(Chat.user1_id, Chat.user1_unread_count),
+        # A chat with oneself is listed once, from the first slot
+        slot(Chat.user2_id, Chat.user2_unread_count).where(Chat.user1_id != user_id),
+    ).subquery()
+
+    User1 = aliased(User)
+    User2 = aliased(User)
+    LastMessage = aliased(Message)
+
+    rows = await db.execute(
+        select(Chat, User1, User2, LastMessage, inbox.c.unread_count)
+        .join(inbox, inbox.c.id == Chat.id)
+        .join(User1, Chat.user1_id == User1.id)
+        .join(User2, Chat.user2_id == User2.id)
+        .outerjoin(LastMessage, LastMessage.id == Chat.last_message_id)
+        .order_by(inbox.c.last_activity_at.desc().nulls_last(), inbox.c.id)
+    )
+
+    return [
+        chat_response(chat, user1, user2, last_message, unread_count)
+        for chat, user1, user2, last_message, unread_count in rows
+    ]
+
+
+def new_message_event(message: Message) -> dict:
+    return {
+        "type": "new_message",
+        "chat_id": message.chat_id,
+        "message": {
+            "id": message.id,
+            "content": message.content,
+            "sender_id": message.sender_id,
+            "timestamp": message.timestamp.isoformat(),
+            "status": message.status,
+            "pinned": message.pinned,
+            "reactions": [],
+            "translation": message.translation,
+            "translation_language": message.translation_language,
+            "detected_language": message.detected_language,
+            "client_id": message.client_id,
+        },
+    }
+
+
+def preferred_language(chat: Chat, user_id: str) -> Optional[str]:
+    return chat.user1_language if user_id == chat.user1_id else chat.user2_language
+
+
+def _is_client_id_conflict(error: IntegrityError) -> bool:
+    """Whether `error` is the (sender_id, client_id) unique check and not another constraint."""
+    # asyncpg reports the constraint by name; SQLite only lists the columns
+    constraint = getattr(error.orig.__cause__, "constraint_name", None)
+    if constraint is not None:
+        return constraint == CLIENT_ID_CONSTRAINT
+    return "messages.sender_id, messages.client_id" in str(error.orig)
+
+
+async def _message_by_client_id(db: AsyncSession, sender_id: str, client_id: str):
+    return await db.scalar(
+        select(Message).where(Message.sender_id == sender_id, Message.client_id == client_id)
+    )
+
+
+async def _store_message(
+    db: AsyncSession, chat: Chat, sender_id: str, content: str, client_id: Optional[str]
+):
+    if client_id:
+        existing = await _message_by_client_id(db, sender_id, client_id)
+        if existing:
+            return existing, True
+
+    message = Message(content=content, chat_id=chat.id, sender_id=sender_id, client_id=client_id)
+    db.add(message)
+    try:
+        await db.flush()
+    except IntegrityError as e:
+        await db.rollback()
+        if not client_id or not _is_client_id_conflict(e):
+            # e.g. the chat was deleted meanwhile
+            raise
+        # A concurrent retry with the same client id got there first
+        return await _message_by_client_id(db, sender_id, client_id), True
+    record_message_sent(chat, message)
+    await db.commit()
+    await db.refresh(message)
+    return message, False
+
+
+async def post_message(
+    db: AsyncSession,
+    chat: Chat,
+    sender_id: str,
+    content: str,
+    run_in_background: Callable,
+    client_id: Optional[str] = None,
+):
+    """Store a new message, update the chat summary and deliver it.
+
+    Shared by the HTTP and WebSocket send paths; `run_in_background(fn, *args)`
+    schedules the post-commit stages. A `client_id` already used by the
+    sender returns the stored message instead of posting it twice. With
+    MESSAGE_GROUP_COMMIT the write goes through the group-commit writer.
+    Returns `(event, duplicate)`.
+    """
+    if config.MESSAGE_GROUP_COMMIT:
+        message, duplicate = await message_writer.write(chat.id, sender_id, content, client_id)
+    else:
+        message, duplicate = await _store_message(db, chat, sender_id, content, client_id)
+    if duplicate:
+        return new_message_event(message), True
+
+    # Prepare detailed message data for broadcast
+    message_payload = new_message_event(message)
+
+    target_language = preferred_language(chat, other_participant(chat, sender_id))
+    if target_language:
+        # Delivered once translated, in the background
+        run_in_background(auto_translate_and_broadcast, message_payload, target_language)
+    else:
+        # Broadcast the message to all WebSocket connections in this chat
+        await manager.broadcast(chat.id, message_payload)
+
+    run_in_background(detect_and_store_language, message.id, message.content)
+
+    return message_payload, False
+
+
+async def _legacy_inbox(db: AsyncSession, user_id: str) -> list:
+    # Baseline for the benchmark: the inbox as it was built before the
+    # set-based query, four round trips per chat
+    chats = (
+        await db.scalars(select(Chat).where((Chat.user1_id == user_id) | (Chat.user2_id == user_id)))
+    ).all()
+    responses = []
+    for chat in chats:
+        last_message = await db.scalar(
+            select(Message)
+            .where(Message.chat_id == chat.id)
+            .order_by(Message.timestamp.desc())
+            .limit(1)
+        )
+        unread_count = await db.scalar(
+            select(func.count())
+            .select_from(Message)
+            .where(
+                Message.chat_id == chat.id,
+                Message.sender_id != user_id,
+                Message.status != "read",
+            )
+        )
+        # The lazy loads of chat.user1 and chat.user2
+        user1 = await db.get(User, chat.user1_id, populate_existing=True)
+        user2 = await db.get(User, chat.user2_id, populate_existing=True)
+        responses.append(chat_response(chat, user1, user2, last_message, unread_count))
+    return responses
+
+
+async def benchmark(user_id: str, rounds: int = 20):
+    """Compare the set-based inbox with the per-chat queries it replaced.
+
+    Loads `user_id`'s inbox `rounds` times with each and reports the
+    average time and number of statements per load.
+    """
+
+    async def run(build_inbox):
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+        try:
+            start = time.perf_counter()
+            for _ in range(rounds):
+                async with AsyncSessionLocal() as db:
+                    chats = await build_inbox(db, user_id)
+            elapsed = time.perf_counter() - start
+        finally:
+            event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+        return len(chats), elapsed / rounds * 1000, len(statements) / rounds
+
+    chats, legacy_ms, legacy_queries = await run(_legacy_inbox)
+    _, inbox_ms, inbox_queries = await run(get_inbox)
+    logger.info("Inbox of %d chats, average of %d loads", chats, rounds)
+    logger.info("Per-chat queries: %.1f ms, %.0f statements", legacy_ms, legacy_queries)
+    logger.info("Set-based query:  %.1f ms, %.0f statements", inbox_ms, inbox_queries)
+
+
+if __name__ == "__main__":
+    # python -m api.v1.services.chat <user_id> [rounds]
+    import api.v1.models.notifications  # noqa: F401  (mapped by User)
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(benchmark(sys.argv[1], *(int(arg) for arg in sys.argv[2:3])))
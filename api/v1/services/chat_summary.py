@@ -0,0 +1,296 @@
+import logging
+from collections import Counter
+from typing import Optional
+from sqlalchemy import and_, case, func, or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from api.v1.models.chat import Chat
+from api.v1.models.message import Message
+
+PREVIEW_LENGTH = 100
+REBUILD_BATCH_SIZE = 500
+
+logger = logging.getLogger(__name__)
+
+
+def _preview(content: str) -> str:
+    return content[:PREVIEW_LENGTH]
+
+
+def _slot(chat: Chat, user_id: str) -> str:
+    return "user1" if user_id == chat.user1_id else "user2"
+
+
+def other_participant(chat: Chat, user_id: str) -> str:
+    return chat.user2_id if user_id == chat.user1_id else chat.user1_id
+
+
+async def _latest_message(db: AsyncSession, chat_id: str) -> Optional[Message]:
+    return await db.scalar(
+        select(Message)
+        .where(Message.chat_id == chat_id)
+        .order_by(Message.timestamp.desc(), Message.id.desc())
+        .limit(1)
+    )
+
+
+def _set_last_message(chat: Chat, message: Optional[Message]):
+    chat.last_message_id = message.id if message else None
+    chat.last_message_preview = _preview(message.content) if message else None
+    chat.last_activity_at = message.timestamp if message else chat.created_at
+
+
+def _watermark(chat: Chat, user_id: str, kind: str):
+    slot = _slot(chat, user_id)
+    at = getattr(chat, f"{slot}_{kind}_at")
+    if at is None:
+        return None
+    return at, getattr(chat, f"{slot}_{kind}_message_id")
+
+
+def _advance_watermark(chat: Chat, user_id: str, kind: str, message: Message) -> bool:
+    # Watermarks only move forward
+    watermark = _watermark(chat, user_id, kind)
+    if watermark is not None and (message.timestamp, message.id) <= watermark:
+        return False
+    slot = _slot(chat, user_id)
+    setattr(chat, f"{slot}_{kind}_at", message.timestamp)
+    setattr(chat, f"{slot}_{kind}_message_id", message.id)
+    return True
+
+
+def read_watermark(chat: Chat, user_id: str):
+    """Return the (timestamp, id) position up to which `user_id` has read, if any."""
+    return _watermark(chat, user_id, "read")
+
+
+def delivered_watermark(chat: Chat, user_id: str):
+    """Return the (timestamp, id) position up to which `user_id` has received messages."""
+    return _watermark(chat, user_id, "delivered")
+
+
+def is_read(chat: Chat, message: Message) -> bool:
+    """Whether the recipient of `message` has read it, per their watermark."""
+    watermark = read_watermark(chat, other_participant(chat, message.sender_id))
+    return watermark is not None and (message.timestamp, message.id) <= watermark
+
+
+def is_delivered(chat: Chat, message: Message) -> bool:
+    watermark = delivered_watermark(chat, other_participant(chat, message.sender_id))
+    return watermark is not None and (message.timestamp, message.id) <= watermark
+
+
+def message_status(chat: Chat, message: Message) -> str:
+    if is_read(chat, message):
+        return "read"
+    if is_delivered(chat, message):
+        return "delivered"
+    return message.status
+
+
+def record_message_sent(chat: Chat, message: Message):
+    """Fold a newly flushed message into the chat summary.
+
+    The recipient's counter is bumped with a SQL expression rather than a
+    read-modify-write so concurrent senders cannot lose increments.
+    """
+    record_messages_sent(chat, [message])
+
+
+def record_messages_sent(chat: Chat, messages: list):
+    """Fold several new messages of one chat, oldest first, into its summary."""
+    counts = Counter(_slot(chat, other_participant(chat, message.sender_id)) for message in messages)
+    for slot, count in counts.items():
+        attr = f"{slot}_unread_count"
+        setattr(chat, attr, getattr(Chat, attr) + count)
+    _set_last_message(chat, messages[-1])
+
+
+def record_message_edited(chat: Chat, message: Message):
+    if chat.last_message_id == message.id:
+        chat.last_message_preview = _preview(message.content)
+
+
+async def record_message_deleted(db: AsyncSession, chat: Chat, message: Message):
+    """Update the summary after `message` has been deleted and flushed."""
+    if not is_read(chat, message):
+        attr = f"{_slot(chat, other_participant(chat, message.sender_id))}_unread_count"
+        unread_count = getattr(Chat, attr)
+        # Portable floor at zero (SQLite has no greatest())
+        setattr(chat, attr, case((unread_count > 0, unread_count - 1), else_=0))
+
+    if chat.last_message_id == message.id:
+        _set_last_message(chat, await _latest_message(db, chat.id))
+
+
+async def mark_read_up_to(db: AsyncSession, chat: Chat, user_id: str, message: Message) -> bool:
+    """Advance `user_id`'s read watermark to `message`.
+
+    This is a single-row update of the chat; per-message rows are never
+    touched. Watermarks only move forward, and the unread counter is
+    recomputed with one indexed range count unless everything is now read.
+    Returns False when the watermark was already at or past `message`.
+    """
+    if not _advance_watermark(chat, user_id, "read", message):
+        return False
+    # Whatever has been read has been delivered
+    _advance_watermark(chat, user_id, "delivered", message)
+
+    slot = _slot(chat, user_id)
+    position = (message.timestamp, message.id)
+
+    if message.id == chat.last_message_id:
+        unread_count = 0
+    else:
+        unread_count = await db.scalar(
+            select(func.count(Message.id)).where(
+                Message.chat_id == chat.id,
+                Message.sender_id == other_participant(chat, user_id),
+                tuple_(Message.timestamp, Message.id) > tuple_(*position),
+            )
+        )
+    setattr(chat, f"{slot}_unread_count", unread_count)
+    return True
+
+
+def mark_delivered_up_to(chat: Chat, user_id: str, message: Message) -> bool:
+    """Advance `user_id`'s delivery watermark to `message`; a single-row update."""
+    return _advance_watermark(chat, user_id, "delivered", message)
+
+
+def _unread_since(read_at, read_message_id, sender_id):
+    """SQL expression counting messages from `sender_id` past a watermark."""
+    after_watermark = or_(
+        read_at.is_(None),
+        tuple_(Message.timestamp, Message.id) > tuple_(read_at, read_message_id),
+    )
+    return func.sum(case((and_(Message.sender_id == sender_id, after_watermark), 1), else_=0))
+
+
+def migrate_read_status(db: Session) -> int:
+    """Seed read watermarks from the legacy per-message `status == "read"` flags.
+
+    Each participant's watermark becomes the newest message addressed to
+    them that was marked read. Watermarks never move backwards, so the
+    migration is safe to re-run.
+    """
+    ranked = (
+        select(
+            Message.chat_id,
+            Message.sender_id,
+            Message.id,
+            Message.timestamp,
+            func.row_number()
+            .over(
+                partition_by=(Message.chat_id, Message.sender_id),
+                order_by=(Message.timestamp.desc(), Message.id.desc()),
+            )
+            .label("rank"),
+        )
+        .where(Message.status == "read")
+        .subquery()
+    )
+    newest_read = db.execute(select(ranked).where(ranked.c.rank == 1)).all()
+
+    chats = {}
+    chat_ids = list({row.chat_id for row in newest_read})
+    for start in range(0, len(chat_ids), REBUILD_BATCH_SIZE):
+        batch = chat_ids[start : start + REBUILD_BATCH_SIZE]
+        chats.update(
+            (chat.id, chat) for chat in db.query(Chat).filter(Chat.id.in_(batch))
+        )
+
+    migrated = 0
+    for row in newest_read:
+        chat = chats.get(row.chat_id)
+        if chat is None or row.sender_id not in (chat.user1_id, chat.user2_id):
+            continue
+        reader_id = other_participant(chat, row.sender_id)
+        watermark = read_watermark(chat, reader_id)
+        if watermark is not None and (row.timestamp, row.id) <= watermark:
+            continue
+        slot = _slot(chat, reader_id)
+        setattr(chat, f"{slot}_read_at", row.timestamp)
+        setattr(chat, f"{slot}_read_message_id", row.id)
+        migrated += 1
+
+    db.commit()
+    logger.info("Migrated %s read watermarks", migrated)
+    return migrated
+
+
+def rebuild_chat_summaries(db: Session, batch_size: int = REBUILD_BATCH_SIZE) -> int:
+    """Recompute every chat summary from the `messages` table.
+
+    Maintenance job on the synchronous engine. Repairs drift left by failed
+    writes or by rows that predate the summary columns. Unread counters are
+    derived from the read watermarks. Chats are processed in id order, one
+    batch per transaction.
+    """
+    rebuilt = 0
+    last_chat_id = None
+    while True:
+        query = db.query(Chat)
+        if last_chat_id is not None:
+            query = query.filter(Chat.id > last_chat_id)
+        chats = query.order_by(Chat.id).limit(batch_size).all()
+        if not chats:
+            break
+
+        chat_ids = [chat.id for chat in chats]
+        # Newest message per chat; a window function rather than a LATERAL
+        # join, which SQLite does not support
+        ranked = (
+            select(
+                Message.id,
+                func.row_number()
+                .over(
+                    partition_by=Message.chat_id,
+                    order_by=(Message.timestamp.desc(), Message.id.desc()),
+                )
+                .label("rank"),
+            )
+            .where(Message.chat_id.in_(chat_ids))
+            .subquery()
+        )
+        last_messages = {
+            message.chat_id: message
+            for message in db.query(Message)
+            .join(ranked, ranked.c.id == Message.id)
+            .filter(ranked.c.rank == 1)
+        }
+        unread = {
+            chat_id: (user1_unread, user2_unread)
+            for chat_id, user1_unread, user2_unread in db.query(
+                Message.chat_id,
+                _unread_since(Chat.user1_read_at, Chat.user1_read_message_id, Chat.user2_id),
+                _unread_since(Chat.user2_read_at, Chat.user2_read_message_id, Chat.user1_id),
+            )
+            .join(Chat, Chat.id == Message.chat_id)
+            .filter(Message.chat_id.in_(chat_ids))
+            .group_by(Message.chat_id)
+        }
+
+        for chat in chats:
+            _set_last_message(chat, last_messages.get(chat.id))
+            chat.user1_unread_count, chat.user2_unread_count = unread.get(chat.id, (0, 0))
+
+        db.commit()
+        rebuilt += len(chats)
+        last_chat_id = chat_ids[-1]
+        logger.info("Rebuilt %s chat summaries", rebuilt)
+
+    return rebuilt
+
+
+if __name__ == "__main__":
+    from api.db.session import SessionLocal
+    # Models the relationships of Chat and Message refer to
+    import api.v1.models.notifications  # noqa: F401
+    import api.v1.models.reaction  # noqa: F401
+    import api.v1.models.user  # noqa: F401
+
+    logging.basicConfig(level=logging.INFO)
+    with SessionLocal() as db:
+        migrate_read_status(db)
+        rebuild_chat_summaries(db)
@@ -1,16 +1,15 @@
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from api.v1.models.contact import Contact
 from api.v1.models.user import User
 from api.v1.schemas.contact import ContactCreate, ContactDetail, ContactOut
 
 
-def add_contact(db: Session, contact_id: str, user_id: str):
+async def add_contact(db: AsyncSession, contact_id: str, user_id: str):
     # Check if the reverse relationship exists first to avoid duplicates
-    reverse_contact_exists = (
-        db.query(Contact)
-        .filter(Contact.user_id == contact_id, Contact.contact_id == user_id)
-        .first()
+    reverse_contact_exists = await db.scalar(
+        select(Contact).where(Contact.user_id == contact_id, Contact.contact_id == user_id)
     )
 
     # Add contact for User A -> User B
@@ -22,11 +21,11 @@ def add_contact(db: Session, contact_id: str, user_id: str):
         reverse_contact = Contact(user_id=contact_id, contact_id=user_id)
         db.add(reverse_contact)
 
-    db.commit()
-    db.refresh(new_contact)
+    await db.commit()
+    await db.refresh(new_contact)
 
     # Fetch the target user's details
-    contact_user = db.query(User).filter(User.id == contact_id).first()
+    contact_user = await db.get(User, contact_id)
 
     # Return the contact details in the format expected by the `ContactOut` schema
     return ContactOut(
@@ -39,81 +38,76 @@ def add_contact(db: Session, contact_id: str, user_id: str):
 
 
 
-def get_contacts(db: Session, user_id: str):
+async def get_contacts(db: AsyncSession, user_id: str):
     # Fetch contacts added by the user (user_id is the owner of the contacts)
-    contacts = (
-        db.query(Contact)
-        .filter(Contact.user_id == user_id)  # Ensure you're fetching by user_id
+    contacts = await db.execute(
+        select(Contact, User)
         .join(User, Contact.contact_id == User.id)  # Join to get contact user details
-        .all()
+        .where(Contact.user_id == user_id)  # Ensure you're fetching by user_id
     )
 
     return [
         ContactOut(
             contact_id=contact.contact_id,  # This should be the ID of the contact user
-            username=contact.contact_user.username,  # Details of the contact user
-            email=contact.contact_user.email,
-            phone_number=contact.contact_user.phone_number,
+            username=contact_user.username,  # Details of the contact user
+            email=contact_user.email,
+            phone_number=contact_user.phone_number,
             is_blocked=contact.is_blocked,
         )
-        for contact in contacts
+        for contact, contact_user in contacts
     ]
 
 
-def get_contact_by_email_or_id_or_username(
-    db: Session, contact_identifier: str, user_id: str
+async def get_contact_by_email_or_id_or_username(
+    db: AsyncSession, contact_identifier: str, user_id: str
 ):
-    contact = (
-        db.query(Contact)
+    result = await db.execute(
+        select(Contact, User)
         .join(User, Contact.contact_id == User.id)
-        .filter(
+        .where(
             (User.email == contact_identifier)
             | (User.username == contact_identifier)
             | (User.id == contact_identifier)
         )
-        .first()
+        .limit(1)
     )
+    row = result.first()
 
-    if not contact:
+    if not row:
         raise HTTPException(status_code=404, detail="Contact not found.")
 
+    contact, contact_user = row
     return ContactDetail(
         contact_id=contact.contact_id,
-        username=contact.contact_user.username,
-        email=contact.contact_user.email,
-        phone_number=contact.contact_user.phone_number,
-        bio=contact.contact_user.bio,
-        dpUrl=contact.contact_user.dpUrl,
+        username=contact_user.username,
+        email=contact_user.email,
+        phone_number=contact_user.phone_number,
+        bio=contact_user.bio,
+        dpUrl=contact_user.dpUrl,
     )
 
 
-def restrict_contact(db: Session, contact_id: str, user_id: str):
-    contact = (
-        db.query(Contact)
-        .filter(Contact.user_id == user_id, Contact.contact_id == contact_id)
-        .first()
+async def _get_contact(db: AsyncSession, contact_id: str, user_id: str):
+    return await db.scalar(
+        select(Contact).where(Contact.user_id == user_id, Contact.contact_id == contact_id)
     )
+
+
+async def restrict_contact(db: AsyncSession, contact_id: str, user_id: str):
+    contact = await _get_contact(db, contact_id, user_id)
     contact.is_blocked = True
-    db.commit()
+    await db.commit()
     return contact
 
 
-def unrestrict_contact(db: Session, contact_id: str, user_id: str):
-    contact = (
-        db.query(Contact)
-        .filter(Contact.user_id == user_id, Contact.contact_id == contact_id)
-        .first()
-    )
+async def unrestrict_contact(db: AsyncSession, contact_id: str, user_id: str):
+    contact = await _get_contact(db, contact_id, user_id)
     contact.is_blocked = False
-    db.commit()
+    await db.commit()
     return contact
 
 
-def remove_contact(db: Session, contact_id: str, user_id: str):
-    contact = (
-        db.query(Contact)
-        .filter(Contact.user_id == user_id, Contact.contact_id == contact_id)
-        .first()
-    )
-    db.delete(contact)
-    db.commit()
+async def remove_contact(db: AsyncSession, contact_id: str, user_id: str):
+    contact = await _get_contact(db, contact_id, user_id)
+    await db.delete(contact)
+    await db.commit()
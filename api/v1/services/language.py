@@ -0,0 +1,98 @@
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from api.core.config import config
+from api.db.session import AsyncSessionLocal, SessionLocal
+from api.v1.models.message import Message
+from api.utils.translator import BACKENDS, TranslationError, translator
+
+BACKFILL_CHUNK_SIZE = 500
+
+logger = logging.getLogger(__name__)
+
+
+async def detect_and_store_language(message_id: str, content: str):
+    """Background stage run after a message is committed.
+
+    Detection happens once per message here, so reads never pay for it.
+    The update is skipped if the message was edited in the meantime; the
+    edit schedules its own detection.
+    """
+    try:
+        language = await translator.detect(content)
+    except TranslationError as e:
+        logger.warning("Language detection failed for message %s: %s", message_id, e)
+        return
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(Message)
+            .where(Message.id == message_id, Message.content == content)
+            .values(detected_language=language)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+
+
+def _detect_chunk(backend_name: str, rows: list) -> list:
+    # Runs in a worker process: seed the detector so results match the app's
+    backend = BACKENDS[backend_name]()
+    backend.warm_up()
+    results = []
+    for message_id, content in rows:
+        try:
+            language = backend.detect(content)
+        except Exception:
+            language = None
+        results.append({"id": message_id, "detected_language": language})
+    return results
+
+
+def backfill_detected_languages(
+    db: Session, chunk_size: int = BACKFILL_CHUNK_SIZE, processes: Optional[int] = None
+) -> int:
+    """Detect the language of every message that does not have one yet.
+
+    Messages are read in id order, one chunk per worker process per round,
+    detected across a process pool and written back with a bulk update.
+    Messages whose language cannot be detected are left empty and skipped.
+    """
+    processes = processes or os.cpu_count() or 1
+    backfilled = 0
+    last_id = None
+
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        while True:
+            query = db.query(Message.id, Message.content).filter(
+                Message.detected_language.is_(None)
+            )
+            if last_id is not None:
+                query = query.filter(Message.id > last_id)
+            rows = query.order_by(Message.id).limit(chunk_size * processes).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            chunks = [
+                [tuple(row) for row in rows[start : start + chunk_size]]
+                for start in range(0, len(rows), chunk_size)
+            ]
+            for results in pool.map(
+                _detect_chunk, [config.TRANSLATION_BACKEND] * len(chunks), chunks
+            ):
+                detected = [row for row in results if row["detected_language"]]
+                db.bulk_update_mappings(Message, detected)
+                backfilled += len(detected)
+            db.commit()
+            logger.info("Backfilled detected language for %s messages", backfilled)
+
+    return backfilled
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    with SessionLocal() as db:
+        backfill_detected_languages(db)
@@ -0,0 +1,93 @@
+import time
+from collections import OrderedDict
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from api.core.config import config
+from api.v1.models.chat import Chat
+from api.v1.models.user import User
+
+
+class MembershipCache:
+    """In-process LRU of confirmed (user id, chat id) memberships with a TTL.
+
+    Only memberships are cached, never refusals, so a new chat is usable
+    at once. Chats and users are invalidated here when deleted on this
+    worker; other workers drop the entry when its TTL runs out.
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def get(self, user_id: str, chat_id: str) -> bool:
+        key = (user_id, chat_id)
+        expires_at = self._entries.get(key)
+        if expires_at is None or expires_at <= time.monotonic():
+            self._entries.pop(key, None)
+            return False
+        self._entries.move_to_end(key)
+        return True
+
+    def remember(self, user_id: str, chat_id: str):
+        key = (user_id, chat_id)
+        self._entries[key] = time.monotonic() + self.ttl
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, chat: Chat):
+        for user_id in (chat.user1_id, chat.user2_id):
+            self._entries.pop((user_id, chat.id), None)
+
+    def invalidate_user(self, user_id: str):
+        # O(entries), but only run when an account is deleted
+        for key in [key for key in self._entries if key[0] == user_id]:
+            del self._entries[key]
+
+
+membership_cache = MembershipCache(config.MEMBERSHIP_CACHE_TTL_SECONDS, config.MEMBERSHIP_CACHE_SIZE)
+
+
+async def is_member(db: AsyncSession, chat_id: str, user_id: str) -> bool:
+    """Whether `user_id` takes part in `chat_id`.
+
+    A cache hit does not touch `db`. A miss loads the chat into the
+    session, so a following `db.get(Chat, chat_id)` costs no query.
+    """
+    if membership_cache.get(user_id, chat_id):
+        return True
+    chat = await db.get(Chat, chat_id)
+    if chat is None or user_id not in (chat.user1_id, chat.user2_id):
+        return False
+    membership_cache.remember(user_id, chat_id)
+    return True
+
+
+async def is_known_member(db: AsyncSession, chat_id: str, user_id: str) -> bool:
+    """`is_member` for callers holding only a user id, such as the socket handshake.
+
+    On a cache miss the user must also still exist, since a token outlives
+    a deleted account.
+    """
+    if membership_cache.get(user_id, chat_id):
+        return True
+    if await db.get(User, user_id) is None:
+        return False
+    return await is_member(db, chat_id, user_id)
+
+
+async def require_member(db: AsyncSession, chat_id: str, user_id: str):
+    # Non-members get the same answer as for a chat that does not exist
+    if not await is_member(db, chat_id, user_id):
+        raise HTTPException(status_code=404, detail="Chat not found")
+
+
+async def get_member_chat(db: AsyncSession, chat_id: str, user_id: str) -> Chat:
+    """Load `chat_id` for one of its participants, or raise 404."""
+    await require_member(db, chat_id, user_id)
+    chat = await db.get(Chat, chat_id)
+    if chat is None:
+        # Deleted through another worker while the membership was cached
+        raise HTTPException(status_code=404, detail="Chat not found")
+    return chat
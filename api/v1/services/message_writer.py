@@ -0,0 +1,223 @@
+import asyncio
+import logging
+import sys
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from api.core.config import config
+from api.db.session import AsyncSessionLocal
+from api.v1.models.chat import Chat
+from api.v1.models.message import Message
+from api.v1.services.chat_summary import record_messages_sent
+
+logger = logging.getLogger(__name__)
+
+
+class MessageWriter:
+    """Group commit for new messages.
+
+    Writes arriving within `window` seconds of the first pending one (or
+    until `max_batch` are pending) are stored with one multi-row INSERT,
+    one summary update per chat and one commit, instead of a commit each.
+
+    Ordering: the id and timestamp are assigned when `write` is called, so
+    history order ((timestamp, id), see `get_message_page`) follows call
+    order. Batches commit one at a time in the order they were formed, and
+    within a batch each chat's summary ends on its newest message. A caller
+    only hears back once its row is committed.
+
+    If a batch hits a constraint (a chat deleted meanwhile, or a client id
+    stored concurrently by another worker), its rows are retried one by one
+    so only the offending write fails, or resolves to the stored duplicate.
+    """
+
+    def __init__(self, window: float, max_batch: int):
+        self.window = window
+        self.max_batch = max_batch
+        self.batches = 0
+        self.messages = 0
+        self._pending = []
+        self._timer = None
+        self._lock = asyncio.Lock()
+        self._flushes = set()
+
+    async def write(
+        self, chat_id: str, sender_id: str, content: str, client_id: Optional[str] = None
+    ):
+        """Queue one message; returns `(message, duplicate)` once committed."""
+        loop = asyncio.get_running_loop()
+        row = {
+            "id": str(uuid.uuid4()),
+            "chat_id": chat_id,
+            "sender_id": sender_id,
+            "content": content,
+            "client_id": client_id,
+            "timestamp": datetime.now(),
+            "status": "sent",
+            "pinned": False,
+        }
+        future = loop.create_future()
+        self._pending.append((row, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush_pending()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush_pending)
+        return await future
+
+    def _flush_pending(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._flush(batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch: list):
+        # The lock is FIFO, so batches commit in the order they were formed
+        async with self._lock:
+            try:
+                self._resolve(batch, await self._commit(batch))
+                return
+            except IntegrityError as e:
+                if len(batch) == 1:
+                    self._fail(batch, e)
+                    return
+            except Exception as e:
+                logger.error("Group commit of %s messages failed: %s", len(batch), e)
+                self._fail(batch, e)
+                return
+
+            for item in batch:
+                try:
+                    self._resolve([item], await self._commit([item]))
+                except Exception as e:
+                    self._fail([item], e)
+
+    async def _commit(self, batch: list) -> list:
+        async with AsyncSessionLocal() as db:
+            results = await self._insert(db, [row for row, _ in batch])
+            await db.commit()
+        self.batches += 1
+        self.messages += sum(not duplicate for _, duplicate in results)
+        return results
+
+    async def _insert(self, db: AsyncSession, rows: list) -> list:
+        # Retries of a stored client id resolve to the stored message
+        keys = [(row["sender_id"], row["client_id"]) for row in rows if row["client_id"]]
+        known = {}
+        if keys:
+            stored = await db.scalars(
+                select(Message).where(tuple_(Message.sender_id, Message.client_id).in_(keys))
+            )
+            known = {(message.sender_id, message.client_id): message for message in stored}
+
+        results = []
+        new_rows = []
+        for row in rows:
+            key = (row["sender_id"], row["client_id"])
+            if row["client_id"] and key in known:
+                results.append((known[key], True))
+                continue
+            message = Message(**row)
+            if row["client_id"]:
+                known[key] = message
+            new_rows.append(row)
+            results.append((message, False))
+        if not new_rows:
+            return results
+
+        await db.execute(insert(Message).values(new_rows))
+
+        by_chat = defaultdict(list)
+        for message, duplicate in results:
+            if not duplicate:
+                by_chat[message.chat_id].append(message)
+        chats = await db.scalars(select(Chat).where(Chat.id.in_(list(by_chat))))
+        for chat in chats:
+            record_messages_sent(chat, by_chat[chat.id])
+        return results
+
+    @staticmethod
+    def _resolve(batch: list, results: list):
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    @staticmethod
+    def _fail(batch: list, error: Exception):
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "messages": self.messages,
+            "average_batch": self.messages / self.batches if self.batches else 0.0,
+            "pending": len(self._pending),
+        }
+
+
+message_writer = MessageWriter(
+    window=config.MESSAGE_GROUP_COMMIT_WINDOW_MS / 1000,
+    max_batch=config.MESSAGE_GROUP_COMMIT_MAX_BATCH,
+)
+
+
+async def _write_individually(chat_id: str, sender_id: str, content: str):
+    # Baseline for the benchmark: one session and commit per message
+    async with AsyncSessionLocal() as db:
+        chat = await db.get(Chat, chat_id)
+        message = Message(content=content, chat_id=chat_id, sender_id=sender_id)
+        db.add(message)
+        await db.flush()
+        record_messages_sent(chat, [message])
+        await db.commit()
+        await db.refresh(message)
+
+
+async def benchmark(chat_id: str, total: int = 2000, concurrency: int = 200):
+    """Compare per-message commits with group commit on an existing chat.
+
+    Sends `total` messages with `concurrency` in flight at once and
+    reports messages per second for both writers. The messages are left
+    in the chat.
+    """
+    async with AsyncSessionLocal() as db:
+        chat = await db.get(Chat, chat_id)
+    if chat is None:
+        raise SystemExit(f"Chat {chat_id} not found")
+
+    async def run(write):
+        slots = asyncio.Semaphore(concurrency)
+
+        async def one(i: int):
+            async with slots:
+                await write(chat_id, chat.user1_id, f"benchmark message {i}")
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        return total / (time.perf_counter() - start)
+
+    individual = await run(_write_individually)
+    grouped = await run(message_writer.write)
+    logger.info("Per-message commit: %.0f messages/s", individual)
+    logger.info("Group commit:       %.0f messages/s (%s)", grouped, message_writer.stats())
+
+
+if __name__ == "__main__":
+    # python -m api.v1.services.message_writer <chat_id> [total] [concurrency]
+    # Models the relationships of Chat and Message refer to
+    import api.v1.models.notifications  # noqa: F401
+    import api.v1.models.reaction  # noqa: F401
+    import api.v1.models.user  # noqa: F401
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(benchmark(sys.argv[1], *(int(arg) for arg in sys.argv[2:4])))
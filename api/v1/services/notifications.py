@@ -1,10 +1,10 @@
 from fastapi import WebSocket, APIRouter
-from typing import Dict
+from api.utils.websocket import ConnectionManager
 
 ws_router = APIRouter()
 
-# To store active connections
-connected_clients: Dict[int, WebSocket] = {}
+# Notification sockets, keyed by user id
+notification_manager = ConnectionManager("user")
 
 
 @ws_router.websocket("/wss/notifications")
@@ -17,20 +17,18 @@ async def websocket_notifications(websocket: WebSocket):
     print(f"User ID received: {user_id}")
 
     # Add the user to the active connections
-    connected_clients[user_id] = websocket
+    await notification_manager.connect(user_id, websocket)
 
     try:
         while True:
             await websocket.receive_text()  # Keep the connection alive by receiving messages
+            notification_manager.touch(user_id, websocket)
     except Exception as e:
         print(f"Connection error: {e}")
     finally:
-        connected_clients.pop(user_id, None)
-        await websocket.close()
+        notification_manager.disconnect(user_id, websocket)
 
 
 async def send_real_time_notification(user_id: str, message: str):
-    """Send a real-time notification via WebSocket if the user is connected."""
-    if user_id in connected_clients:
-        websocket = connected_clients[user_id]
-        await websocket.send_text(message)
+    """Send a real-time notification to the user's sockets, on whichever worker holds them."""
+    await notification_manager.broadcast(user_id, message)
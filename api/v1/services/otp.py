@@ -1,11 +1,13 @@
 import random
 from datetime import datetime, timedelta
 from api.v1.models.user import User
-from sqlalchemy.orm import Session
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from api.db.session import AsyncSessionLocal
 from api.utils.fast_email import send_email
 
 class OtpService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
     
     async def create_and_send_otp(self, user):
@@ -16,13 +18,13 @@ class OtpService:
         user.otp_expiry = expiry
         user.otp_invalid = False  # Reset otp_invalid to False when a new OTP is generated
         self.db.add(user)
-        self.db.commit()
+        await self.db.commit()
         
         await self.send_otp_via_email(user.email, otp)  # Await the send_email function
         return otp
     
-    def verify_otp(self, user_id: int, otp: int):
-        user = self.db.query(User).filter(User.id == user_id).first()
+    async def verify_otp(self, user_id: int, otp: int):
+        user = await self.db.get(User, user_id)
 
         if not user:
             return False  # User not found
@@ -36,7 +38,7 @@ class OtpService:
         # Mark OTP as invalid after successful verification
         user.otp_invalid = True
         self.db.add(user)
-        self.db.commit()
+        await self.db.commit()
         return True
     
     async def send_otp_via_email(self, email, otp):
@@ -46,11 +48,14 @@ class OtpService:
         # Call the utility function to send the email
         await send_email(email, subject, body)
 
-    def clear_expired_otps(self, db: Session):
+    @staticmethod
+    async def clear_expired_otps():
         """Set otp_invalid to True for all users with expired OTPs."""
-        now = datetime.now()
-        expired_users = db.query(User).filter(User.otp_expiry < now, User.otp_invalid == False).all()
-        for user in expired_users:
-            user.otp_invalid = True
-            db.add(user)
-        db.commit()
+        # Runs as a background task, after the request's session is closed
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(User)
+                .where(User.otp_expiry < datetime.now(), User.otp_invalid == False)
+                .values(otp_invalid=True)
+            )
+            await db.commit()
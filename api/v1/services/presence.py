@@ -0,0 +1,193 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import delete, exists, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from api.core.config import config
+from api.db.session import AsyncSessionLocal
+from api.v1.models.contact import Contact
+from api.v1.models.presence import UserPresence
+from api.v1.models.user import User
+from api.utils.presence import PresenceTracker, presence
+from api.v1.services.notifications import notification_manager
+
+HEARTBEAT_BATCH_SIZE = 500
+
+logger = logging.getLogger(__name__)
+
+
+def is_online(user: User) -> bool:
+    """Whether `user` has a live socket on any worker.
+
+    Sockets on this worker are answered from memory. Otherwise the stored
+    flag counts only while some worker keeps refreshing `last_seen`, so users
+    of a worker that died are offline even before their rows are expired.
+    """
+    if presence.is_online(user.id):
+        return True
+    if not user.is_online or user.last_seen is None:
+        return False
+    return datetime.utcnow() - user.last_seen < timedelta(seconds=config.PRESENCE_STALE_SECONDS)
+
+
+def _batches(user_ids: list):
+    for start in range(0, len(user_ids), HEARTBEAT_BATCH_SIZE):
+        yield user_ids[start : start + HEARTBEAT_BATCH_SIZE]
+
+
+async def _present(db: AsyncSession, user_ids: list, other_than: str = None) -> set:
+    # Users among `user_ids` with a presence row, optionally on a worker other than `other_than`
+    present = set()
+    for batch in _batches(user_ids):
+        query = select(UserPresence.user_id).where(UserPresence.user_id.in_(batch))
+        if other_than is not None:
+            query = query.where(UserPresence.worker_id != other_than)
+        present.update(await db.scalars(query.distinct()))
+    return present
+
+
+async def _sync_worker_rows(db: AsyncSession, tracker: PresenceTracker, now: datetime):
+    """Make this worker's rows match its sockets; returns `(added, removed)` user ids."""
+    worker_id = tracker.worker_id
+    stored = set(await db.scalars(select(UserPresence.user_id).where(UserPresence.worker_id == worker_id)))
+    online = set(tracker.online_users())
+    added, removed = list(online - stored), list(stored - online)
+
+    await db.execute(
+        update(UserPresence).where(UserPresence.worker_id == worker_id).values(last_seen=now)
+    )
+    for batch in _batches(removed):
+        await db.execute(
+            delete(UserPresence).where(
+                UserPresence.worker_id == worker_id, UserPresence.user_id.in_(batch)
+            )
+        )
+    if added:
+        await db.execute(
+            insert(UserPresence),
+            [{"user_id": user_id, "worker_id": worker_id, "last_seen": now} for user_id in added],
+        )
+    return added, removed
+
+
+async def _expire_stale(db: AsyncSession, now: datetime) -> list:
+    # Rows of workers that stopped flushing, e.g. because they crashed
+    result = await db.execute(
+        delete(UserPresence)
+        .where(UserPresence.last_seen < now - timedelta(seconds=config.PRESENCE_STALE_SECONDS))
+        .returning(UserPresence.user_id)
+    )
+    return list(set(result.scalars()))
+
+
+async def flush_presence(db: AsyncSession, tracker: PresenceTracker) -> list:
+    """Persist this worker's presence and expire that of dead workers.
+
+    Each worker owns one user_presence row per connected user. A flush
+    diffs those rows against the sockets held here and refreshes their
+    `last_seen`, then deletes every worker's rows that were not refreshed
+    within PRESENCE_STALE_SECONDS, so a crashed worker's users go offline
+    once any live worker flushes. `users.is_online` and `last_seen` are
+    kept in step for payloads. Returns `{"user_id", "online", "last_seen"}`
+    for users whose presence changed across all workers.
+    """
+    now = datetime.utcnow()
+    added, removed = await _sync_worker_rows(db, tracker, now)
+    expired = await _expire_stale(db, now)
+
+    elsewhere = await _present(db, added, other_than=tracker.worker_id)
+    came_online = [user_id for user_id in added if user_id not in elsewhere]
+    candidates = list(set(removed) | set(expired))
+    remaining = await _present(db, candidates)
+    went_offline = [user_id for user_id in candidates if user_id not in remaining]
+
+    # Also re-asserts the flag of users a concurrent flush marked offline
+    for batch in _batches(tracker.online_users()):
+        await db.execute(
+            update(User)
+            .where(User.id.in_(batch))
+            .values(is_online=True, last_seen=now)
+            .execution_options(synchronize_session=False)
+        )
+    for batch in _batches(went_offline):
+        await db.execute(
+            update(User)
+            .where(
+                User.id.in_(batch),
+                ~exists().where(UserPresence.user_id == User.id),
+            )
+            .values(is_online=False, last_seen=now)
+            .execution_options(synchronize_session=False)
+        )
+    await db.commit()
+
+    return [{"user_id": user_id, "online": True, "last_seen": now} for user_id in came_online] + [
+        {"user_id": user_id, "online": False, "last_seen": now} for user_id in went_offline
+    ]
+
+
+async def notify_contacts(db: AsyncSession, changes: list):
+    """Send each connected contact one `presence` event covering all of `changes`."""
+    by_user = {change["user_id"]: change for change in changes}
+    rows = await db.execute(
+        select(Contact.contact_id, Contact.user_id)
+        .where(
+            Contact.user_id.in_(by_user),
+            Contact.is_blocked.is_(False),
+            Contact.contact_id.in_(select(UserPresence.user_id)),
+        )
+    )
+    diffs = {}
+    for watcher_id, user_id in rows:
+        diffs.setdefault(watcher_id, []).append(by_user[user_id])
+
+    for watcher_id, diff in diffs.items():
+        await notification_manager.broadcast(
+            watcher_id,
+            {
+                "type": "presence",
+                "changes": [
+                    {**change, "last_seen": change["last_seen"].isoformat()} for change in diff
+                ],
+            },
+        )
+
+
+class PresenceFlusher:
+    """Write presence to the database every `interval` seconds instead of per event."""
+
+    def __init__(self, tracker: PresenceTracker, interval: float):
+        self.tracker = tracker
+        self.interval = interval
+        self.flushes = 0
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        # Remove this worker's rows for everyone it still holds
+        self.tracker.clear()
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    async def flush(self):
+        try:
+            async with AsyncSessionLocal() as db:
+                changes = await flush_presence(db, self.tracker)
+                if changes:
+                    await notify_contacts(db, changes)
+        except Exception as e:
+            logger.error("Presence flush failed: %s", e)
+            return
+        self.flushes += 1
+
+
+presence_flusher = PresenceFlusher(presence, config.PRESENCE_FLUSH_SECONDS)
@@ -0,0 +1,128 @@
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from api.core.config import config
+from api.db.session import AsyncSessionLocal
+from api.v1.models.chat import Chat
+from api.v1.models.message import Message
+from api.v1.services.chat_summary import (
+    delivered_watermark,
+    mark_delivered_up_to,
+    mark_read_up_to,
+    read_watermark,
+)
+from api.utils.websocket import manager
+
+DELIVERED = "delivered"
+READ = "read"
+RECEIPT_KINDS = (DELIVERED, READ)
+
+logger = logging.getLogger(__name__)
+
+
+def _watermark_id(watermark) -> Optional[str]:
+    return watermark[1] if watermark else None
+
+
+def receipts_event(chat: Chat, user_ids: list) -> dict:
+    """Current delivery and read watermarks of `user_ids` in `chat`."""
+    return {
+        "type": "receipts",
+        "chat_id": chat.id,
+        "receipts": [
+            {
+                "user_id": user_id,
+                "delivered_up_to": _watermark_id(delivered_watermark(chat, user_id)),
+                "read_up_to": _watermark_id(read_watermark(chat, user_id)),
+            }
+            for user_id in user_ids
+        ],
+    }
+
+
+async def apply_receipts(db: AsyncSession, chat_id: str, pending: dict) -> Optional[dict]:
+    """Apply coalesced acks `{(user_id, kind): {message_id, ...}}` to one chat.
+
+    Each participant's watermark moves to the newest acked message of the
+    chat, in one update and one commit. Returns the event to broadcast,
+    or None when no watermark moved.
+    """
+    chat = await db.get(Chat, chat_id)
+    if chat is None:
+        return None
+
+    message_ids = set().union(*pending.values())
+    messages = {
+        message.id: message
+        for message in await db.scalars(
+            select(Message).where(Message.chat_id == chat_id, Message.id.in_(message_ids))
+        )
+    }
+
+    updated = []
+    for (user_id, kind), acked_ids in pending.items():
+        acked = [messages[message_id] for message_id in acked_ids if message_id in messages]
+        if not acked or user_id not in (chat.user1_id, chat.user2_id):
+            continue
+        newest = max(acked, key=lambda message: (message.timestamp, message.id))
+        if kind == READ:
+            moved = await mark_read_up_to(db, chat, user_id, newest)
+        else:
+            moved = mark_delivered_up_to(chat, user_id, newest)
+        if moved and user_id not in updated:
+            updated.append(user_id)
+
+    if not updated:
+        return None
+    await db.commit()
+    return receipts_event(chat, updated)
+
+
+class ReceiptBatcher:
+    """Coalesce delivery and read acks per chat.
+
+    Acks for a chat arriving within `window` seconds of its first pending
+    one are applied together, so a burst of receipts costs one chat update,
+    one commit and one `receipts` event however many messages it covers.
+    """
+
+    def __init__(self, window: float):
+        self.window = window
+        self.acks = 0
+        self.flushes = 0
+        self._pending = {}
+        self._timers = {}
+        self._flushes = set()
+
+    def ack(self, chat_id: str, user_id: str, kind: str, message_id: str):
+        pending = self._pending.setdefault(chat_id, defaultdict(set))
+        pending[(user_id, kind)].add(message_id)
+        self.acks += 1
+        if chat_id not in self._timers:
+            loop = asyncio.get_running_loop()
+            self._timers[chat_id] = loop.call_later(self.window, self._flush, chat_id)
+
+    def _flush(self, chat_id: str):
+        self._timers.pop(chat_id, None)
+        pending = self._pending.pop(chat_id, None)
+        if pending:
+            task = asyncio.create_task(self._apply(chat_id, pending))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _apply(self, chat_id: str, pending: dict):
+        try:
+            async with AsyncSessionLocal() as db:
+                event = await apply_receipts(db, chat_id, pending)
+        except Exception as e:
+            logger.error("Applying receipts for chat %s failed: %s", chat_id, e)
+            return
+        self.flushes += 1
+        if event:
+            await manager.broadcast(chat_id, event)
+
+
+receipt_batcher = ReceiptBatcher(config.RECEIPT_BATCH_WINDOW_MS / 1000)
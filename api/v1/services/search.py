@@ -0,0 +1,131 @@
+from typing import Optional
+from sqlalchemy import column, func, literal, literal_column, select, table, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from api.v1.models.chat import Chat
+from api.v1.models.message import Message
+from api.utils.pagination import encode_cursor, decode_cursor
+
+# Chat content is multilingual, so no language-specific stemming
+SEARCH_CONFIG = "simple"
+SNIPPET_START = "<mark>"
+SNIPPET_STOP = "</mark>"
+
+# Full-text index built by migration 0005: on PostgreSQL a GIN expression
+# index over exactly this expression, on SQLite the messages_fts FTS5 table
+SEARCH_VECTOR = func.to_tsvector(literal_column(f"'{SEARCH_CONFIG}'"), Message.content)
+messages_fts = table("messages_fts", column("rowid"), column("content"))
+
+
+def _fts5_query(keyword: str) -> str:
+    # Quote every term so user input cannot inject FTS5 query syntax
+    return " ".join('"%s"' % term.replace('"', '""') for term in keyword.split())
+
+
+def _matches(dialect: str, keyword: str, *columns):
+    """Select `columns` over messages matching `keyword`, plus the rank expression.
+
+    Extra columns that only make sense inside the match itself (SQLite's
+    snippet()) are added here; callers add participant and paging filters.
+    """
+    if dialect == "postgresql":
+        tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, keyword)
+        rank = func.ts_rank_cd(SEARCH_VECTOR, tsquery)
+        query = select(*columns, rank.label("rank")).where(SEARCH_VECTOR.op("@@")(tsquery))
+    elif dialect == "sqlite":
+        fts = literal_column("messages_fts")
+        rank = -func.bm25(fts)
+        # snippet() is only valid inside the FTS query itself
+        snippet = func.snippet(fts, 0, SNIPPET_START, SNIPPET_STOP, "…", 12)
+        query = (
+            select(*columns, rank.label("rank"), snippet.label("snippet"))
+            .select_from(messages_fts)
+            .join(Message, literal_column("messages.rowid") == messages_fts.c.rowid)
+            .where(fts.op("MATCH")(_fts5_query(keyword)))
+        )
+    else:
+        rank = literal(0.0)
+        query = select(*columns, rank.label("rank")).where(Message.content.ilike(f"%{keyword}%"))
+    return query, rank
+
+
+def _participant_filter(user_id: str, chat_id: Optional[str]):
+    chat_filter = (Chat.user1_id == user_id) | (Chat.user2_id == user_id)
+    if chat_id:
+        chat_filter = chat_filter & (Message.chat_id == chat_id)
+    return chat_filter
+
+
+async def full_text_search(
+    db: AsyncSession,
+    user_id: str,
+    keyword: str,
+    chat_id: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = 20,
+):
+    """Full-text search over the messages of chats `user_id` participates in.
+
+    Results are ordered by relevance (then id for ties) and paged with a
+    keyset cursor over (rank, id). Returns `(hits, next_cursor)` where each
+    hit is a `(message, rank, snippet)` tuple.
+    """
+    if not keyword.split():
+        # Nothing to match; an empty FTS5 query is an error
+        return [], None
+
+    dialect = db.get_bind().dialect.name
+
+    hits, rank = _matches(dialect, keyword, Message.id)
+    hits = hits.join(Chat, Chat.id == Message.chat_id).where(
+        _participant_filter(user_id, chat_id)
+    )
+    if cursor:
+        cursor_rank, cursor_id = decode_cursor(cursor, 2)
+        hits = hits.where(tuple_(rank, Message.id) < tuple_(cursor_rank, cursor_id))
+    hits = hits.order_by(rank.desc(), Message.id.desc()).limit(limit + 1).subquery()
+
+    if dialect == "postgresql":
+        # Headlines are expensive, so only build them for the rows on this page
+        snippet = func.ts_headline(
+            SEARCH_CONFIG,
+            Message.content,
+            func.websearch_to_tsquery(SEARCH_CONFIG, keyword),
+            f"StartSel={SNIPPET_START}, StopSel={SNIPPET_STOP}, MaxWords=20, MinWords=5",
+        )
+    elif dialect == "sqlite":
+        snippet = hits.c.snippet
+    else:
+        snippet = Message.content
+
+    result = await db.execute(
+        select(Message, hits.c.rank, snippet)
+        .join(hits, hits.c.id == Message.id)
+        .order_by(hits.c.rank.desc(), Message.id.desc())
+    )
+    rows = result.all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_message, last_rank, _ = rows[-1]
+        next_cursor = encode_cursor(last_rank, last_message.id)
+
+    return rows, next_cursor
+
+
+async def count_matches_per_chat(db: AsyncSession, user_id: str, keyword: str, chat_ids: list) -> dict:
+    """Total number of messages matching `keyword` in each of `chat_ids`."""
+    if not chat_ids or not keyword.split():
+        return {}
+
+    dialect = db.get_bind().dialect.name
+    matches, _ = _matches(dialect, keyword, Message.chat_id, Message.id)
+    matches = (
+        matches.join(Chat, Chat.id == Message.chat_id)
+        .where(_participant_filter(user_id, None), Message.chat_id.in_(chat_ids))
+        .subquery()
+    )
+    result = await db.execute(
+        select(matches.c.chat_id, func.count(matches.c.id)).group_by(matches.c.chat_id)
+    )
+    return dict(result.all())
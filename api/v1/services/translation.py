@@ -0,0 +1,230 @@
+import asyncio
+import hashlib
+import json
+import logging
+from collections import OrderedDict, defaultdict
+from typing import Optional
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from api.core.config import config
+from api.db.session import AsyncSessionLocal
+from api.v1.models.message import Message
+from api.v1.models.translation import Translation
+from api.utils.websocket import manager
+from api.utils.translator import TranslationError, translator
+
+# Misses translated concurrently by a single bulk request
+BULK_TRANSLATE_FAN_OUT = 8
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class TranslationCache:
+    """Two-tier cache of translations keyed by (content hash, target language).
+
+    The first tier is an in-process LRU; the second is the `translations`
+    table, shared by every worker and surviving restarts. Entries found in
+    the database are promoted into the LRU.
+
+    Entries are keyed by content, so they never go stale: editing a message
+    changes its hash, and the old entries stay valid for other messages
+    with the same text.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+    def _remember(self, key, translated: str):
+        self._entries[key] = translated
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get(self, db: AsyncSession, content: str, target_language: str) -> Optional[str]:
+        key = (content_hash(content), target_language)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.memory_hits += 1
+            return self._entries[key]
+
+        row = await db.scalar(
+            select(Translation).where(
+                Translation.content_hash == key[0],
+                Translation.target_language == target_language,
+            )
+        )
+        if row:
+            self.db_hits += 1
+            self._remember(key, row.translated_text)
+            return row.translated_text
+
+        self.misses += 1
+        return None
+
+    async def get_many(self, db: AsyncSession, contents: list, target_language: str) -> dict:
+        """Look up several contents at once; one query covers all LRU misses."""
+        found = {}
+        missing = {}
+        for content in contents:
+            key = (content_hash(content), target_language)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                found[content] = self._entries[key]
+            else:
+                missing[key[0]] = content
+
+        if missing:
+            rows = await db.scalars(
+                select(Translation).where(
+                    Translation.content_hash.in_(list(missing)),
+                    Translation.target_language == target_language,
+                )
+            )
+            for row in rows:
+                content = missing.pop(row.content_hash)
+                self.db_hits += 1
+                self._remember((row.content_hash, target_language), row.translated_text)
+                found[content] = row.translated_text
+            self.misses += len(missing)
+
+        return found
+
+    async def set(self, db: AsyncSession, content: str, target_language: str, translated: str):
+        key = (content_hash(content), target_language)
+        self._remember(key, translated)
+        try:
+            # Another request may have stored the same translation concurrently
+            async with db.begin_nested():
+                db.add(
+                    Translation(
+                        content_hash=key[0],
+                        target_language=target_language,
+                        translated_text=translated,
+                    )
+                )
+        except IntegrityError:
+            pass
+        await db.commit()
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.db_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "hit_ratio": (self.memory_hits + self.db_hits) / lookups if lookups else 0.0,
+        }
+
+
+translation_cache = TranslationCache(config.TRANSLATION_CACHE_SIZE)
+
+
+async def translate_text(db: AsyncSession, content: str, target_language: str) -> str:
+    """Translate `content`, going to the translation backend only on a cache miss.
+
+    Raises `TranslationError` when the backend times out, fails or is
+    short-circuited.
+    """
+    translated = await translation_cache.get(db, content, target_language)
+    if translated is None:
+        translated = await translator.translate(content, target_language)
+        await translation_cache.set(db, content, target_language, translated)
+    return translated
+
+
+def _result_line(message_id: str, target_language: str, translated=None, cached=False, error=None) -> str:
+    result = {"message_id": message_id, "target_language": target_language}
+    if error is None:
+        result.update(translated_message=translated, cached=cached)
+    else:
+        result["error"] = str(error)
+    return json.dumps(result) + "\n"
+
+
+async def bulk_translate(db: AsyncSession, messages: list, target_language: str):
+    """Translate a batch of messages, returning an async stream of NDJSON lines.
+
+    Identical contents are translated once. Cache hits (resolved here, in a
+    single lookup) are streamed first; misses are then translated with a
+    bounded fan-out and streamed as each one completes.
+    """
+    ids_by_content = defaultdict(list)
+    for message in messages:
+        ids_by_content[message.content].append(message.id)
+    cached = await translation_cache.get_many(db, list(ids_by_content), target_language)
+    return _stream_translations(ids_by_content, cached, target_language)
+
+
+async def _stream_translations(ids_by_content: dict, cached: dict, target_language: str):
+    for content, translated in cached.items():
+        for message_id in ids_by_content[content]:
+            yield _result_line(message_id, target_language, translated, cached=True)
+
+    misses = [content for content in ids_by_content if content not in cached]
+    if not misses:
+        return
+
+    fan_out = asyncio.Semaphore(BULK_TRANSLATE_FAN_OUT)
+
+    async def translate_one(content: str):
+        async with fan_out:
+            try:
+                return content, await translator.translate(content, target_language), None
+            except TranslationError as e:
+                return content, None, e
+
+    tasks = [asyncio.ensure_future(translate_one(content)) for content in misses]
+    try:
+        # The request's session is gone once streaming starts, so use our own
+        async with AsyncSessionLocal() as db:
+            for next_done in asyncio.as_completed(tasks):
+                content, translated, error = await next_done
+                if error is None:
+                    await translation_cache.set(db, content, target_language, translated)
+                for message_id in ids_by_content[content]:
+                    yield _result_line(message_id, target_language, translated, error=error)
+    finally:
+        # Stop outstanding work if the client went away mid-stream
+        for task in tasks:
+            task.cancel()
+
+
+async def auto_translate_and_broadcast(message_payload: dict, target_language: str):
+    """Background stage for chats where the recipient set a preferred language.
+
+    The message is translated once (through the cache), the translation is
+    stored on the message and the broadcast carries it, so recipients never
+    trigger a translation when reading. Whatever goes wrong with the
+    translation, the message is still delivered, untranslated.
+    """
+    message = message_payload["message"]
+    try:
+        async with AsyncSessionLocal() as db:
+            translated = await translate_text(db, message["content"], target_language)
+            await db.execute(
+                update(Message)
+                .where(Message.id == message["id"], Message.content == message["content"])
+                .values(translation=translated, translation_language=target_language)
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+        message["translation"] = translated
+        message["translation_language"] = target_language
+    except TranslationError as e:
+        logger.warning("Auto-translation failed for message %s: %s", message["id"], e)
+    except Exception:
+        logger.exception("Auto-translation failed for message %s", message["id"])
+
+    await manager.broadcast(message_payload["chat_id"], message_payload)
@@ -1,4 +1,5 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException
 from fastapi.responses import JSONResponse
 from api.v1.models.user import User
@@ -8,17 +9,18 @@ import logging
 
 
 class UserService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def create_user(self, user: UserCreate):
+    async def create_user(self, user: UserCreate):
         logging.info(
             "Creating user with email: %s and username: %s", user.email, user.username
         )
 
-        db_user = (
-            self.db.query(User).filter(User.email == user.email).first()
-            or self.db.query(User).filter(User.username == user.username).first()
+        db_user = await self.db.scalar(
+            select(User)
+            .where((User.email == user.email) | (User.username == user.username))
+            .limit(1)
         )
 
         if db_user:
@@ -54,43 +56,43 @@ class UserService:
         )
 # 220811324
         self.db.add(db_user)
-        self.db.commit()
-        self.db.refresh(db_user)
+        await self.db.commit()
+        await self.db.refresh(db_user)
         return db_user
 
     # Get user by email or username
-    def get_user_by_email_or_username(self, email_or_username: str):
-        return (
-            self.db.query(User)
-            .filter(
+    async def get_user_by_email_or_username(self, email_or_username: str):
+        return await self.db.scalar(
+            select(User)
+            .where(
                 (User.email == email_or_username) | (User.username == email_or_username)
             )
-            .first()
+            .limit(1)
         )
 
     # Get user by email
-    def get_user_by_email(self, email: str):
-        return self.db.query(User).filter(User.email == email).first()
+    async def get_user_by_email(self, email: str):
+        return await self.db.scalar(select(User).where(User.email == email))
 
     # Get user by ID
-    def get_user_by_id(self, user_id: int):
-        return self.db.query(User).filter(User.id == user_id).first()
+    async def get_user_by_id(self, user_id: int):
+        return await self.db.get(User, user_id)
 
     # Get user by various details
-    def get_user_by_detail(self, identifier: str):
-        return (
-            self.db.query(User)
-            .filter(
+    async def get_user_by_detail(self, identifier: str):
+        return await self.db.scalar(
+            select(User)
+            .where(
                 (User.email == identifier)
                 | (User.username == identifier)
                 | (User.id == identifier)
                 | (User.phone_number == identifier)
             )
-            .first()
+            .limit(1)
         )
 
     # Update password
-    def update_password(self, user, new_password: str):
+    async def update_password(self, user, new_password: str):
         user.hashed_password = get_password_hash(new_password)
-        self.db.commit()
+        await self.db.commit()
         return user
@@ -27,6 +27,7 @@ logging.basicConfig(
 
 import os
 import logging
+from anyio.to_thread import current_default_thread_limiter
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
@@ -37,9 +38,15 @@ from slowapi.errors import RateLimitExceeded
 from slowapi.middleware import SlowAPIMiddleware
 from api.v1.routes import api_version_one
 from user_geo import geo_router
-from api.db.session import engine, Base
+from api.db.session import record_write, replica_engine
 from api.utils.settings import SECRET_KEY
+from api.core.config import config
 from api.v1.services.notifications import ws_router
+from api.utils.translator import translator
+from api.utils.backplane import PostgresBackplane, backplane
+from api.utils.recent_writes import recent_writes
+from api.utils.user import token_user_id
+from api.v1.services.presence import presence_flusher
 
 
 # Create FastAPI application
@@ -73,8 +80,26 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Message history paging cursors
+    expose_headers=["X-Older-Cursor", "X-Newer-Cursor"],
 )
 
+# Keep a user's reads on the primary for a short window after they write,
+# so they always see their own changes even if the replica lags
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    # Read by get_read_db; routes still authenticate the token themselves
+    request.state.user_id = token_user_id(request.headers.get("authorization"))
+    response = await call_next(request)
+    if (
+        request.state.user_id
+        and request.method not in ("GET", "HEAD", "OPTIONS")
+        and response.status_code < 400
+    ):
+        await record_write(request.state.user_id)
+    return response
+
+
 # Add session middleware
 app.add_middleware(SessionMiddleware, secret_key=SECRET_KEY)
 
@@ -92,7 +117,43 @@ async def root(request: Request):
     return {"message": "Hello World"}
 
 
-# Event to create database tables
+# The schema is managed by Alembic: run `alembic upgrade head` before starting
+@app.on_event("startup")
+async def on_startup():
+    # Threads for sync dependencies and run_in_threadpool; the async database
+    # pool does not use them, so this is sized independently of it
+    current_default_thread_limiter().total_tokens = config.THREADPOOL_LIMIT
+
+
+@app.on_event("startup")
+async def start_presence():
+    presence_flusher.start()
+
+
+@app.on_event("shutdown")
+async def stop_presence():
+    # Before the backplane stops, so the final presence diffs still fan out
+    await presence_flusher.stop()
+
+
+@app.on_event("startup")
+async def start_backplane():
+    if replica_engine is not None and backplane.name != PostgresBackplane.name:
+        # Otherwise a user's next read on another worker could hit a lagging replica
+        raise RuntimeError("DATABASE_REPLICA_URL requires BACKPLANE=postgres")
+    await backplane.start()
+    if replica_engine is not None:
+        await recent_writes.start()
+
+
+@app.on_event("shutdown")
+async def stop_backplane():
+    await backplane.stop()
+
+
 @app.on_event("startup")
-def on_startup():
-    Base.metadata.create_all(bind=engine)
+async def warm_up_translator():
+    try:
+        await translator.warm_up()
+    except Exception as e:
+        logging.warning(f"Translator warm-up failed: {e}")
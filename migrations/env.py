@@ -0,0 +1,52 @@
+from logging.config import fileConfig
+from alembic import context
+from sqlalchemy import engine_from_config, pool
+from api.db.session import SQLALCHEMY_DATABASE_URL, Base
+
+# Register every model on Base.metadata
+import api.v1.models.chat  # noqa: F401
+import api.v1.models.contact  # noqa: F401
+import api.v1.models.message  # noqa: F401
+import api.v1.models.notifications  # noqa: F401
+import api.v1.models.presence  # noqa: F401
+import api.v1.models.reaction  # noqa: F401
+import api.v1.models.translation  # noqa: F401
+import api.v1.models.user  # noqa: F401
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+# An explicit URL (e.g. from tests) wins over DATABASE_URL
+url = config.get_main_option("sqlalchemy.url") or SQLALCHEMY_DATABASE_URL
+target_metadata = Base.metadata
+
+
+def run_migrations_offline():
+    context.configure(
+        url=url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    connectable = engine_from_config(
+        {"sqlalchemy.url": url}, prefix="sqlalchemy.", poolclass=pool.NullPool
+    )
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
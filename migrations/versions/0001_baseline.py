@@ -0,0 +1,153 @@
+"""Baseline schema: the tables as they were created by create_all
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+
+Databases created by the application before migrations existed already
+have these tables; each one is only created when missing, so
+`alembic upgrade head` works on both fresh and existing databases.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _create_users():
+    op.create_table(
+        "users",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("username", sa.String(), nullable=False),
+        sa.Column("hashed_password", sa.String(), nullable=True),
+        sa.Column("bio", sa.String(), nullable=True),
+        sa.Column("dpUrl", sa.String(), nullable=True),
+        sa.Column("phone_number", sa.String(), nullable=True),
+        sa.Column("date_of_birth", sa.DateTime(), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("is_verified", sa.Boolean(), nullable=True),
+        sa.Column("is_online", sa.Boolean(), nullable=True),
+        sa.Column("last_seen", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.Column("last_login", sa.DateTime(), nullable=True),
+        sa.Column("otp_code", sa.Integer(), nullable=True),
+        sa.Column("otp_expiry", sa.DateTime(), nullable=True),
+        sa.Column("otp_invalid", sa.Boolean(), nullable=True),
+        sa.Column("social_id", sa.String(), nullable=True, unique=True),
+        sa.Column("provider", sa.String(), nullable=True),
+        sa.Column("otp_secret", sa.String(), nullable=True),
+        sa.Column(
+            "backup_codes",
+            postgresql.ARRAY(sa.String()).with_variant(sa.JSON(), "sqlite"),
+            nullable=True,
+        ),
+        sa.Column("two_FA_enabled", sa.Boolean(), nullable=True),
+        sa.Column("otp_verified", sa.Boolean(), nullable=True),
+        sa.Column("last_otp_verified_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+    op.create_index("ix_users_username", "users", ["username"], unique=True)
+
+
+def _create_contacts():
+    op.create_table(
+        "contacts",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.String(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("contact_id", sa.String(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("is_blocked", sa.Boolean(), nullable=True),
+    )
+    op.create_index("ix_contacts_id", "contacts", ["id"])
+
+
+def _create_chats():
+    op.create_table(
+        "chats",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.Column("is_pinned", sa.Boolean(), nullable=True),
+        sa.Column("last_read", sa.DateTime(), nullable=True),
+        sa.Column("user1_id", sa.String(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("user2_id", sa.String(), sa.ForeignKey("users.id"), nullable=True),
+    )
+    op.create_index("ix_chats_id", "chats", ["id"])
+
+
+def _create_messages():
+    op.create_table(
+        "messages",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("content", sa.String(), nullable=False),
+        sa.Column("timestamp", sa.DateTime(), nullable=True),
+        sa.Column("status", sa.String(), nullable=True),
+        sa.Column("pinned", sa.Boolean(), nullable=True),
+        sa.Column("translation", sa.Text(), nullable=True),
+        sa.Column("detected_language", sa.String(), nullable=True),
+        sa.Column("chat_id", sa.String(), sa.ForeignKey("chats.id"), nullable=True),
+        sa.Column("sender_id", sa.String(), sa.ForeignKey("users.id"), nullable=True),
+    )
+    op.create_index("ix_messages_id", "messages", ["id"])
+
+
+def _create_reactions():
+    op.create_table(
+        "reactions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "message_id",
+            sa.String(),
+            sa.ForeignKey("messages.id", ondelete="CASCADE"),
+            nullable=True,
+        ),
+        sa.Column(
+            "user_id", sa.String(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=True
+        ),
+        sa.Column("reaction", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_reactions_id", "reactions", ["id"])
+
+
+def _create_notifications():
+    op.create_table(
+        "notifications",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("user_id", sa.String(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("message", sa.String(), nullable=False),
+        sa.Column("notification_type", sa.String(), nullable=False),
+        sa.Column("read", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_notifications_id", "notifications", ["id"])
+
+
+# In dependency order
+TABLES = [
+    ("users", _create_users),
+    ("contacts", _create_contacts),
+    ("chats", _create_chats),
+    ("messages", _create_messages),
+    ("reactions", _create_reactions),
+    ("notifications", _create_notifications),
+]
+
+
+def upgrade():
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    for name, create in TABLES:
+        if name not in existing:
+            create()
+
+
+def downgrade():
+    for name, _ in reversed(TABLES):
+        op.drop_table(name)
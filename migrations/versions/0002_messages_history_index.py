@@ -0,0 +1,34 @@
+"""Index messages on (chat_id, timestamp, id) for keyset pagination
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # CONCURRENTLY on PostgreSQL, so the build does not block writes to messages
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_messages_chat_id_timestamp_id",
+            "messages",
+            ["chat_id", "timestamp", "id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_messages_chat_id_timestamp_id",
+            table_name="messages",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,109 @@
+"""Add the per-chat activity summary and the inbox indexes
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+
+Existing chats are backfilled from their messages in batches, each in its
+own transaction, so chat rows are never locked for the whole run. Unread
+counts follow the per-message status that is still in use at this
+revision. Messages written by the previous release while it keeps
+serving during the deploy are folded in by
+`python -m api.v1.services.chat_summary` afterwards.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 1000
+PREVIEW_LENGTH = 100
+
+_BACKFILL = sa.text(
+    f"""
+    UPDATE chats SET
+        last_message_id = (
+            SELECT m.id FROM messages m WHERE m.chat_id = chats.id
+            ORDER BY m.timestamp DESC, m.id DESC LIMIT 1
+        ),
+        last_message_preview = (
+            SELECT substr(m.content, 1, {PREVIEW_LENGTH}) FROM messages m
+            WHERE m.chat_id = chats.id
+            ORDER BY m.timestamp DESC, m.id DESC LIMIT 1
+        ),
+        last_activity_at = coalesce(
+            (SELECT max(m.timestamp) FROM messages m WHERE m.chat_id = chats.id),
+            chats.created_at
+        ),
+        user1_unread_count = (
+            SELECT count(*) FROM messages m
+            WHERE m.chat_id = chats.id AND m.sender_id = chats.user2_id
+            AND coalesce(m.status, 'sent') <> 'read'
+        ),
+        user2_unread_count = (
+            SELECT count(*) FROM messages m
+            WHERE m.chat_id = chats.id AND m.sender_id = chats.user1_id
+            AND coalesce(m.status, 'sent') <> 'read'
+        )
+    WHERE chats.id IN (SELECT id FROM chats WHERE id > :after ORDER BY id LIMIT :limit)
+    """
+)
+_LAST_ID = sa.text("SELECT max(id) FROM (SELECT id FROM chats WHERE id > :after ORDER BY id LIMIT :limit) batch")
+
+INBOX_INDEXES = {
+    "ix_chats_user1_id_last_activity_at": "user1_id",
+    "ix_chats_user2_id_last_activity_at": "user2_id",
+}
+
+
+def upgrade():
+    op.add_column("chats", sa.Column("last_message_id", sa.String(), nullable=True))
+    op.add_column("chats", sa.Column("last_message_preview", sa.String(), nullable=True))
+    op.add_column("chats", sa.Column("last_activity_at", sa.DateTime(), nullable=True))
+    # Constant defaults: no table rewrite on PostgreSQL 11+
+    op.add_column(
+        "chats",
+        sa.Column("user1_unread_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.add_column(
+        "chats",
+        sa.Column("user2_unread_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+    bind = op.get_bind()
+    with op.get_context().autocommit_block():
+        after = ""
+        while True:
+            last_id = bind.execute(_LAST_ID, {"after": after, "limit": BACKFILL_BATCH_SIZE}).scalar()
+            if last_id is None:
+                break
+            bind.execute(_BACKFILL, {"after": after, "limit": BACKFILL_BATCH_SIZE})
+            after = last_id
+
+        for name, user_column in INBOX_INDEXES.items():
+            if bind.dialect.name == "postgresql":
+                op.execute(
+                    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} "
+                    f"ON chats ({user_column}, last_activity_at DESC NULLS LAST)"
+                )
+            else:
+                # No NULLS LAST in SQLite index definitions; DESC sorts NULLs last there
+                op.execute(
+                    f"CREATE INDEX IF NOT EXISTS {name} ON chats ({user_column}, last_activity_at DESC)"
+                )
+
+
+def downgrade():
+    for name in INBOX_INDEXES:
+        op.drop_index(name, table_name="chats", if_exists=True)
+    for column in (
+        "user2_unread_count",
+        "user1_unread_count",
+        "last_activity_at",
+        "last_message_preview",
+        "last_message_id",
+    ):
+        op.drop_column("chats", column)
@@ -0,0 +1,90 @@
+"""Replace per-message read status with per-participant read watermarks
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+
+Each participant's watermark is seeded from the newest message addressed
+to them that was marked read, and unread counters are recomputed from
+the watermarks. Chats are processed in batches and each statement
+commits on its own. `messages.status` is left in place for older clients.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+_BATCH = "chats.id IN (SELECT id FROM chats WHERE id > :after ORDER BY id LIMIT :limit)"
+_LAST_ID = sa.text(
+    "SELECT max(id) FROM (SELECT id FROM chats WHERE id > :after ORDER BY id LIMIT :limit) batch"
+)
+
+
+def _newest_read(column: str, sender_column: str) -> str:
+    # Newest message from the other participant marked read
+    return f"""(
+        SELECT m.{column} FROM messages m
+        WHERE m.chat_id = chats.id AND m.sender_id = chats.{sender_column} AND m.status = 'read'
+        ORDER BY m.timestamp DESC, m.id DESC LIMIT 1
+    )"""
+
+
+def _unread_after(slot: str, sender_column: str) -> str:
+    return f"""(
+        SELECT count(*) FROM messages m
+        WHERE m.chat_id = chats.id AND m.sender_id = chats.{sender_column} AND (
+            chats.{slot}_read_at IS NULL
+            OR m.timestamp > chats.{slot}_read_at
+            OR (m.timestamp = chats.{slot}_read_at AND m.id > chats.{slot}_read_message_id)
+        )
+    )"""
+
+
+_SEED_WATERMARKS = sa.text(
+    f"""
+    UPDATE chats SET
+        user1_read_at = {_newest_read("timestamp", "user2_id")},
+        user1_read_message_id = {_newest_read("id", "user2_id")},
+        user2_read_at = {_newest_read("timestamp", "user1_id")},
+        user2_read_message_id = {_newest_read("id", "user1_id")}
+    WHERE {_BATCH}
+    """
+)
+# A separate statement: SET expressions only see the row as it was before the update
+_RECOUNT_UNREAD = sa.text(
+    f"""
+    UPDATE chats SET
+        user1_unread_count = {_unread_after("user1", "user2_id")},
+        user2_unread_count = {_unread_after("user2", "user1_id")}
+    WHERE {_BATCH}
+    """
+)
+
+
+def upgrade():
+    for slot in ("user1", "user2"):
+        op.add_column("chats", sa.Column(f"{slot}_read_at", sa.DateTime(), nullable=True))
+        op.add_column("chats", sa.Column(f"{slot}_read_message_id", sa.String(), nullable=True))
+
+    bind = op.get_bind()
+    with op.get_context().autocommit_block():
+        after = ""
+        while True:
+            batch = {"after": after, "limit": BACKFILL_BATCH_SIZE}
+            last_id = bind.execute(_LAST_ID, batch).scalar()
+            if last_id is None:
+                break
+            bind.execute(_SEED_WATERMARKS, batch)
+            bind.execute(_RECOUNT_UNREAD, batch)
+            after = last_id
+
+
+def downgrade():
+    for slot in ("user2", "user1"):
+        op.drop_column("chats", f"{slot}_read_message_id")
+        op.drop_column("chats", f"{slot}_read_at")
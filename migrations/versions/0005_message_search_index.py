@@ -0,0 +1,71 @@
+"""Full-text search index over message content
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+
+PostgreSQL gets a GIN index on the `to_tsvector` expression the search
+queries use, built concurrently: there is no stored column, so the
+messages table is neither rewritten nor locked against writes. SQLite
+(local runs) gets an external-content FTS5 table kept in sync by triggers.
+"""
+from alembic import op
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+# Must match SEARCH_VECTOR in api.v1.services.search, or the index is not used
+SEARCH_CONFIG = "simple"
+
+_SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts
+    USING fts5(content, content='messages', content_rowid='rowid')
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS messages_fts_ai AFTER INSERT ON messages BEGIN
+        INSERT INTO messages_fts(rowid, content) VALUES (new.rowid, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS messages_fts_ad AFTER DELETE ON messages BEGIN
+        INSERT INTO messages_fts(messages_fts, rowid, content)
+        VALUES ('delete', old.rowid, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS messages_fts_au AFTER UPDATE OF content ON messages BEGIN
+        INSERT INTO messages_fts(messages_fts, rowid, content)
+        VALUES ('delete', old.rowid, old.content);
+        INSERT INTO messages_fts(rowid, content) VALUES (new.rowid, new.content);
+    END
+    """,
+    # Index the messages that already exist
+    "INSERT INTO messages_fts(messages_fts) VALUES ('rebuild')",
+]
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        with op.get_context().autocommit_block():
+            op.execute(
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_messages_content_tsvector "
+                f"ON messages USING GIN (to_tsvector('{SEARCH_CONFIG}', content))"
+            )
+    elif dialect == "sqlite":
+        for statement in _SQLITE_DDL:
+            op.execute(statement)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        with op.get_context().autocommit_block():
+            op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_messages_content_tsvector")
+    elif dialect == "sqlite":
+        for trigger in ("messages_fts_au", "messages_fts_ad", "messages_fts_ai"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS messages_fts")
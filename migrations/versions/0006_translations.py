@@ -0,0 +1,32 @@
+"""Persistent translation cache
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "translations",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("content_hash", sa.String(), nullable=False),
+        sa.Column("target_language", sa.String(), nullable=False),
+        sa.Column("translated_text", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.UniqueConstraint(
+            "content_hash", "target_language", name="uq_translations_hash_language"
+        ),
+    )
+    op.create_index("ix_translations_id", "translations", ["id"])
+
+
+def downgrade():
+    op.drop_table("translations")
@@ -0,0 +1,25 @@
+"""Per-participant preferred language and the language of stored translations
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("chats", sa.Column("user1_language", sa.String(), nullable=True))
+    op.add_column("chats", sa.Column("user2_language", sa.String(), nullable=True))
+    op.add_column("messages", sa.Column("translation_language", sa.String(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("messages", "translation_language")
+    op.drop_column("chats", "user2_language")
+    op.drop_column("chats", "user1_language")
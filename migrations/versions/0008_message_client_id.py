@@ -0,0 +1,44 @@
+"""Client-generated message ids for acknowledged, deduplicated sends
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+
+On PostgreSQL the unique index is built concurrently and then attached
+as the constraint, so writes to messages are only blocked for the final,
+instant ALTER. SQLite enforces the same uniqueness with a unique index.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+CONSTRAINT = "uq_messages_sender_id_client_id"
+
+
+def upgrade():
+    op.add_column("messages", sa.Column("client_id", sa.String(), nullable=True))
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.create_index(
+                CONSTRAINT,
+                "messages",
+                ["sender_id", "client_id"],
+                unique=True,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+        op.execute(f"ALTER TABLE messages ADD CONSTRAINT {CONSTRAINT} UNIQUE USING INDEX {CONSTRAINT}")
+    else:
+        op.create_index(CONSTRAINT, "messages", ["sender_id", "client_id"], unique=True)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        op.drop_constraint(CONSTRAINT, "messages", type_="unique")
+    else:
+        op.drop_index(CONSTRAINT, table_name="messages")
+    op.drop_column("messages", "client_id")
@@ -0,0 +1,68 @@
+"""Add per-participant delivery watermarks
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18
+
+Each participant's delivery watermark is seeded from the newest message
+addressed to them that was marked delivered or read, in batches of chats
+that each commit on their own.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+_LAST_ID = sa.text(
+    "SELECT max(id) FROM (SELECT id FROM chats WHERE id > :after ORDER BY id LIMIT :limit) batch"
+)
+
+
+def _newest_delivered(column: str, sender_column: str) -> str:
+    # Whatever has been read has been delivered
+    return f"""(
+        SELECT m.{column} FROM messages m
+        WHERE m.chat_id = chats.id AND m.sender_id = chats.{sender_column}
+        AND m.status IN ('delivered', 'read')
+        ORDER BY m.timestamp DESC, m.id DESC LIMIT 1
+    )"""
+
+
+_SEED_WATERMARKS = sa.text(
+    f"""
+    UPDATE chats SET
+        user1_delivered_at = {_newest_delivered("timestamp", "user2_id")},
+        user1_delivered_message_id = {_newest_delivered("id", "user2_id")},
+        user2_delivered_at = {_newest_delivered("timestamp", "user1_id")},
+        user2_delivered_message_id = {_newest_delivered("id", "user1_id")}
+    WHERE chats.id IN (SELECT id FROM chats WHERE id > :after ORDER BY id LIMIT :limit)
+    """
+)
+
+
+def upgrade():
+    for slot in ("user1", "user2"):
+        op.add_column("chats", sa.Column(f"{slot}_delivered_at", sa.DateTime(), nullable=True))
+        op.add_column("chats", sa.Column(f"{slot}_delivered_message_id", sa.String(), nullable=True))
+
+    bind = op.get_bind()
+    with op.get_context().autocommit_block():
+        after = ""
+        while True:
+            batch = {"after": after, "limit": BACKFILL_BATCH_SIZE}
+            last_id = bind.execute(_LAST_ID, batch).scalar()
+            if last_id is None:
+                break
+            bind.execute(_SEED_WATERMARKS, batch)
+            after = last_id
+
+
+def downgrade():
+    for slot in ("user2", "user1"):
+        op.drop_column("chats", f"{slot}_delivered_message_id")
+        op.drop_column("chats", f"{slot}_delivered_at")
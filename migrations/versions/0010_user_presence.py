@@ -0,0 +1,34 @@
+"""Per-worker presence rows
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18
+
+Workers add their connected users on their first flush after the upgrade.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "user_presence",
+        sa.Column(
+            "user_id",
+            sa.String(),
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("worker_id", sa.String(), primary_key=True),
+        sa.Column("last_seen", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_user_presence_last_seen", "user_presence", ["last_seen"])
+
+
+def downgrade():
+    op.drop_table("user_presence")
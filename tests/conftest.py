@@ -0,0 +1,120 @@
+import os
+import tempfile
+
+# Configuration is read at import time, so it has to be in place before the app is imported.
+# Tests run against a throwaway SQLite database unless TEST_DATABASE_URL points elsewhere.
+_db_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = os.environ.get(
+    "TEST_DATABASE_URL", f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+)
+for name, value in {
+    "SECRET_KEY": "test-secret",
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "60",
+    "APP_LOG_FILEPATH": os.path.join(_db_dir, "app.log"),
+    "EMAIL_HOST": "localhost",
+    "EMAIL_PORT": "587",
+    "EMAIL_USERNAME": "test",
+    "EMAIL_PASSWORD": "test",
+    "EMAIL_FROM": "test@example.com",
+    "GOOGLE_CLIENT_ID": "test",
+    "GOOGLE_CLIENT_SECRET": "test",
+    "GOOGLE_REDIRECT_URI": "http://localhost/google",
+    "GITHUB_CLIENT_ID": "test",
+    "GITHUB_CLIENT_SECRET": "test",
+    "GITHUB_REDIRECT_URI": "http://localhost/github",
+    "FACEBOOK_APP_ID": "test",
+    "FACEBOOK_APP_SECRET": "test",
+    "GEO_API_TOKEN": "test",
+    "TRANSLATION_BACKEND": "stub",
+}.items():
+    os.environ.setdefault(name, value)
+
+import uuid  # noqa: E402
+from contextlib import contextmanager  # noqa: E402
+
+import httpx  # noqa: E402
+import pytest  # noqa: E402
+import pytest_asyncio  # noqa: E402
+from alembic import command  # noqa: E402
+from alembic.config import Config as AlembicConfig  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from main import app  # noqa: E402
+from api.db.session import AsyncSessionLocal, Base, async_engine  # noqa: E402
+from api.utils.user import create_access_token  # noqa: E402
+from api.v1.models.user import User  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    config = AlembicConfig(os.path.join(ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(ROOT, "migrations"))
+    command.upgrade(config, "head")
+
+
+@pytest_asyncio.fixture
+async def db():
+    async with AsyncSessionLocal() as session:
+        yield session
+    # Every test starts from empty tables
+    async with async_engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            await conn.execute(table.delete())
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def fresh_pool():
+    # Pooled connections belong to the test's event loop, even when the
+    # code under test opened them without the `db` fixture
+    yield
+    await async_engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def client():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+@pytest.fixture
+def make_user(db):
+    async def make(**fields) -> User:
+        name = fields.pop("username", f"user-{uuid.uuid4().hex[:8]}")
+        user = User(username=name, email=f"{name}@example.com", **fields)
+        db.add(user)
+        await db.commit()
+        return user
+
+    return make
+
+
+@pytest.fixture
+def auth_headers():
+    def headers(user: User) -> dict:
+        return {"Authorization": f"Bearer {create_access_token(user.id)}"}
+
+    return headers
+
+
+@pytest.fixture
+def count_queries():
+    """Context manager collecting the statements sent to the database inside the block."""
+
+    @contextmanager
+    def counting():
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+    return counting
@@ -0,0 +1,35 @@
+import pytest
+
+from api.v1.services import translation
+from api.v1.services.translation import auto_translate_and_broadcast
+
+
+def _payload():
+    return {
+        "type": "new_message",
+        "chat_id": "chat-1",
+        "message": {"id": "message-1", "content": "bonjour"},
+    }
+
+
+@pytest.mark.asyncio
+async def test_message_is_broadcast_translated(mocker):
+    broadcast = mocker.patch.object(translation.manager, "broadcast")
+    mocker.patch.object(translation, "translate_text", return_value="hello")
+
+    await auto_translate_and_broadcast(_payload(), "en")
+
+    [(chat_id, payload)] = [call.args for call in broadcast.call_args_list]
+    assert chat_id == "chat-1"
+    assert payload["message"]["translation"] == "hello"
+
+
+@pytest.mark.asyncio
+async def test_message_is_broadcast_untranslated_on_unexpected_errors(mocker):
+    broadcast = mocker.patch.object(translation.manager, "broadcast")
+    mocker.patch.object(translation, "translate_text", side_effect=RuntimeError("database down"))
+
+    await auto_translate_and_broadcast(_payload(), "en")
+
+    [(chat_id, payload)] = [call.args for call in broadcast.call_args_list]
+    assert "translation" not in payload["message"]
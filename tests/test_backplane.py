@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from api.db.session import SQLALCHEMY_DATABASE_URL, async_engine
+from api.utils.backplane import (
+    MAX_NOTIFY_PAYLOAD,
+    Backplane,
+    PostgresBackplane,
+    _postgres_dsn,
+)
+
+DIALECT = async_engine.dialect.name
+
+
+def _deliver(backplane, channel, frames):
+    received = []
+    backplane._handlers[channel] = received.append
+    for frame in frames:
+        backplane._on_notification(None, 0, channel, frame)
+    return received
+
+
+def test_backplane_requires_publish():
+    with pytest.raises(TypeError):
+        Backplane()
+
+
+def test_small_messages_go_out_whole():
+    backplane = PostgresBackplane("postgresql://unused")
+    frames = backplane._frames("hello")
+
+    assert len(frames) == 1
+    assert _deliver(backplane, "chat", frames) == ["hello"]
+
+
+def test_large_messages_are_chunked_within_the_notify_limit():
+    backplane = PostgresBackplane("postgresql://unused")
+    # Multi-byte characters must not be split across chunks
+    message = "é" * MAX_NOTIFY_PAYLOAD + "x" * 3
+
+    frames = backplane._frames(message)
+
+    assert len(frames) == 3
+    assert all(len(frame.encode("utf-8")) <= MAX_NOTIFY_PAYLOAD for frame in frames)
+    assert _deliver(backplane, "chat", frames) == [message]
+    assert not backplane._partial
+
+
+@pytest.mark.skipif(DIALECT != "postgresql", reason="Needs PostgreSQL LISTEN/NOTIFY")
+@pytest.mark.asyncio
+async def test_large_payloads_cross_workers():
+    dsn = _postgres_dsn(SQLALCHEMY_DATABASE_URL)
+    publisher, listener = PostgresBackplane(dsn), PostgresBackplane(dsn)
+    await publisher.start()
+    await listener.start()
+    received = asyncio.get_running_loop().create_future()
+    try:
+        await listener.subscribe("test_backplane", received.set_result)
+        message = "x" * (3 * MAX_NOTIFY_PAYLOAD)
+
+        await publisher.publish("test_backplane", message)
+
+        assert await asyncio.wait_for(received, timeout=5) == message
+    finally:
+        await listener.stop()
+        await publisher.stop()
@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from api.v1.models.chat import Chat
+from api.v1.models.message import Message
+from api.v1.services.chat_summary import record_message_sent
+
+
+async def _add_chats(db, make_user, user, count):
+    """Give `user` `count` chats, alternating which side of the chat they are on."""
+    for i in range(count):
+        partner = await make_user()
+        if i % 2:
+            chat = Chat(user1_id=user.id, user2_id=partner.id)
+        else:
+            chat = Chat(user1_id=partner.id, user2_id=user.id)
+        db.add(chat)
+        await db.flush()
+        message = Message(
+            chat_id=chat.id,
+            sender_id=partner.id,
+            content=f"hello {i}",
+            timestamp=datetime.utcnow() + timedelta(seconds=i),
+        )
+        db.add(message)
+        await db.flush()
+        record_message_sent(chat, message)
+    await db.commit()
+
+
+async def _chat_list(client, headers, count_queries, expected):
+    with count_queries() as statements:
+        response = await client.get("/api/v1/chat/chats", headers=headers)
+    assert response.status_code == 200
+    assert len(response.json()) == expected
+    return len(statements)
+
+
+@pytest.mark.asyncio
+async def test_chat_list_query_count_is_constant(db, client, make_user, auth_headers, count_queries):
+    user = await make_user()
+    headers = auth_headers(user)
+
+    await _add_chats(db, make_user, user, 2)
+    few = await _chat_list(client, headers, count_queries, 2)
+
+    await _add_chats(db, make_user, user, 18)
+    many = await _chat_list(client, headers, count_queries, 20)
+
+    assert many == few
+
+
+@pytest.mark.asyncio
+async def test_chat_list_is_ordered_by_latest_activity(db, client, make_user, auth_headers):
+    user = await make_user()
+    await _add_chats(db, make_user, user, 3)
+
+    response = await client.get("/api/v1/chat/chats", headers=auth_headers(user))
+
+    previews = [chat["last_message"]["content"] for chat in response.json()]
+    assert previews == ["hello 2", "hello 1", "hello 0"]
@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from api.v1.models.chat import Chat
+from api.v1.models.message import Message
+from api.v1.services.chat_summary import read_watermark, record_messages_sent, rebuild_chat_summaries
+
+
+async def _chat_with_messages(db, sender, recipient, count):
+    chat = Chat(user1_id=sender.id, user2_id=recipient.id)
+    db.add(chat)
+    await db.flush()
+    start = datetime.utcnow()
+    messages = [
+        Message(
+            chat_id=chat.id,
+            sender_id=sender.id,
+            content=f"message {i}",
+            timestamp=start + timedelta(seconds=i),
+        )
+        for i in range(count)
+    ]
+    db.add_all(messages)
+    await db.flush()
+    record_messages_sent(chat, messages)
+    await db.commit()
+    await db.refresh(chat)
+    return chat, messages
+
+
+@pytest.mark.asyncio
+async def test_rebuild_repairs_a_corrupted_summary(db, make_user):
+    alice, bob = await make_user(), await make_user()
+    chat, messages = await _chat_with_messages(db, alice, bob, 3)
+    empty = Chat(user1_id=alice.id, user2_id=bob.id)
+    db.add(empty)
+    await db.flush()
+    chat.last_message_id = None
+    chat.last_message_preview = "stale"
+    chat.user1_unread_count = 7
+    chat.user2_unread_count = 0
+    empty.user2_unread_count = 4
+    await db.commit()
+
+    assert await db.run_sync(rebuild_chat_summaries) == 2
+
+    await db.refresh(chat)
+    await db.refresh(empty)
+    assert chat.last_message_id == messages[-1].id
+    assert chat.last_message_preview == "message 2"
+    assert (chat.user1_unread_count, chat.user2_unread_count) == (0, 3)
+    assert empty.last_message_id is None
+    assert (empty.user1_unread_count, empty.user2_unread_count) == (0, 0)
+
+
+@pytest.mark.asyncio
+async def test_mark_read_up_to_a_message(db, client, make_user, auth_headers):
+    alice, bob = await make_user(), await make_user()
+    chat, messages = await _chat_with_messages(db, alice, bob, 3)
+    url = f"/api/v1/chat/{chat.id}/mark_read"
+
+    response = await client.put(
+        url, params={"up_to_message_id": messages[1].id}, headers=auth_headers(bob)
+    )
+
+    assert response.json()["up_to_message_id"] == messages[1].id
+    await db.refresh(chat)
+    assert read_watermark(chat, bob.id)[1] == messages[1].id
+    assert chat.user2_unread_count == 1
+
+    unknown = await client.put(
+        url, params={"up_to_message_id": "no-such-message"}, headers=auth_headers(bob)
+    )
+    assert unknown.status_code == 404
+
+    await client.put(url, headers=auth_headers(bob))
+    await db.refresh(chat)
+    assert read_watermark(chat, bob.id)[1] == messages[2].id
+    assert chat.user2_unread_count == 0
+
+
+@pytest.mark.asyncio
+async def test_deleting_unread_messages_keeps_the_counter_at_zero_or_above(
+    db, client, make_user, auth_headers
+):
+    alice, bob = await make_user(), await make_user()
+    chat, messages = await _chat_with_messages(db, alice, bob, 2)
+    # A counter that drifted low must not go negative
+    chat.user2_unread_count = 1
+    await db.commit()
+
+    for message in reversed(messages):
+        response = await client.delete(
+            f"/api/v1/chat/{chat.id}/message/{message.id}", headers=auth_headers(alice)
+        )
+        assert response.status_code == 200
+
+        await db.refresh(chat)
+        assert chat.user2_unread_count == 0
+        assert chat.last_message_id == (messages[0].id if message is messages[1] else None)
@@ -0,0 +1,41 @@
+from unittest.mock import AsyncMock
+
+import pytest
+
+from api.v1.models.chat import Chat
+from api.v1.services.membership import MembershipCache, is_known_member, membership_cache
+
+
+def test_invalidate_user_drops_only_that_users_entries():
+    cache = MembershipCache(ttl=60, max_entries=10)
+    cache.remember("alice", "chat-1")
+    cache.remember("alice", "chat-2")
+    cache.remember("bob", "chat-1")
+
+    cache.invalidate_user("alice")
+
+    assert not cache.get("alice", "chat-1")
+    assert not cache.get("alice", "chat-2")
+    assert cache.get("bob", "chat-1")
+
+
+@pytest.mark.asyncio
+async def test_known_member_is_cached(db, make_user):
+    alice, bob = await make_user(), await make_user()
+    chat = Chat(user1_id=alice.id, user2_id=bob.id)
+    db.add(chat)
+    await db.commit()
+
+    assert await is_known_member(db, chat.id, alice.id)
+    assert membership_cache.get(alice.id, chat.id)
+    membership_cache.invalidate(chat)
+
+
+@pytest.mark.asyncio
+async def test_deleted_user_is_refused_on_a_cache_miss():
+    # A token can outlive its account; the chat is never looked at
+    db = AsyncMock()
+    db.get.return_value = None
+
+    assert not await is_known_member(db, "chat-1", "deleted-user")
+    db.get.assert_awaited_once()
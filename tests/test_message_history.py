@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from api.v1.models.chat import Chat
+from api.v1.models.message import Message
+from api.v1.models.reaction import Reaction
+
+
+@pytest.mark.asyncio
+async def test_history_is_a_list_paged_with_cursor_headers(db, client, make_user, auth_headers):
+    alice, bob = await make_user(), await make_user()
+    chat = Chat(user1_id=alice.id, user2_id=bob.id)
+    db.add(chat)
+    await db.flush()
+    start = datetime.utcnow()
+    for i in range(5):
+        db.add(
+            Message(
+                chat_id=chat.id,
+                sender_id=bob.id,
+                content=f"message {i}",
+                timestamp=start + timedelta(seconds=i),
+            )
+        )
+    await db.commit()
+    url = f"/api/v1/chat/{chat.id}/messages"
+    headers = auth_headers(alice)
+
+    newest = await client.get(url, params={"limit": 3}, headers=headers)
+    assert [m["content"] for m in newest.json()] == ["message 4", "message 3", "message 2"]
+    assert "X-Newer-Cursor" not in newest.headers
+
+    older = await client.get(
+        url, params={"limit": 3, "before": newest.headers["X-Older-Cursor"]}, headers=headers
+    )
+    assert [m["content"] for m in older.json()] == ["message 1", "message 0"]
+    assert "X-Older-Cursor" not in older.headers
+
+    newer = await client.get(
+        url, params={"limit": 3, "after": older.headers["X-Newer-Cursor"]}, headers=headers
+    )
+    assert [m["content"] for m in newer.json()] == ["message 4", "message 3", "message 2"]
+
+
+async def _page(client, url, headers, count_queries, limit):
+    with count_queries() as statements:
+        response = await client.get(url, params={"limit": limit}, headers=headers)
+    assert response.status_code == 200
+    assert len(response.json()) == limit
+    return response.json(), len(statements)
+
+
+@pytest.mark.asyncio
+async def test_history_query_count_is_constant(db, client, make_user, auth_headers, count_queries):
+    alice, bob, carol = await make_user(), await make_user(), await make_user()
+    chat = Chat(user1_id=alice.id, user2_id=bob.id)
+    db.add(chat)
+    await db.flush()
+    start = datetime.utcnow()
+    for i in range(12):
+        message = Message(
+            chat_id=chat.id,
+            sender_id=(alice, bob)[i % 2].id,
+            content=f"message {i}",
+            timestamp=start + timedelta(seconds=i),
+        )
+        db.add(message)
+        await db.flush()
+        db.add_all(
+            Reaction(message_id=message.id, user_id=user.id, reaction="+1")
+            for user in (alice, bob, carol)
+        )
+    await db.commit()
+    url = f"/api/v1/chat/{chat.id}/messages"
+    headers = auth_headers(alice)
+    # Warms the membership cache, whose first lookup is an extra statement
+    await client.get(url, params={"limit": 1}, headers=headers)
+
+    _, few = await _page(client, url, headers, count_queries, 2)
+    page, many = await _page(client, url, headers, count_queries, 12)
+
+    assert many == few
+    assert all(len(message["reactions"]) == 3 for message in page)
+    assert {message["sender"]["id"] for message in page} == {alice.id, bob.id}
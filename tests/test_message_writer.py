@@ -0,0 +1,143 @@
+import asyncio
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event, func, select
+from sqlalchemy.exc import IntegrityError
+
+from api.db.session import async_engine
+from api.v1.models.chat import Chat
+from api.v1.models.message import Message
+from api.v1.services import message_writer as writer_module
+from api.v1.services.message_writer import MessageWriter
+
+
+@contextmanager
+def count_commits():
+    commits = []
+
+    def record(conn):
+        commits.append(conn)
+
+    event.listen(async_engine.sync_engine, "commit", record)
+    try:
+        yield commits
+    finally:
+        event.remove(async_engine.sync_engine, "commit", record)
+
+
+@pytest.fixture
+def make_chat(db, make_user):
+    async def make():
+        alice, bob = await make_user(), await make_user()
+        chat = Chat(user1_id=alice.id, user2_id=bob.id)
+        db.add(chat)
+        await db.commit()
+        return chat
+
+    return make
+
+
+async def _stored(db, chat_id):
+    return await db.scalar(
+        select(func.count()).select_from(Message).where(Message.chat_id == chat_id)
+    )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_writes_commit_as_one_batch(db, make_chat):
+    chat = await make_chat()
+    writer = MessageWriter(window=0.05, max_batch=100)
+
+    with count_commits() as commits:
+        results = await asyncio.gather(
+            *(writer.write(chat.id, chat.user1_id, f"message {i}") for i in range(3))
+        )
+
+    assert len(commits) == 1
+    assert writer.stats()["batches"] == 1
+    assert [message.content for message, _ in results] == ["message 0", "message 1", "message 2"]
+    assert len({message.id for message, _ in results}) == 3
+    assert not any(duplicate for _, duplicate in results)
+    assert await _stored(db, chat.id) == 3
+    await db.refresh(chat)
+    assert chat.user2_unread_count == 3
+    assert chat.last_message_id == results[-1][0].id
+
+
+@pytest.mark.asyncio
+async def test_a_full_batch_is_flushed_without_waiting(db, make_chat):
+    chat = await make_chat()
+    writer = MessageWriter(window=60, max_batch=2)
+
+    results = await asyncio.wait_for(
+        asyncio.gather(*(writer.write(chat.id, chat.user1_id, "hi") for _ in range(2))),
+        timeout=5,
+    )
+
+    assert len(results) == 2
+
+
+@pytest.mark.asyncio
+async def test_duplicate_client_id_in_one_batch_is_stored_once(db, make_chat):
+    chat = await make_chat()
+    writer = MessageWriter(window=0.05, max_batch=100)
+
+    with count_commits() as commits:
+        (first, first_duplicate), (second, second_duplicate) = await asyncio.gather(
+            writer.write(chat.id, chat.user1_id, "hello", client_id="c-1"),
+            writer.write(chat.id, chat.user1_id, "hello", client_id="c-1"),
+        )
+
+    assert len(commits) == 1
+    assert (first_duplicate, second_duplicate) == (False, True)
+    assert second.id == first.id
+    assert await _stored(db, chat.id) == 1
+
+
+@pytest.mark.asyncio
+async def test_stored_client_id_resolves_to_the_stored_message(db, make_chat):
+    chat = await make_chat()
+    writer = MessageWriter(window=0.01, max_batch=100)
+    stored, _ = await writer.write(chat.id, chat.user1_id, "hello", client_id="c-1")
+
+    message, duplicate = await writer.write(chat.id, chat.user1_id, "hello", client_id="c-1")
+
+    assert duplicate is True
+    assert message.id == stored.id
+    assert await _stored(db, chat.id) == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_retried_row_by_row(db, make_chat, mocker):
+    chat = await make_chat()
+    taken = uuid.uuid4()
+    db.add(
+        Message(
+            id=str(taken),
+            chat_id=chat.id,
+            sender_id=chat.user1_id,
+            content="already stored",
+            timestamp=datetime.now(),
+        )
+    )
+    await db.commit()
+    # The second write gets an id that is already taken, which fails the batch
+    ids = iter([uuid.uuid4(), taken, uuid.uuid4()])
+    mocker.patch.object(writer_module.uuid, "uuid4", side_effect=lambda: next(ids))
+    writer = MessageWriter(window=0.05, max_batch=100)
+
+    with count_commits() as commits:
+        first, second, third = await asyncio.gather(
+            *(writer.write(chat.id, chat.user1_id, f"message {i}") for i in range(3)),
+            return_exceptions=True,
+        )
+
+    # Only the two rows that went in on their own committed
+    assert len(commits) == 2
+    assert isinstance(second, IntegrityError)
+    assert first[0].content == "message 0" and first[1] is False
+    assert third[0].content == "message 2" and third[1] is False
+    assert await _stored(db, chat.id) == 3
@@ -0,0 +1,35 @@
+import sqlite3
+
+import pytest
+
+from api.core.config import config
+from api.db.pool import InstrumentedPool, pool_status
+
+
+@pytest.mark.asyncio
+async def test_metrics_are_disabled_without_a_token(client, mocker):
+    mocker.patch.object(config, "METRICS_TOKEN", "")
+
+    response = await client.get("/api/v1/metrics/pool")
+
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path", ["/api/v1/metrics/pool", "/api/v1/metrics/websockets"])
+async def test_metrics_require_the_token(client, mocker, path):
+    mocker.patch.object(config, "METRICS_TOKEN", "scrape-me")
+
+    anonymous = await client.get(path)
+    wrong = await client.get(path, headers={"Authorization": "Bearer guess"})
+    right = await client.get(path, headers={"Authorization": "Bearer scrape-me"})
+
+    assert anonymous.status_code == wrong.status_code == 401
+    assert right.status_code == 200
+
+
+def test_pool_status_reports_configured_overflow():
+    pool = InstrumentedPool(lambda: sqlite3.connect(":memory:"), pool_size=3, max_overflow=7)
+
+    assert pool_status(pool)["max_overflow"] == 7
+    assert pool_status(pool.recreate())["max_overflow"] == 7
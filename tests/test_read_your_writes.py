@@ -0,0 +1,84 @@
+from unittest.mock import patch
+
+import pytest
+
+from api.db import session
+from api.utils.backplane import InMemoryBackplane
+from api.utils.recent_writes import RecentWrites
+from api.utils.user import create_access_token, token_user_id
+
+
+class _State:
+    user_id = "alice"
+
+
+class _Request:
+    state = _State()
+
+
+async def _read_session(db):
+    sessions = session.get_read_db(_Request(), db)
+    read_db = await sessions.__anext__()
+    await sessions.aclose()
+    return read_db
+
+
+@pytest.mark.asyncio
+async def test_recent_writers_are_seen_by_every_subscriber():
+    backplane = InMemoryBackplane()
+    recent = RecentWrites(window=60, backplane=backplane)
+    await recent.start()
+
+    await recent.record("alice")
+
+    assert recent.wrote_recently("alice")
+    assert not recent.wrote_recently("bob")
+    assert not recent.wrote_recently(None)
+
+
+@pytest.mark.asyncio
+async def test_writes_expire_after_the_window():
+    recent = RecentWrites(window=0, backplane=InMemoryBackplane())
+    await recent.start()
+
+    await recent.record("alice")
+
+    assert not recent.wrote_recently("alice")
+
+
+@pytest.mark.asyncio
+async def test_read_routes_reuse_the_primary_session_without_a_replica(db):
+    assert session.replica_engine is None
+    assert await _read_session(db) is db
+
+
+@pytest.mark.asyncio
+async def test_recent_writers_read_from_the_primary(db):
+    recent = RecentWrites(window=60, backplane=InMemoryBackplane())
+    await recent.start()
+    await recent.record("alice")
+
+    with patch.object(session, "replica_engine", object()), patch.object(
+        session, "recent_writes", recent
+    ):
+        assert await _read_session(db) is db
+        recent._deadlines.clear()
+        assert await _read_session(db) is not db
+
+
+def test_token_user_id_only_accepts_bearer_access_tokens():
+    token = create_access_token("alice")
+
+    assert token_user_id(f"Bearer {token}") == "alice"
+    assert token_user_id(f"Basic {token}") is None
+    assert token_user_id("Bearer not-a-token") is None
+    assert token_user_id(None) is None
+
+
+@pytest.mark.asyncio
+async def test_a_replica_requires_the_postgres_backplane():
+    import main
+
+    with patch.object(main, "replica_engine", object()):
+        with pytest.raises(RuntimeError, match="BACKPLANE=postgres"):
+            await main.start_backplane()
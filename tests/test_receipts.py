@@ -0,0 +1,115 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from api.v1.models.chat import Chat
+from api.v1.models.message import Message
+from api.v1.services import receipts
+from api.v1.services.chat_summary import (
+    delivered_watermark,
+    read_watermark,
+    record_messages_sent,
+)
+from api.v1.services.receipts import DELIVERED, READ, ReceiptBatcher, apply_receipts
+
+
+@pytest.fixture
+def chat_with_messages(db, make_user):
+    """A chat where the first participant sent `count` messages, oldest first."""
+
+    async def make(count=3):
+        alice, bob = await make_user(), await make_user()
+        chat = Chat(user1_id=alice.id, user2_id=bob.id)
+        db.add(chat)
+        await db.flush()
+        start = datetime.utcnow()
+        messages = [
+            Message(
+                chat_id=chat.id,
+                sender_id=alice.id,
+                content=f"message {i}",
+                timestamp=start + timedelta(seconds=i),
+            )
+            for i in range(count)
+        ]
+        db.add_all(messages)
+        await db.flush()
+        record_messages_sent(chat, messages)
+        await db.commit()
+        await db.refresh(chat)
+        return chat, [message.id for message in messages]
+
+    return make
+
+
+@pytest.mark.asyncio
+async def test_acks_coalesce_to_the_newest_message(db, chat_with_messages):
+    chat, ids = await chat_with_messages()
+    reader = chat.user2_id
+
+    event = await apply_receipts(
+        db,
+        chat.id,
+        {(reader, DELIVERED): {ids[2], ids[0], ids[1]}, (reader, READ): {ids[1], ids[0]}},
+    )
+
+    await db.refresh(chat)
+    assert delivered_watermark(chat, reader)[1] == ids[2]
+    assert read_watermark(chat, reader)[1] == ids[1]
+    assert chat.user2_unread_count == 1
+    assert event == {
+        "type": "receipts",
+        "chat_id": chat.id,
+        "receipts": [{"user_id": reader, "delivered_up_to": ids[2], "read_up_to": ids[1]}],
+    }
+
+
+@pytest.mark.asyncio
+async def test_watermarks_never_move_back(db, chat_with_messages):
+    chat, ids = await chat_with_messages()
+    reader = chat.user2_id
+    await apply_receipts(db, chat.id, {(reader, READ): {ids[2]}})
+
+    assert await apply_receipts(db, chat.id, {(reader, READ): {ids[0]}}) is None
+
+    await db.refresh(chat)
+    assert read_watermark(chat, reader)[1] == ids[2]
+    assert chat.user2_unread_count == 0
+
+
+@pytest.mark.asyncio
+async def test_acks_from_outsiders_or_for_unknown_messages_are_ignored(
+    db, make_user, chat_with_messages
+):
+    chat, ids = await chat_with_messages()
+    outsider = await make_user()
+
+    event = await apply_receipts(
+        db,
+        chat.id,
+        {(outsider.id, READ): {ids[2]}, (chat.user2_id, READ): {"no-such-message"}},
+    )
+
+    assert event is None
+
+
+@pytest.mark.asyncio
+async def test_batcher_applies_a_burst_of_acks_once(db, chat_with_messages, mocker):
+    chat, ids = await chat_with_messages()
+    reader = chat.user2_id
+    broadcast = mocker.patch.object(receipts.manager, "broadcast")
+    batcher = ReceiptBatcher(window=0.01)
+
+    for message_id in ids:
+        batcher.ack(chat.id, reader, DELIVERED, message_id)
+        batcher.ack(chat.id, reader, READ, message_id)
+    await asyncio.sleep(0.05)
+    await asyncio.gather(*batcher._flushes)
+
+    assert (batcher.acks, batcher.flushes) == (6, 1)
+    [(chat_id, event)] = [call.args for call in broadcast.call_args_list]
+    assert chat_id == chat.id
+    assert event["receipts"] == [
+        {"user_id": reader, "delivered_up_to": ids[2], "read_up_to": ids[2]}
+    ]
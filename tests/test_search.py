@@ -0,0 +1,119 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from api.db.session import async_engine
+from api.v1.models.chat import Chat
+from api.v1.models.message import Message
+
+DIALECT = async_engine.dialect.name
+
+
+async def _chat_with(db, user1, user2, *contents):
+    chat = Chat(user1_id=user1.id, user2_id=user2.id)
+    db.add(chat)
+    await db.flush()
+    start = datetime.utcnow()
+    for i, content in enumerate(contents):
+        db.add(
+            Message(
+                chat_id=chat.id,
+                sender_id=user1.id,
+                content=content,
+                timestamp=start + timedelta(seconds=i),
+            )
+        )
+    await db.commit()
+    return chat
+
+
+@pytest.fixture
+def search(client, auth_headers):
+    async def get(user, path, **params):
+        response = await client.get(f"/api/v1/chat{path}", params=params, headers=auth_headers(user))
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    return get
+
+
+@pytest.mark.asyncio
+async def test_search_all_chats_only_covers_own_chats(db, make_user, search):
+    alice, bob, carol = await make_user(), await make_user(), await make_user()
+    own = await _chat_with(db, alice, bob, "lunch at noon?", "sure, lunch sounds good", "bye")
+    await _chat_with(db, bob, carol, "lunch tomorrow")
+
+    body = await search(alice, "/search", keyword="lunch")
+
+    assert [result["chat_id"] for result in body["results"]] == [own.id]
+    assert body["results"][0]["match_count"] == 2
+    assert len(body["results"][0]["messages"]) == 2
+    assert body["next_cursor"] is None
+
+
+@pytest.mark.asyncio
+async def test_search_messages_pages_with_cursor(db, make_user, search):
+    alice, bob = await make_user(), await make_user()
+    chat = await _chat_with(db, alice, bob, *[f"report number {i}" for i in range(5)], "unrelated")
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"keyword": "report", "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        body = await search(alice, f"/{chat.id}/messages/search", **params)
+        seen += [message["message_id"] for message in body["messages"]]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+
+    assert len(seen) == len(set(seen)) == 5
+
+
+@pytest.mark.asyncio
+async def test_search_rejects_an_empty_keyword(make_user, client, auth_headers):
+    user = await make_user()
+
+    response = await client.get("/api/v1/chat/search", params={"keyword": ""}, headers=auth_headers(user))
+
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_search_ignores_a_blank_keyword(make_user, search):
+    user = await make_user()
+
+    body = await search(user, "/search", keyword="   ")
+
+    assert body == {"results": [], "next_cursor": None}
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(DIALECT != "sqlite", reason="SQLite FTS5 branch")
+async def test_sqlite_search_quotes_fts_syntax(db, make_user, search):
+    alice, bob = await make_user(), await make_user()
+    chat = await _chat_with(db, alice, bob, "meet me at the NEAR station", "see you")
+
+    # Operators in user input are matched as plain terms, not parsed
+    body = await search(alice, f"/{chat.id}/messages/search", keyword='NEAR "station')
+
+    [message] = body["messages"]
+    assert message["snippet"] == "meet me at the <mark>NEAR</mark> <mark>station</mark>"
+    assert message["rank"] > 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(DIALECT != "postgresql", reason="PostgreSQL tsvector branch")
+async def test_postgres_search_ranks_and_highlights(db, make_user, search):
+    alice, bob = await make_user(), await make_user()
+    chat = await _chat_with(
+        db, alice, bob, "the train leaves at nine", "train train train delayed", "no match"
+    )
+
+    body = await search(alice, f"/{chat.id}/messages/search", keyword="train -delayed")
+
+    [message] = body["messages"]
+    assert message["content"] == "the train leaves at nine"
+    assert "<mark>train</mark>" in message["snippet"]
+    assert message["rank"] > 0
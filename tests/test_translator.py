@@ -0,0 +1,109 @@
+import pytest
+
+from api.utils.translator import (
+    CircuitBreaker,
+    CircuitOpenError,
+    InvalidLanguageError,
+    TranslationBackend,
+    TranslationError,
+    TranslationExecutor,
+    translator,
+)
+from api.v1.models.chat import Chat
+from api.v1.models.message import Message
+
+
+class ServiceDown(Exception):
+    pass
+
+
+class FakeBackend(TranslationBackend):
+    name = "fake"
+
+    def __init__(self, error=None):
+        self.error = error
+        self.calls = 0
+
+    def translate(self, text: str, target_language: str) -> str:
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return f"{target_language}:{text}"
+
+    def detect(self, text: str) -> str:
+        return "en"
+
+    def supports(self, language: str) -> bool:
+        return language in {"en", "fr"}
+
+    def is_transient(self, error: Exception) -> bool:
+        return isinstance(error, ServiceDown)
+
+
+def _executor(backend):
+    return TranslationExecutor(
+        backend, max_workers=1, timeout=1, breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    )
+
+
+def test_backends_must_implement_the_interface():
+    with pytest.raises(TypeError):
+        TranslationBackend()
+
+
+@pytest.mark.asyncio
+async def test_unsupported_language_is_rejected_before_the_backend():
+    backend = FakeBackend()
+    executor = _executor(backend)
+
+    with pytest.raises(InvalidLanguageError) as raised:
+        await executor.translate("hello", "xx")
+
+    assert raised.value.status_code == 400
+    assert backend.calls == 0
+    assert executor.breaker.failures == 0
+
+
+@pytest.mark.asyncio
+async def test_rejected_requests_do_not_open_the_circuit():
+    executor = _executor(FakeBackend(ValueError("bad payload")))
+
+    for _ in range(3):
+        with pytest.raises(TranslationError):
+            await executor.translate("hello", "fr")
+
+    assert executor.breaker.state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_service_failures_open_the_circuit():
+    backend = FakeBackend(ServiceDown())
+    executor = _executor(backend)
+
+    for _ in range(2):
+        with pytest.raises(TranslationError):
+            await executor.translate("hello", "fr")
+    with pytest.raises(CircuitOpenError):
+        await executor.translate("hello", "fr")
+
+    assert backend.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_translate_route_rejects_unsupported_language(db, client, make_user, auth_headers, mocker):
+    alice, bob = await make_user(), await make_user()
+    chat = Chat(user1_id=alice.id, user2_id=bob.id)
+    db.add(chat)
+    await db.flush()
+    message = Message(chat_id=chat.id, sender_id=bob.id, content="bonjour")
+    db.add(message)
+    await db.commit()
+    mocker.patch.object(translator.backend, "supports", return_value=False)
+
+    response = await client.post(
+        f"/api/v1/chat/{chat.id}/messages/{message.id}/translate",
+        params={"target_language": "xx"},
+        headers=auth_headers(alice),
+    )
+
+    assert response.status_code == 400
@@ -0,0 +1,27 @@
+import threading
+
+import pyotp
+import pytest
+
+from api.v1.routes.auth import two_factor_auth
+
+
+@pytest.mark.asyncio
+async def test_qr_code_is_rendered_off_the_event_loop(client, make_user, auth_headers, mocker):
+    make = two_factor_auth.qrcode.make
+    threads = []
+
+    def record_thread(*args, **kwargs):
+        threads.append(threading.current_thread())
+        return make(*args, **kwargs)
+
+    mocker.patch.object(two_factor_auth.qrcode, "make", side_effect=record_thread)
+    user = await make_user(otp_secret=pyotp.random_base32())
+
+    response = await client.get("/api/v1/auth/2fa/qr-code", headers=auth_headers(user))
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/png"
+    assert response.content.startswith(b"\x89PNG")
+    # Image generation is CPU-bound, so it belongs in the threadpool
+    assert threads and threads[0] is not threading.current_thread()
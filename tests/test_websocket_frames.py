@@ -0,0 +1,28 @@
+from datetime import datetime
+
+import msgpack
+
+from api.utils.websocket import Frame
+
+
+def test_frames_pack_the_source_event_without_reparsing(mocker):
+    frame = Frame.from_event({"type": "ack", "client_id": "c-1"})
+    loads = mocker.patch("api.utils.websocket.orjson.loads")
+
+    assert msgpack.unpackb(frame.packed) == {"type": "ack", "client_id": "c-1"}
+    loads.assert_not_called()
+
+
+def test_datetimes_are_packed_as_in_json():
+    frame = Frame.from_event({"timestamp": datetime(2026, 1, 1)})
+
+    assert frame.text == '{"timestamp":"2026-01-01T00:00:00"}'
+    assert msgpack.unpackb(frame.packed) == {"timestamp": "2026-01-01T00:00:00"}
+
+
+def test_backplane_text_is_packed_once_per_frame():
+    frame = Frame('{"type":"new_message"}')
+
+    assert frame.packed is frame.packed
+    assert msgpack.unpackb(frame.packed) == {"type": "new_message"}
+    assert msgpack.unpackb(Frame("plain text").packed) == "plain text"
@@ -0,0 +1,80 @@
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+import pytest_asyncio
+from starlette.websockets import WebSocketState
+
+from api.core.config import config
+from api.utils.presence import PresenceTracker
+from api.utils.websocket import ConnectionManager
+
+
+def _socket():
+    websocket = MagicMock()
+    websocket.client_state = WebSocketState.CONNECTED
+    websocket.send_text = AsyncMock()
+    websocket.close = AsyncMock()
+    return websocket
+
+
+@pytest_asyncio.fixture
+async def manager():
+    manager = ConnectionManager("test", backplane=AsyncMock(), presence=PresenceTracker())
+    yield manager
+    for key, connections in list(manager.active_connections.items()):
+        for websocket in list(connections):
+            manager.disconnect(key, websocket)
+    if manager._heartbeat:
+        manager._heartbeat.cancel()
+
+
+def _scheduled(manager):
+    return set().union(*manager._wheel.slots)
+
+
+@pytest.mark.asyncio
+async def test_passive_sockets_are_left_to_protocol_pings(manager):
+    websocket = _socket()
+    await manager.connect("key", websocket)
+
+    assert _scheduled(manager) == set()
+    assert manager._heartbeat is None
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_sockets_are_pinged_then_reaped(manager):
+    websocket = _socket()
+    await manager.connect("key", websocket, heartbeat=True)
+    [connection] = _scheduled(manager)
+    connection.last_seen = time.monotonic() - config.WS_PING_INTERVAL_SECONDS
+
+    manager._check_due({connection})
+    assert manager.pings_sent == 1
+
+    manager._check_due({connection})
+    assert manager.reaped == 1
+    assert "key" not in manager.active_connections
+
+    # The close and unsubscribe run as tasks the manager keeps until they finish
+    assert len(manager._tasks) == 2
+    await asyncio.gather(*manager._tasks)
+    websocket.close.assert_awaited_once_with(code=1001)
+    manager.backplane.unsubscribe.assert_awaited_once_with("test:key")
+    assert not manager._tasks
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_sockets_answering_are_kept(manager):
+    websocket = _socket()
+    await manager.connect("key", websocket, heartbeat=True)
+    [connection] = _scheduled(manager)
+    connection.last_seen = time.monotonic() - config.WS_PING_INTERVAL_SECONDS
+    manager._check_due({connection})
+
+    manager.touch("key", websocket)
+    manager._check_due({connection})
+
+    assert manager.reaped == 0
+    assert connection.pinged_at is None
@@ -0,0 +1,138 @@
+import pytest
+from sqlalchemy import func, select
+from starlette.testclient import TestClient
+
+from main import app
+from api.v1.services import chat as chat_service
+from api.db.session import AsyncSessionLocal, Base, async_engine
+from api.utils.user import create_access_token
+from api.v1.models.chat import Chat
+from api.v1.models.message import Message
+from api.v1.models.user import User
+
+
+async def _seed():
+    async with AsyncSessionLocal() as db:
+        alice = User(username="alice", email="alice@example.com")
+        bob = User(username="bob", email="bob@example.com")
+        db.add_all([alice, bob])
+        await db.flush()
+        chat = Chat(user1_id=alice.id, user2_id=bob.id)
+        db.add(chat)
+        await db.commit()
+        return alice.id, chat.id
+
+
+async def _stored(client_id: str) -> int:
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(
+            select(func.count()).select_from(Message).where(Message.client_id == client_id)
+        )
+
+
+async def _clean_up():
+    async with async_engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            await conn.execute(table.delete())
+    await async_engine.dispose()
+
+
+@pytest.fixture
+def chat_socket():
+    """Open a chat socket as a participant; also returns the TestClient for its portal."""
+    # The app, including its database connections, runs on the TestClient's event loop
+    with TestClient(app) as client:
+        user_id, chat_id = client.portal.call(_seed)
+        token = create_access_token(user_id)
+        try:
+            with client.websocket_connect(f"/api/v1/chat/{chat_id}/ws?token={token}") as websocket:
+                yield client, websocket
+        finally:
+            client.portal.call(_clean_up)
+
+
+def _next(websocket, *types):
+    # Skip the chat's own broadcasts (new_message, presence) to reach the reply
+    while True:
+        event = websocket.receive_json()
+        if event["type"] in types:
+            return event
+
+
+def test_socket_send_is_acknowledged(chat_socket):
+    client, websocket = chat_socket
+
+    websocket.send_json({"type": "message", "client_id": "c-1", "content": "hello"})
+    ack = _next(websocket, "ack", "error")
+
+    assert ack["type"] == "ack"
+    assert ack["client_id"] == "c-1"
+    assert ack["message_id"]
+    assert ack["timestamp"]
+    assert ack["duplicate"] is False
+    assert client.portal.call(_stored, "c-1") == 1
+
+
+def test_resent_client_id_is_acknowledged_with_the_stored_message(chat_socket):
+    client, websocket = chat_socket
+
+    websocket.send_json({"type": "message", "client_id": "c-1", "content": "hello"})
+    first = _next(websocket, "ack", "error")
+    websocket.send_json({"type": "message", "client_id": "c-1", "content": "hello"})
+    second = _next(websocket, "ack", "error")
+
+    assert second["type"] == "ack"
+    assert second["duplicate"] is True
+    assert second["message_id"] == first["message_id"]
+    assert second["timestamp"] == first["timestamp"]
+    assert client.portal.call(_stored, "c-1") == 1
+
+
+@pytest.mark.parametrize(
+    "frame",
+    [
+        {"type": "message", "content": "no client id"},
+        {"type": "message", "client_id": "c-1"},
+        {"type": "message", "client_id": "c-1", "content": ""},
+        {"type": "message", "client_id": 1, "content": "hello"},
+    ],
+)
+def test_invalid_message_frames_are_refused(chat_socket, frame):
+    client, websocket = chat_socket
+
+    websocket.send_json(frame)
+    error = _next(websocket, "ack", "error")
+
+    assert error["type"] == "error"
+    assert error["detail"] == "client_id and content are required"
+    assert client.portal.call(_stored, "c-1") == 0
+
+
+def test_undecodable_frames_are_ignored(chat_socket):
+    client, websocket = chat_socket
+
+    websocket.send_text("not json")
+    websocket.send_json({"type": "message", "client_id": "c-1", "content": "hello"})
+
+    # The socket stays open and the next frame is handled
+    assert _next(websocket, "ack", "error")["type"] == "ack"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_resend_returns_the_message_stored_first(db, make_user, mocker):
+    alice, bob = await make_user(), await make_user()
+    chat = Chat(user1_id=alice.id, user2_id=bob.id)
+    db.add(chat)
+    await db.commit()
+    stored, _ = await chat_service._store_message(db, chat, alice.id, "hello", "c-1")
+    # The retry's lookup ran before the first insert committed
+    lookup = mocker.patch.object(
+        chat_service, "_message_by_client_id", side_effect=[None, stored]
+    )
+
+    message, duplicate = await chat_service._store_message(db, chat, alice.id, "hello", "c-1")
+
+    assert duplicate is True
+    assert message is stored
+    assert lookup.call_count == 2
+    assert await _stored("c-1") == 1
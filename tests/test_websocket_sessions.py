@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from main import app
+from api.db.session import AsyncSessionLocal, SQLALCHEMY_DATABASE_URL, _async_url
+from api.utils.user import create_access_token
+from api.v1.models.chat import Chat
+
+POOL_SIZE = 2
+
+
+class _Socket:
+    """A chat WebSocket driven straight through the ASGI interface."""
+
+    def __init__(self, chat_id: str, token: str):
+        self.scope = {
+            "type": "websocket",
+            "asgi": {"version": "3.0"},
+            "scheme": "ws",
+            "path": f"/api/v1/chat/{chat_id}/ws",
+            "raw_path": f"/api/v1/chat/{chat_id}/ws".encode(),
+            "query_string": f"token={token}".encode(),
+            "root_path": "",
+            "headers": [],
+            "server": ("test", 80),
+            "client": ("test", 1234),
+            "subprotocols": [],
+        }
+        self.inbound = asyncio.Queue()
+        self.outbound = asyncio.Queue()
+        self.task = None
+
+    async def open(self):
+        await self.inbound.put({"type": "websocket.connect"})
+        self.task = asyncio.create_task(app(self.scope, self.inbound.get, self.outbound.put))
+        event = await asyncio.wait_for(self.outbound.get(), timeout=5)
+        assert event["type"] == "websocket.accept"
+
+    async def close(self):
+        await self.inbound.put({"type": "websocket.disconnect", "code": 1000})
+        await asyncio.wait_for(self.task, timeout=5)
+
+
+@pytest.mark.asyncio
+async def test_open_sockets_do_not_hold_pooled_connections(db, client, make_user, auth_headers):
+    user = await make_user()
+    chats = []
+    # A chat each, so every handshake misses the membership cache and hits the database
+    for _ in range(POOL_SIZE + 3):
+        chat = Chat(user1_id=user.id, user2_id=(await make_user()).id)
+        db.add(chat)
+        chats.append(chat)
+    await db.commit()
+
+    small = create_async_engine(
+        _async_url(SQLALCHEMY_DATABASE_URL),
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=POOL_SIZE,
+        max_overflow=0,
+        pool_timeout=2,
+    )
+    AsyncSessionLocal.configure(bind=small)
+    token = create_access_token(user.id)
+    sockets = [_Socket(chat.id, token) for chat in chats]
+    try:
+        for socket in sockets:
+            await socket.open()
+
+        response = await asyncio.wait_for(
+            client.get("/api/v1/chat/chats", headers=auth_headers(user)), timeout=10
+        )
+
+        assert response.status_code == 200
+        assert len(response.json()) == len(chats)
+    finally:
+        for socket in sockets:
+            if socket.task is not None:
+                await socket.close()
+        AsyncSessionLocal.configure(bind=db.bind)
+        await small.dispose()